@@ -2,342 +2,426 @@
 # ANALYTICS COM DADOS REAIS - POSTGRESQL
 # ========================
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
 from datetime import datetime
+from typing import List, Optional
+import logging
 
-def get_db_connection():
-    """Obter conexão com PostgreSQL"""
-    return psycopg2.connect(
-        dbname="arvore_pao",
-        user="postgres", 
-        password="123456",
-        host="db",  # Nome do container
-        port=5432
+from app.core.cache import analytics_cache
+from app.core.colunar import (
+    colunas_do_resultado, negociar_formato, resposta_colunar, serializar_tabela, tabela_arrow
+)
+from app.core.etag import verificar_etag
+from app.core.respostas import RespostaORJSON, resposta_confiavel
+from app.services.metricas_vetorizadas import (
+    COLUNAS_PRODUTOS_SQL, calcular_metricas, colunas_de_linhas, metricas_produtos
+)
+from app.services.rollups import TABELAS_ROLLUPS
+from app.schemas.analytics_produtos import (
+    MetricaProduto, ResumoAnalytics, AlertaInteligente, AnalyticsPorCategoria,
+    DashboardAnalytics
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["analytics"])
+
+# Métricas por produto (e o dashboard, que as inclui) também leem os rollups
+TABELAS_METRICAS = ("produtos", *TABELAS_ROLLUPS)
+
+# Resumo inteiro em uma única consulta: a CTE materializada lê o catálogo
+# (produtos_com_estoque: estoque com deltas pendentes) uma só vez e os
+# destaques (maior valor, maior margem, categoria dominante) são extraídos
+# dela com top-N, sem novas varreduras da tabela.
+RESUMO_REAL_SQL = """
+    WITH base AS MATERIALIZED (
+        SELECT
+            nome,
+            categoria,
+            is_active,
+            quantidade_atual,
+            quantidade_minima,
+            preco_venda,
+            preco_custo,
+            (quantidade_atual * preco_venda) as valor,
+            CASE
+                WHEN preco_custo > 0 AND preco_venda > 0
+                THEN ((preco_venda - preco_custo) / preco_venda * 100)
+                ELSE NULL
+            END as margem
+        FROM produtos_com_estoque
+    ),
+    stats AS (
+        SELECT
+            COUNT(*) as total_produtos,
+            COUNT(*) FILTER (WHERE is_active = true) as produtos_ativos,
+            COUNT(*) FILTER (WHERE quantidade_atual <= 0 AND is_active = true) as produtos_sem_estoque,
+            COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima AND quantidade_atual > 0 AND is_active = true) as produtos_estoque_baixo,
+            SUM(valor) FILTER (WHERE is_active = true) as valor_total_estoque,
+            AVG(margem) as margem_media
+        FROM base
+    ),
+    maior_valor AS (
+        SELECT nome, categoria, valor
+        FROM base
+        WHERE is_active = true AND quantidade_atual > 0
+        ORDER BY valor DESC, nome
+        LIMIT 1
+    ),
+    maior_margem AS (
+        SELECT nome, categoria, margem
+        FROM base
+        WHERE is_active = true AND preco_custo > 0 AND preco_venda > preco_custo
+        ORDER BY margem DESC, nome
+        LIMIT 1
+    ),
+    dominante AS (
+        SELECT categoria, COUNT(*) as quantidade
+        FROM base
+        WHERE is_active = true
+        GROUP BY categoria
+        ORDER BY COUNT(*) DESC, categoria
+        LIMIT 1
+    )
+    SELECT
+        s.*,
+        mv.nome as maior_valor_nome,
+        mv.categoria as maior_valor_categoria,
+        mv.valor as maior_valor_valor,
+        mm.nome as maior_margem_nome,
+        mm.categoria as maior_margem_categoria,
+        mm.margem as maior_margem_margem,
+        d.categoria as dominante_categoria,
+        d.quantidade as dominante_quantidade,
+        (d.quantidade * 100.0 / NULLIF(s.produtos_ativos, 0)) as dominante_percentual
+    FROM stats s
+    LEFT JOIN maior_valor mv ON true
+    LEFT JOIN maior_margem mm ON true
+    LEFT JOIN dominante d ON true
+"""
+
+CATEGORIAS_REAL_SQL = """
+    WITH categoria_stats AS (
+        SELECT 
+            categoria,
+            COUNT(*) as total_produtos,
+            SUM(quantidade_atual * preco_venda) as valor_total_estoque,
+            AVG(
+                CASE 
+                    WHEN preco_custo > 0 AND preco_venda > preco_custo 
+                    THEN ((preco_venda - preco_custo) / preco_venda * 100)
+                    ELSE NULL 
+                END
+            ) as margem_media,
+            COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima) as produtos_estoque_baixo
+        FROM produtos_com_estoque
+        WHERE is_active = true
+        GROUP BY categoria
+    ),
+    total_estoque AS (
+        SELECT SUM(quantidade_atual * preco_venda) as total_geral
+        FROM produtos_com_estoque
+        WHERE is_active = true
+    )
+    SELECT 
+        cs.*,
+        (cs.valor_total_estoque * 100.0 / te.total_geral) as percentual_do_total
+    FROM categoria_stats cs
+    CROSS JOIN total_estoque te
+    ORDER BY cs.valor_total_estoque DESC
+"""
+
+# ========================
+# CÁLCULOS (compartilhados entre endpoints e dashboard)
+# ========================
+
+async def carregar_resumo(db: AsyncSession) -> ResumoAnalytics:
+    """Resumo geral a partir de RESUMO_REAL_SQL"""
+    result = await db.execute(text(RESUMO_REAL_SQL))
+    resumo = result.mappings().first()
+
+    return ResumoAnalytics(
+        total_produtos=resumo['total_produtos'],
+        produtos_ativos=resumo['produtos_ativos'],
+        produtos_estoque_baixo=resumo['produtos_estoque_baixo'],
+        produtos_sem_estoque=resumo['produtos_sem_estoque'],
+        valor_total_estoque=Decimal(str(resumo['valor_total_estoque'] or 0)),
+        margem_media=float(resumo['margem_media'] or 0),
+        produto_maior_valor={
+            "nome": resumo['maior_valor_nome'],
+            "valor": float(resumo['maior_valor_valor']),
+            "categoria": resumo['maior_valor_categoria']
+        } if resumo['maior_valor_nome'] is not None else None,
+        produto_maior_margem={
+            "nome": resumo['maior_margem_nome'],
+            "margem": float(resumo['maior_margem_margem']),
+            "categoria": resumo['maior_margem_categoria']
+        } if resumo['maior_margem_nome'] is not None else None,
+        categoria_dominante={
+            "categoria": resumo['dominante_categoria'],
+            "quantidade": resumo['dominante_quantidade'],
+            "percentual": float(resumo['dominante_percentual'] or 0)
+        } if resumo['dominante_quantidade'] is not None else None
+    )
+
+
+async def carregar_metricas_produtos(db: AsyncSession) -> List[MetricaProduto]:
+    """Métricas por produto ativo, ordenadas por criticidade
+
+    Uma leitura das colunas base; o cálculo é vetorizado em
+    app/services/metricas_vetorizadas.py.
+    """
+    result = await db.execute(text(COLUNAS_PRODUTOS_SQL))
+    return metricas_produtos(result.all())
+
+
+async def carregar_categorias(db: AsyncSession) -> List[AnalyticsPorCategoria]:
+    """Analytics agregados por categoria"""
+    result = await db.execute(text(CATEGORIAS_REAL_SQL))
+
+    categorias_data = result.mappings().all()
+
+    categorias = []
+    for cat in categorias_data:
+        categoria = AnalyticsPorCategoria(
+            categoria=cat['categoria'],
+            total_produtos=cat['total_produtos'],
+            valor_total_estoque=Decimal(str(cat['valor_total_estoque'] or 0)),
+            margem_media=float(cat['margem_media'] or 0),
+            produtos_estoque_baixo=cat['produtos_estoque_baixo'],
+            produto_mais_vendido="N/A",  # Implementar com dados de vendas futuramente
+            percentual_do_total=float(cat['percentual_do_total'] or 0)
+        )
+        categorias.append(categoria)
+
+    return categorias
+
+
+async def carregar_alertas(db: AsyncSession) -> List[AlertaInteligente]:
+    """Alertas de estoque e margem, ordenados por urgência
+
+    Montados com model_construct: os valores numéricos vêm direto do
+    banco e os textos são fixos, não há o que validar.
+    """
+    alerta = AlertaInteligente.model_construct
+    alertas = []
+
+    # Produtos sem estoque
+    result = await db.execute(text("""
+        SELECT id, nome FROM produtos_com_estoque
+        WHERE is_active = true AND quantidade_atual <= 0
+        ORDER BY nome
+    """))
+    sem_estoque = result.mappings().all()
+
+    for produto in sem_estoque:
+        alertas.append(alerta(
+            tipo="CRITICO",
+            categoria="estoque", 
+            titulo="Produto Sem Estoque",
+            descricao=f"{produto['nome']} está com estoque zerado",
+            produto_id=produto['id'],
+            produto_nome=produto['nome'],
+            valor_metrica=Decimal('0'),
+            threshold=Decimal('1'),
+            urgencia=5,
+            acao_sugerida="Fazer reposição urgente"
+        ))
+
+    # Produtos com estoque baixo
+    result = await db.execute(text("""
+        SELECT id, nome, quantidade_atual, quantidade_minima
+        FROM produtos_com_estoque
+        WHERE is_active = true 
+          AND quantidade_atual > 0 
+          AND quantidade_atual <= quantidade_minima
+        ORDER BY (quantidade_atual / NULLIF(quantidade_minima, 0))
+    """))
+    estoque_baixo = result.mappings().all()
+
+    for produto in estoque_baixo:
+        alertas.append(alerta(
+            tipo="ALTO",
+            categoria="estoque",
+            titulo="Estoque Baixo", 
+            descricao=f"{produto['nome']}: {produto['quantidade_atual']} unidades (mín: {produto['quantidade_minima']})",
+            produto_id=produto['id'],
+            produto_nome=produto['nome'],
+            valor_metrica=produto['quantidade_atual'],
+            threshold=produto['quantidade_minima'],
+            urgencia=4,
+            acao_sugerida="Agendar reposição em 1-2 dias"
+        ))
+
+    # Produtos com margem baixa (< 20%)
+    result = await db.execute(text("""
+        SELECT id, nome, preco_venda, preco_custo,
+               ((preco_venda - preco_custo) / preco_venda * 100) as margem
+        FROM produtos 
+        WHERE is_active = true 
+          AND preco_custo > 0 
+          AND preco_venda > preco_custo
+          AND ((preco_venda - preco_custo) / preco_venda * 100) < 20
+        ORDER BY ((preco_venda - preco_custo) / preco_venda * 100)
+    """))
+    margem_baixa = result.mappings().all()
+
+    for produto in margem_baixa:
+        alertas.append(alerta(
+            tipo="MEDIO",
+            categoria="margem",
+            titulo="Margem Baixa",
+            descricao=f"{produto['nome']} tem margem de apenas {produto['margem']:.1f}%",
+            produto_id=produto['id'],
+            produto_nome=produto['nome'],
+            valor_metrica=produto['margem'],
+            threshold=Decimal('20'),
+            urgencia=2,
+            acao_sugerida="Revisar preço de venda ou negociar custo"
+        ))
+
+    # Ordenar por urgência
+    alertas.sort(key=lambda x: x.urgencia, reverse=True)
+    return alertas
+
+
+async def carregar_metricas_colunar(db: AsyncSession, formato: str) -> bytes:
+    """Métricas por produto em Arrow/Parquet: arrays do motor vetorizado direto para colunas"""
+    result = await db.execute(text(COLUNAS_PRODUTOS_SQL))
+    metricas = calcular_metricas(colunas_de_linhas(result.all()))
+    return serializar_tabela(tabela_arrow(metricas, dicionario=("categoria", "status_estoque")), formato)
+
+
+async def carregar_categorias_colunar(db: AsyncSession, formato: str) -> bytes:
+    """Analytics por categoria em Arrow/Parquet"""
+    result = await db.execute(text(CATEGORIAS_REAL_SQL))
+    colunas = colunas_do_resultado(list(result.keys()), result.all())
+    return serializar_tabela(tabela_arrow(colunas), formato)
+
+
+async def carregar_dashboard(db: AsyncSession) -> DashboardAnalytics:
+    """Os quatro painéis do dashboard em uma única transação/snapshot
+
+    REPEATABLE READ garante que resumo, produtos, categorias e alertas
+    enxergam exatamente o mesmo estado da tabela, em uma só conexão.
+    """
+    # Encerrar transação implícita anterior (ex.: leitura da versão p/ ETag)
+    if db.in_transaction():
+        await db.commit()
+
+    await db.connection(execution_options={
+        "isolation_level": "REPEATABLE READ",
+        "postgresql_readonly": True
+    })
+
+    # Partes já montadas acima; sem revalidar as listas
+    return DashboardAnalytics.model_construct(
+        resumo=await carregar_resumo(db),
+        produtos=await carregar_metricas_produtos(db),
+        categorias=await carregar_categorias(db),
+        alertas=await carregar_alertas(db),
+        gerado_em=datetime.now()
     )
 
-@app.get("/api/v1/analytics/resumo-real", response_model=ResumoAnalytics)
-def analytics_resumo_real():
+# ========================
+# ENDPOINTS
+# ========================
+
+@router.get("/api/v1/analytics/resumo-real", response_model=ResumoAnalytics)
+async def analytics_resumo_real(request: Request, response: Response):
     """📊 Resumo geral com dados reais do PostgreSQL"""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                
-                # Estatísticas gerais
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_produtos,
-                        COUNT(*) FILTER (WHERE is_active = true) as produtos_ativos,
-                        COUNT(*) FILTER (WHERE quantidade_atual <= 0 AND is_active = true) as produtos_sem_estoque,
-                        COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima AND quantidade_atual > 0 AND is_active = true) as produtos_estoque_baixo,
-                        SUM(quantidade_atual * preco_venda) FILTER (WHERE is_active = true) as valor_total_estoque,
-                        AVG(
-                            CASE 
-                                WHEN preco_custo > 0 AND preco_venda > 0 
-                                THEN ((preco_venda - preco_custo) / preco_venda * 100)
-                                ELSE NULL 
-                            END
-                        ) as margem_media
-                    FROM produtos
-                """)
-                stats = cursor.fetchone()
-                
-                # Produto com maior valor em estoque
-                cursor.execute("""
-                    SELECT nome, categoria, (quantidade_atual * preco_venda) as valor
-                    FROM produtos 
-                    WHERE is_active = true AND quantidade_atual > 0
-                    ORDER BY (quantidade_atual * preco_venda) DESC 
-                    LIMIT 1
-                """)
-                produto_maior_valor = cursor.fetchone()
-                
-                # Produto com maior margem
-                cursor.execute("""
-                    SELECT nome, categoria, 
-                           ((preco_venda - preco_custo) / preco_venda * 100) as margem
-                    FROM produtos 
-                    WHERE is_active = true AND preco_custo > 0 AND preco_venda > preco_custo
-                    ORDER BY ((preco_venda - preco_custo) / preco_venda * 100) DESC 
-                    LIMIT 1
-                """)
-                produto_maior_margem = cursor.fetchone()
-                
-                # Categoria dominante
-                cursor.execute("""
-                    SELECT categoria, COUNT(*) as quantidade,
-                           (COUNT(*) * 100.0 / (SELECT COUNT(*) FROM produtos WHERE is_active = true)) as percentual
-                    FROM produtos 
-                    WHERE is_active = true
-                    GROUP BY categoria 
-                    ORDER BY COUNT(*) DESC 
-                    LIMIT 1
-                """)
-                categoria_dominante = cursor.fetchone()
-        
-        return ResumoAnalytics(
-            total_produtos=stats['total_produtos'],
-            produtos_ativos=stats['produtos_ativos'], 
-            produtos_estoque_baixo=stats['produtos_estoque_baixo'],
-            produtos_sem_estoque=stats['produtos_sem_estoque'],
-            valor_total_estoque=Decimal(str(stats['valor_total_estoque'] or 0)),
-            margem_media=float(stats['margem_media'] or 0),
-            produto_maior_valor={
-                "nome": produto_maior_valor['nome'] if produto_maior_valor else "N/A",
-                "valor": float(produto_maior_valor['valor']) if produto_maior_valor else 0,
-                "categoria": produto_maior_valor['categoria'] if produto_maior_valor else "N/A"
-            } if produto_maior_valor else None,
-            produto_maior_margem={
-                "nome": produto_maior_margem['nome'] if produto_maior_margem else "N/A", 
-                "margem": float(produto_maior_margem['margem']) if produto_maior_margem else 0,
-                "categoria": produto_maior_margem['categoria'] if produto_maior_margem else "N/A"
-            } if produto_maior_margem else None,
-            categoria_dominante={
-                "categoria": categoria_dominante['categoria'] if categoria_dominante else "N/A",
-                "quantidade": categoria_dominante['quantidade'] if categoria_dominante else 0,
-                "percentual": float(categoria_dominante['percentual']) if categoria_dominante else 0
-            } if categoria_dominante else None
+        nao_modificado = await verificar_etag(request, response)
+        if nao_modificado:
+            return nao_modificado
+        return await analytics_cache.obter_ou_calcular(
+            "analytics:resumo-real", carregar_resumo
         )
-        
     except Exception as e:
         logger.error(f"Erro no resumo analytics real: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar dados reais: {str(e)}")
 
-@app.get("/api/v1/analytics/produtos-real", response_model=List[MetricaProduto])
-def analytics_produtos_real():
-    """📈 Métricas detalhadas por produto - dados reais"""
+@router.get("/api/v1/analytics/produtos-real", response_model=List[MetricaProduto], response_class=RespostaORJSON)
+async def analytics_produtos_real(
+    request: Request,
+    response: Response,
+    formato: Optional[str] = Query(None, description="json, arrow ou parquet (padrão: cabeçalho Accept)")
+):
+    """📈 Métricas detalhadas por produto - dados reais (JSON, Arrow IPC ou Parquet)"""
+    formato = negociar_formato(request, formato)
+    response.headers["Vary"] = "Accept"
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT 
-                        id,
-                        nome,
-                        categoria,
-                        quantidade_atual,
-                        quantidade_minima,
-                        preco_venda,
-                        preco_custo,
-                        (quantidade_atual * preco_venda) as valor_estoque_total,
-                        CASE 
-                            WHEN preco_custo > 0 AND preco_venda > preco_custo 
-                            THEN (preco_venda - preco_custo)
-                            ELSE NULL 
-                        END as margem_bruta,
-                        CASE 
-                            WHEN preco_custo > 0 AND preco_venda > preco_custo 
-                            THEN ((preco_venda - preco_custo) / preco_venda * 100)
-                            ELSE NULL 
-                        END as margem_percentual,
-                        CASE 
-                            WHEN quantidade_atual <= 0 THEN 'sem_estoque'
-                            WHEN quantidade_atual <= quantidade_minima THEN 'baixo'
-                            WHEN quantidade_atual <= (quantidade_minima * 2) THEN 'atencao'
-                            ELSE 'normal'
-                        END as status_estoque,
-                        CASE 
-                            WHEN quantidade_atual <= quantidade_minima THEN true
-                            ELSE false
-                        END as precisa_reposicao,
-                        CASE 
-                            WHEN quantidade_atual <= 0 THEN 5
-                            WHEN quantidade_atual <= quantidade_minima THEN 4  
-                            WHEN quantidade_atual <= (quantidade_minima * 1.5) THEN 3
-                            ELSE 1
-                        END as nivel_urgencia,
-                        -- Estimativa simples de dias restantes
-                        CASE 
-                            WHEN quantidade_atual > 0 THEN GREATEST(1, quantidade_atual / GREATEST(1, quantidade_minima) * 30)
-                            ELSE 0
-                        END as dias_estoque_restante,
-                        (quantidade_atual * 100.0 / GREATEST(quantidade_minima * 3, 1)) as percentual_estoque
-                    FROM produtos 
-                    WHERE is_active = true
-                    ORDER BY 
-                        CASE 
-                            WHEN quantidade_atual <= 0 THEN 1
-                            WHEN quantidade_atual <= quantidade_minima THEN 2
-                            ELSE 3
-                        END,
-                        nome
-                """)
-                
-                produtos_data = cursor.fetchall()
-                
-                metricas = []
-                for produto in produtos_data:
-                    metrica = MetricaProduto(
-                        produto_id=produto['id'],
-                        nome=produto['nome'],
-                        categoria=produto['categoria'],
-                        quantidade_atual=Decimal(str(produto['quantidade_atual'])),
-                        quantidade_minima=Decimal(str(produto['quantidade_minima'])),
-                        percentual_estoque=float(produto['percentual_estoque']),
-                        dias_estoque_restante=int(produto['dias_estoque_restante']),
-                        preco_venda=Decimal(str(produto['preco_venda'])),
-                        preco_custo=Decimal(str(produto['preco_custo'] or 0)),
-                        margem_bruta=Decimal(str(produto['margem_bruta'] or 0)),
-                        margem_percentual=float(produto['margem_percentual'] or 0),
-                        valor_estoque_total=Decimal(str(produto['valor_estoque_total'])),
-                        status_estoque=produto['status_estoque'],
-                        precisa_reposicao=produto['precisa_reposicao'],
-                        nivel_urgencia=produto['nivel_urgencia']
-                    )
-                    metricas.append(metrica)
-                    
-                return metricas
-                
+        nao_modificado = await verificar_etag(request, response, variante="" if formato == "json" else formato)
+        if nao_modificado:
+            return nao_modificado
+        if formato != "json":
+            corpo = await analytics_cache.obter_ou_calcular(
+                f"analytics:produtos-real:{formato}", lambda sessao: carregar_metricas_colunar(sessao, formato),
+                tabelas=TABELAS_METRICAS
+            )
+            return resposta_colunar(corpo, formato, "produtos-real", response)
+        resultado = await analytics_cache.obter_ou_calcular(
+            "analytics:produtos-real", carregar_metricas_produtos, tabelas=TABELAS_METRICAS
+        )
+        return resposta_confiavel(resultado, response)
     except Exception as e:
         logger.error(f"Erro nas métricas por produto real: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar produtos reais: {str(e)}")
 
-@app.get("/api/v1/analytics/categorias-real", response_model=List[AnalyticsPorCategoria])
-def analytics_categorias_real():
-    """🏷️ Analytics por categoria - dados reais"""
+@router.get("/api/v1/analytics/categorias-real", response_model=List[AnalyticsPorCategoria])
+async def analytics_categorias_real(
+    request: Request,
+    response: Response,
+    formato: Optional[str] = Query(None, description="json, arrow ou parquet (padrão: cabeçalho Accept)")
+):
+    """🏷️ Analytics por categoria - dados reais (JSON, Arrow IPC ou Parquet)"""
+    formato = negociar_formato(request, formato)
+    response.headers["Vary"] = "Accept"
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    WITH categoria_stats AS (
-                        SELECT 
-                            categoria,
-                            COUNT(*) as total_produtos,
-                            SUM(quantidade_atual * preco_venda) as valor_total_estoque,
-                            AVG(
-                                CASE 
-                                    WHEN preco_custo > 0 AND preco_venda > preco_custo 
-                                    THEN ((preco_venda - preco_custo) / preco_venda * 100)
-                                    ELSE NULL 
-                                END
-                            ) as margem_media,
-                            COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima) as produtos_estoque_baixo
-                        FROM produtos 
-                        WHERE is_active = true
-                        GROUP BY categoria
-                    ),
-                    total_estoque AS (
-                        SELECT SUM(quantidade_atual * preco_venda) as total_geral
-                        FROM produtos 
-                        WHERE is_active = true
-                    )
-                    SELECT 
-                        cs.*,
-                        (cs.valor_total_estoque * 100.0 / te.total_geral) as percentual_do_total
-                    FROM categoria_stats cs
-                    CROSS JOIN total_estoque te
-                    ORDER BY cs.valor_total_estoque DESC
-                """)
-                
-                categorias_data = cursor.fetchall()
-                
-                categorias = []
-                for cat in categorias_data:
-                    categoria = AnalyticsPorCategoria(
-                        categoria=cat['categoria'],
-                        total_produtos=cat['total_produtos'],
-                        valor_total_estoque=Decimal(str(cat['valor_total_estoque'] or 0)),
-                        margem_media=float(cat['margem_media'] or 0),
-                        produtos_estoque_baixo=cat['produtos_estoque_baixo'],
-                        produto_mais_vendido="N/A",  # Implementar com dados de vendas futuramente
-                        percentual_do_total=float(cat['percentual_do_total'] or 0)
-                    )
-                    categorias.append(categoria)
-                    
-                return categorias
-                
+        nao_modificado = await verificar_etag(request, response, variante="" if formato == "json" else formato)
+        if nao_modificado:
+            return nao_modificado
+        if formato != "json":
+            corpo = await analytics_cache.obter_ou_calcular(
+                f"analytics:categorias-real:{formato}", lambda sessao: carregar_categorias_colunar(sessao, formato)
+            )
+            return resposta_colunar(corpo, formato, "categorias-real", response)
+        return await analytics_cache.obter_ou_calcular(
+            "analytics:categorias-real", carregar_categorias
+        )
     except Exception as e:
         logger.error(f"Erro nas métricas por categoria real: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar categorias reais: {str(e)}")
 
-@app.get("/api/v1/analytics/alertas-real", response_model=List[AlertaInteligente])
-def alertas_reais():
+@router.get("/api/v1/analytics/alertas-real", response_model=List[AlertaInteligente], response_class=RespostaORJSON)
+async def alertas_reais(request: Request, response: Response):
     """⚠️ Alertas baseados em dados reais"""
     try:
-        alertas = []
-        
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                
-                # Produtos sem estoque
-                cursor.execute("""
-                    SELECT id, nome FROM produtos 
-                    WHERE is_active = true AND quantidade_atual <= 0
-                    ORDER BY nome
-                """)
-                sem_estoque = cursor.fetchall()
-                
-                for produto in sem_estoque:
-                    alertas.append(AlertaInteligente(
-                        tipo="CRITICO",
-                        categoria="estoque", 
-                        titulo="Produto Sem Estoque",
-                        descricao=f"{produto['nome']} está com estoque zerado",
-                        produto_id=produto['id'],
-                        produto_nome=produto['nome'],
-                        valor_metrica=Decimal('0'),
-                        threshold=Decimal('1'),
-                        urgencia=5,
-                        acao_sugerida="Fazer reposição urgente"
-                    ))
-                
-                # Produtos com estoque baixo
-                cursor.execute("""
-                    SELECT id, nome, quantidade_atual, quantidade_minima
-                    FROM produtos 
-                    WHERE is_active = true 
-                      AND quantidade_atual > 0 
-                      AND quantidade_atual <= quantidade_minima
-                    ORDER BY (quantidade_atual / NULLIF(quantidade_minima, 0))
-                """)
-                estoque_baixo = cursor.fetchall()
-                
-                for produto in estoque_baixo:
-                    alertas.append(AlertaInteligente(
-                        tipo="ALTO",
-                        categoria="estoque",
-                        titulo="Estoque Baixo", 
-                        descricao=f"{produto['nome']}: {produto['quantidade_atual']} unidades (mín: {produto['quantidade_minima']})",
-                        produto_id=produto['id'],
-                        produto_nome=produto['nome'],
-                        valor_metrica=Decimal(str(produto['quantidade_atual'])),
-                        threshold=Decimal(str(produto['quantidade_minima'])),
-                        urgencia=4,
-                        acao_sugerida="Agendar reposição em 1-2 dias"
-                    ))
-                
-                # Produtos com margem baixa (< 20%)
-                cursor.execute("""
-                    SELECT id, nome, preco_venda, preco_custo,
-                           ((preco_venda - preco_custo) / preco_venda * 100) as margem
-                    FROM produtos 
-                    WHERE is_active = true 
-                      AND preco_custo > 0 
-                      AND preco_venda > preco_custo
-                      AND ((preco_venda - preco_custo) / preco_venda * 100) < 20
-                    ORDER BY ((preco_venda - preco_custo) / preco_venda * 100)
-                """)
-                margem_baixa = cursor.fetchall()
-                
-                for produto in margem_baixa:
-                    alertas.append(AlertaInteligente(
-                        tipo="MEDIO",
-                        categoria="margem",
-                        titulo="Margem Baixa",
-                        descricao=f"{produto['nome']} tem margem de apenas {produto['margem']:.1f}%",
-                        produto_id=produto['id'],
-                        produto_nome=produto['nome'],
-                        valor_metrica=Decimal(str(produto['margem'])),
-                        threshold=Decimal('20'),
-                        urgencia=2,
-                        acao_sugerida="Revisar preço de venda ou negociar custo"
-                    ))
-        
-        # Ordenar por urgência
-        alertas.sort(key=lambda x: x.urgencia, reverse=True)
-        return alertas
-        
+        nao_modificado = await verificar_etag(request, response)
+        if nao_modificado:
+            return nao_modificado
+        resultado = await analytics_cache.obter_ou_calcular(
+            "analytics:alertas-real", carregar_alertas
+        )
+        return resposta_confiavel(resultado, response)
     except Exception as e:
         logger.error(f"Erro nos alertas reais: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar alertas reais: {str(e)}")
 
+@router.get("/api/v1/analytics/dashboard", response_model=DashboardAnalytics, response_class=RespostaORJSON)
+async def analytics_dashboard(request: Request, response: Response):
+    """🎨 Resumo, produtos, categorias e alertas do dashboard em uma requisição"""
+    try:
+        nao_modificado = await verificar_etag(request, response)
+        if nao_modificado:
+            return nao_modificado
+        resultado = await analytics_cache.obter_ou_calcular(
+            "analytics:dashboard", carregar_dashboard, tabelas=TABELAS_METRICAS
+        )
+        return resposta_confiavel(resultado, response)
+    except Exception as e:
+        logger.error(f"Erro no dashboard analytics: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao montar dashboard: {str(e)}")
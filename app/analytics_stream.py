@@ -0,0 +1,226 @@
+# ========================
+# DASHBOARD AO VIVO - SERVER-SENT EVENTS
+# ========================
+# Um único broadcaster por processo verifica periodicamente uma
+# assinatura barata da tabela `produtos`. Só quando ela muda o resumo e
+# os alertas são recalculados (uma vez) e o delta é enviado a todos os
+# clientes conectados.
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database_async import AsyncSessionLocal
+from app.analytics_real_data import carregar_resumo, carregar_alertas
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["analytics"])
+
+# Detecta mudanças de estoque, preços, mínimos e ativação sem montar payload
+ASSINATURA_SQL = """
+    SELECT
+        COUNT(*) as total,
+        COALESCE(SUM(hashtext(concat_ws(':',
+            id, quantidade_atual, quantidade_minima,
+            preco_venda, preco_custo, is_active
+        ))::bigint), 0) as hash_estado
+    FROM produtos_com_estoque
+"""
+
+FILA_MAX = 32
+
+
+def _chave_alerta(alerta: Dict[str, Any]) -> str:
+    return f"{alerta['categoria']}:{alerta['produto_id']}"
+
+
+class DashboardBroadcaster:
+    """Fan-out de KPIs e alertas: N clientes custam uma computação"""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._assinantes: Set[asyncio.Queue] = set()
+        self._tarefa: Optional[asyncio.Task] = None
+        self._acordar = asyncio.Event()
+        self._assinatura = None
+        self._estado: Optional[Dict[str, Any]] = None
+        self._versao = 0
+        self.computacoes = 0
+        self.verificacoes = 0
+
+    # ---------- assinantes ----------
+    def assinar(self) -> asyncio.Queue:
+        fila: asyncio.Queue = asyncio.Queue(maxsize=FILA_MAX)
+        self._assinantes.add(fila)
+
+        if self._estado is not None:
+            fila.put_nowait(self._evento_snapshot())
+
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._loop())
+        return fila
+
+    def cancelar(self, fila: asyncio.Queue) -> None:
+        self._assinantes.discard(fila)
+        if not self._assinantes and self._tarefa is not None:
+            # Sem clientes: parar de consultar o banco e invalidar o estado
+            self._tarefa.cancel()
+            self._tarefa = None
+            self._assinatura = None
+            self._estado = None
+
+    def notificar_alteracao(self) -> None:
+        """Antecipar a próxima verificação (ex.: após escrita em produtos)"""
+        self._acordar.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "assinantes": len(self._assinantes),
+            "versao": self._versao,
+            "verificacoes": self.verificacoes,
+            "computacoes": self.computacoes,
+            "intervalo_segundos": self.intervalo,
+        }
+
+    # ---------- loop de verificação ----------
+    async def _loop(self):
+        while True:
+            try:
+                await self._verificar()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no stream do dashboard: {e}")
+
+            try:
+                await asyncio.wait_for(self._acordar.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._acordar.clear()
+
+    async def _verificar(self):
+        self.verificacoes += 1
+
+        async with AsyncSessionLocal() as db:
+            await db.connection(execution_options={
+                "isolation_level": "REPEATABLE READ",
+                "postgresql_readonly": True
+            })
+            result = await db.execute(text(ASSINATURA_SQL))
+            assinatura = tuple(result.one())
+            if assinatura == self._assinatura and self._estado is not None:
+                return
+
+            resumo = await carregar_resumo(db)
+            alertas = await carregar_alertas(db)
+
+        self.computacoes += 1
+        novo_estado = {
+            "resumo": resumo.model_dump(mode="json"),
+            "alertas": [
+                {**a, "chave": _chave_alerta(a)}
+                for a in (alerta.model_dump(mode="json") for alerta in alertas)
+            ],
+        }
+
+        estado_anterior = self._estado
+        self._assinatura = assinatura
+        self._estado = novo_estado
+
+        if estado_anterior is None:
+            self._versao += 1
+            self._publicar(self._evento_snapshot())
+            return
+
+        delta = self._calcular_delta(estado_anterior, novo_estado)
+        if delta:
+            self._versao += 1
+            self._publicar({"tipo": "delta", "versao": self._versao, "dados": {"versao": self._versao, **delta}})
+
+    # ---------- eventos ----------
+    def _evento_snapshot(self) -> Dict[str, Any]:
+        return {
+            "tipo": "snapshot",
+            "versao": self._versao,
+            "dados": {"versao": self._versao, **self._estado},
+        }
+
+    @staticmethod
+    def _calcular_delta(anterior: Dict[str, Any], novo: Dict[str, Any]) -> Dict[str, Any]:
+        delta: Dict[str, Any] = {}
+
+        resumo_alterado = {
+            campo: valor for campo, valor in novo["resumo"].items()
+            if anterior["resumo"].get(campo) != valor
+        }
+        if resumo_alterado:
+            delta["resumo"] = resumo_alterado
+
+        antigos = {a["chave"]: a for a in anterior["alertas"]}
+        novos = {a["chave"]: a for a in novo["alertas"]}
+
+        alterados = [a for chave, a in novos.items() if antigos.get(chave) != a]
+        removidos = [chave for chave in antigos if chave not in novos]
+        if alterados:
+            delta["alertas_alterados"] = alterados
+        if removidos:
+            delta["alertas_removidos"] = removidos
+
+        return delta
+
+    def _publicar(self, evento: Dict[str, Any]) -> None:
+        for fila in list(self._assinantes):
+            try:
+                fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                # Cliente lento: descartar pendências e ressincronizar com snapshot
+                while not fila.empty():
+                    fila.get_nowait()
+                fila.put_nowait(self._evento_snapshot())
+
+
+broadcaster = DashboardBroadcaster(intervalo=settings.ANALYTICS_STREAM_INTERVALO)
+
+
+def _formatar_sse(evento: Dict[str, Any]) -> str:
+    dados = json.dumps(evento["dados"], ensure_ascii=False)
+    return f"event: {evento['tipo']}\nid: {evento['versao']}\ndata: {dados}\n\n"
+
+
+@router.get("/api/v1/analytics/stream")
+async def analytics_stream(request: Request):
+    """📡 KPIs e alertas em tempo real (Server-Sent Events)"""
+    fila = broadcaster.assinar()
+
+    async def eventos():
+        try:
+            yield f"retry: {int(settings.ANALYTICS_STREAM_INTERVALO * 1000)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(
+                        fila.get(), timeout=settings.ANALYTICS_STREAM_HEARTBEAT
+                    )
+                    yield _formatar_sse(evento)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            broadcaster.cancelar(fila)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/v1/analytics/stream/stats")
+def analytics_stream_stats():
+    """📡 Estatísticas do broadcaster do dashboard"""
+    return broadcaster.stats()
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database_async import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _recuperar_excecao(tarefa: asyncio.Task) -> None:
+    """Evita aviso de exceção não recuperada quando ninguém mais aguarda o cálculo"""
+    if not tarefa.cancelled():
+        tarefa.exception()
+
+
+class TTLCache:
+    """Cache em memória com TTL, limite de tamanho (LRU) e invalidação por tabela
+
+    Cada entrada declara as tabelas das quais depende. Uma escrita em uma
+    tabela incrementa sua "geração" e remove as entradas dependentes; um
+    cálculo iniciado antes da escrita não é armazenado ao terminar, então
+    o cache nunca guarda um resultado anterior a uma invalidação.
+    """
+
+    def __init__(self, ttl: float, max_entradas: int):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._dados: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._geracoes: Dict[str, int] = defaultdict(int)
+        self._em_calculo: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expiracoes": 0,
+            "remocoes_lru": 0,
+            "invalidacoes": 0,
+            "descartes_obsoletos": 0,
+        }
+
+    # ---------- acesso básico ----------
+    def get(self, chave: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None:
+                self._stats["misses"] += 1
+                return False, None
+
+            expira_em, valor, _ = entrada
+            if expira_em <= time.monotonic():
+                del self._dados[chave]
+                self._stats["expiracoes"] += 1
+                self._stats["misses"] += 1
+                return False, None
+
+            self._dados.move_to_end(chave)
+            self._stats["hits"] += 1
+            return True, valor
+
+    def set(
+        self,
+        chave: str,
+        valor: Any,
+        tabelas: Iterable[str] = (),
+        ttl: Optional[float] = None,
+        geracao: Optional[Tuple[int, ...]] = None
+    ) -> bool:
+        """Armazenar valor; ignorado se `geracao` indicar escrita posterior ao cálculo"""
+        tabelas = tuple(tabelas)
+        with self._lock:
+            if geracao is not None and geracao != self._geracao(tabelas):
+                self._stats["descartes_obsoletos"] += 1
+                return False
+
+            self._dados[chave] = (time.monotonic() + (self.ttl if ttl is None else ttl), valor, tabelas)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self._stats["remocoes_lru"] += 1
+            return True
+
+    def _geracao(self, tabelas: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._geracoes[t] for t in tabelas)
+
+    def geracao(self, tabelas: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return self._geracao(tuple(tabelas))
+
+    # ---------- invalidação ----------
+    def invalidar_tabelas(self, *tabelas: str) -> int:
+        """Remover entradas que dependem de qualquer uma das tabelas"""
+        alvo = set(tabelas)
+        with self._lock:
+            for tabela in alvo:
+                self._geracoes[tabela] += 1
+            chaves = [c for c, (_, _, deps) in self._dados.items() if alvo.intersection(deps)]
+            for chave in chaves:
+                del self._dados[chave]
+            self._stats["invalidacoes"] += len(chaves)
+
+        if chaves:
+            logger.debug(f"Cache: {len(chaves)} entradas invalidadas por {sorted(alvo)}")
+        return len(chaves)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._stats["invalidacoes"] += len(self._dados)
+            self._dados.clear()
+
+    # ---------- cálculo com cache ----------
+    async def obter_ou_calcular(
+        self,
+        chave: str,
+        calcular: Callable[[AsyncSession], Awaitable[Any]],
+        tabelas: Iterable[str] = ("produtos",),
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Retornar do cache ou calcular uma única vez (requisições simultâneas aguardam)
+
+        O cálculo roda em uma tarefa própria, com sessão própria: cancelar a
+        requisição que o iniciou não afeta as outras que aguardam. Se a
+        própria tarefa for cancelada, quem aguarda tenta de novo.
+        """
+        while True:
+            encontrado, valor = self.get(chave)
+            if encontrado:
+                return valor
+
+            tarefa = self._em_calculo.get(chave)
+            if tarefa is None:
+                tarefa = asyncio.create_task(self._calcular(chave, calcular, tuple(tabelas), ttl))
+                tarefa.add_done_callback(_recuperar_excecao)
+                self._em_calculo[chave] = tarefa
+            try:
+                return await asyncio.shield(tarefa)
+            except asyncio.CancelledError:
+                # Cancelada esta requisição (e não o cálculo compartilhado): propagar
+                if not tarefa.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+    async def _calcular(
+        self,
+        chave: str,
+        calcular: Callable[[AsyncSession], Awaitable[Any]],
+        tabelas: Tuple[str, ...],
+        ttl: Optional[float]
+    ) -> Any:
+        geracao = self.geracao(tabelas)
+        try:
+            async with AsyncSessionLocal() as db:
+                valor = await calcular(db)
+        finally:
+            self._em_calculo.pop(chave, None)
+
+        self.set(chave, valor, tabelas, ttl, geracao)
+        return valor
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entradas": len(self._dados),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                **self._stats,
+                "taxa_acerto": round(self._stats["hits"] / consultas, 4) if consultas else 0.0,
+            }
+
+
+# Instância global usada pelos endpoints de analytics
+analytics_cache = TTLCache(
+    ttl=settings.ANALYTICS_CACHE_TTL,
+    max_entradas=settings.ANALYTICS_CACHE_MAX_ENTRADAS
+)
+
+
+# Versões do ETag (app/core/etag.py): instância própria, para que os GETs
+# condicionais não contem nos hits/misses do cache de analytics
+versoes_cache = TTLCache(ttl=settings.ETAG_VERSAO_TTL, max_entradas=8)
+
+
+def invalidar_tabelas(*tabelas: str) -> int:
+    """Hook chamado após escritas (ex.: ProdutoService) para invalidar analytics e versões"""
+    versoes_cache.invalidar_tabelas(*tabelas)
+    return analytics_cache.invalidar_tabelas(*tabelas)
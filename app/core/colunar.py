@@ -0,0 +1,81 @@
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import HTTPException, Request, Response
+
+# Formatos colunares aceitos e seus media types (o primeiro de cada é o de resposta)
+MEDIA_TYPES = {
+    "arrow": ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file"),
+    "parquet": ("application/vnd.apache.parquet", "application/x-parquet"),
+}
+
+EXTENSOES = {"arrow": "arrows", "parquet": "parquet"}
+
+
+def negociar_formato(request: Request, formato: Optional[str] = None) -> str:
+    """json, arrow ou parquet: ?formato= tem prioridade sobre o cabeçalho Accept"""
+    if formato:
+        formato = formato.lower()
+        if formato != "json" and formato not in MEDIA_TYPES:
+            raise HTTPException(
+                status_code=400, detail=f"Formato inválido. Use: json, {', '.join(MEDIA_TYPES)}"
+            )
+        return formato
+
+    aceitos = [parte.split(";")[0].strip().lower() for parte in request.headers.get("accept", "").split(",")]
+    for nome, tipos in MEDIA_TYPES.items():
+        if any(tipo in aceitos for tipo in tipos):
+            return nome
+    return "json"
+
+
+def tabela_arrow(colunas: Dict[str, Any], dicionario: Iterable[str] = ()) -> pa.Table:
+    """Tabela Arrow a partir de colunas (arrays NumPy ou sequências), sem passar por linhas
+
+    Colunas em `dicionario` (poucos valores distintos, ex.: categoria, status)
+    são codificadas como dicionário: cada texto vai uma vez no payload.
+    """
+    dicionario = set(dicionario)
+    arrays = {}
+    for nome, valores in colunas.items():
+        if isinstance(valores, np.ndarray) and valores.dtype == object:
+            array = pa.array(valores, type=pa.string(), from_pandas=True)
+        else:
+            # from_pandas: NaN de colunas float (ex.: dias_sem_venda) vira nulo
+            array = pa.array(valores, from_pandas=True)
+        arrays[nome] = array.dictionary_encode() if nome in dicionario else array
+    return pa.table(arrays)
+
+
+def colunas_do_resultado(nomes: Sequence[str], linhas: Sequence[Sequence[Any]]) -> Dict[str, list]:
+    """Transpõe o resultado de uma consulta em colunas; NUMERIC (Decimal) vira float"""
+    if not linhas:
+        return {nome: [] for nome in nomes}
+
+    colunas = {}
+    for nome, valores in zip(nomes, zip(*linhas)):
+        if any(isinstance(v, Decimal) for v in valores):
+            valores = [None if v is None else float(v) for v in valores]
+        colunas[nome] = list(valores)
+    return colunas
+
+
+def serializar_tabela(tabela: pa.Table, formato: str) -> bytes:
+    """Arrow IPC (stream) ou Parquet (zstd) em memória"""
+    destino = pa.BufferOutputStream()
+    if formato == "arrow":
+        with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    else:
+        pq.write_table(tabela, destino, compression="zstd")
+    return destino.getvalue().to_pybytes()
+
+
+def resposta_colunar(corpo: bytes, formato: str, nome: str, response: Response) -> Response:
+    """Resposta binária levando os cabeçalhos já definidos (ETag, Cache-Control, Vary)"""
+    cabecalhos = {k: v for k, v in response.headers.items() if k != "content-length"}
+    cabecalhos["Content-Disposition"] = f'inline; filename="{nome}.{EXTENSOES[formato]}"'
+    return Response(content=corpo, media_type=MEDIA_TYPES[formato][0], headers=cabecalhos)
@@ -17,7 +17,62 @@ class Settings:
     DB_NAME: str = os.getenv("DB_NAME", "arvore_pao")
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "123456")
-    
+
+    # === POOL DE CONEXÕES (psycopg2) ===
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # segundos aguardando conexão livre
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # === ENGINE ASSÍNCRONO (asyncpg) ===
+    DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+    DB_ASYNC_MAX_OVERFLOW: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "20"))
+
+    # === CACHE DE ANALYTICS ===
+    ANALYTICS_CACHE_TTL: float = float(os.getenv("ANALYTICS_CACHE_TTL", "30"))  # segundos
+    ANALYTICS_CACHE_MAX_ENTRADAS: int = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRADAS", "256"))
+
+    # === ETAG / GET CONDICIONAL ===
+    ETAG_VERSAO_TTL: float = float(os.getenv("ETAG_VERSAO_TTL", "5"))  # segundos com versão da tabela em memória
+
+    # === NOTIFICAÇÕES ENTRE WORKERS (LISTEN/NOTIFY) ===
+    DB_NOTIFY_ATIVO: bool = os.getenv("DB_NOTIFY_ATIVO", "true").lower() == "true"
+
+    # === DASHBOARD AO VIVO (SSE) ===
+    ANALYTICS_STREAM_INTERVALO: float = float(os.getenv("ANALYTICS_STREAM_INTERVALO", "5"))  # segundos entre verificações
+    ANALYTICS_STREAM_HEARTBEAT: float = float(os.getenv("ANALYTICS_STREAM_HEARTBEAT", "15"))
+
+    # === EXPORTAÇÃO (STREAMING) ===
+    EXPORT_LOTE_LINHAS: int = int(os.getenv("EXPORT_LOTE_LINHAS", "2000"))  # linhas por ida ao servidor (cursor nomeado)
+    EXPORT_POOL_MAX_SIZE: int = int(os.getenv("EXPORT_POOL_MAX_SIZE", "3"))  # exportações simultâneas (pool próprio)
+    EXPORT_POOL_TIMEOUT: float = float(os.getenv("EXPORT_POOL_TIMEOUT", "2"))  # segundos aguardando vaga
+
+    # === BUSCA DE PRODUTOS (pg_trgm) ===
+    BUSCA_SIMILARIDADE_MINIMA: float = float(os.getenv("BUSCA_SIMILARIDADE_MINIMA", "0.4"))  # word_similarity mínima (0-1)
+
+    # === ÍNDICES DE PRODUTOS EM MEMÓRIA (AUTOCOMPLETE, CÓDIGO DE BARRAS) ===
+    INDICES_PRODUTOS_RESSINCRONIZACAO: float = float(os.getenv("INDICES_PRODUTOS_RESSINCRONIZACAO", "60"))  # segundos sem NOTIFY até buscar alterações
+    INDICES_PRODUTOS_SOBREPOSICAO: float = float(os.getenv("INDICES_PRODUTOS_SOBREPOSICAO", "600"))  # segundos relidos antes da marca (transação mais longa)
+    CODIGO_BARRAS_RECARGA_COMPLETA: float = float(os.getenv("CODIGO_BARRAS_RECARGA_COMPLETA", "3600"))  # segundos entre recargas completas do mapa
+
+    # === IMPORTAÇÃO EM LOTE DE PRODUTOS ===
+    IMPORTACAO_MAX_LINHAS: int = int(os.getenv("IMPORTACAO_MAX_LINHAS", "50000"))
+
+    # === MOVIMENTAÇÕES DE ESTOQUE ===
+    MOVIMENTACOES_LOTE_MAX: int = int(os.getenv("MOVIMENTACOES_LOTE_MAX", "10000"))  # movimentações por requisição
+    ESTOQUE_CONSOLIDACAO_INTERVALO: float = float(os.getenv("ESTOQUE_CONSOLIDACAO_INTERVALO", "5"))  # segundos entre consolidações de estoque_deltas
+    PARTICOES_INTERVALO: float = float(os.getenv("PARTICOES_INTERVALO", "21600"))  # segundos entre manutenções (6h)
+    PARTICOES_MESES_FUTUROS: int = int(os.getenv("PARTICOES_MESES_FUTUROS", "3"))
+    PARTICOES_MESES_RETENCAO: int = int(os.getenv("PARTICOES_MESES_RETENCAO", "0"))  # 0 = nunca desanexar
+    ESTOQUE_SNAPSHOT_INTERVALO: float = float(os.getenv("ESTOQUE_SNAPSHOT_INTERVALO", "3600"))  # segundos entre verificações do snapshot diário
+
+    # === ROLLUPS DE MOVIMENTAÇÕES ===
+    ROLLUPS_INTERVALO: float = float(os.getenv("ROLLUPS_INTERVALO", "60"))  # segundos entre rodadas
+    ROLLUPS_ATRASO: float = float(os.getenv("ROLLUPS_ATRASO", "120"))  # segundos; cobre transações ainda abertas
+    ROLLUPS_JANELA_MAXIMA: float = float(os.getenv("ROLLUPS_JANELA_MAXIMA", "86400"))  # segundos de histórico por rodada
+    ROLLUPS_RESUMO_HORARIO_MAX_DIAS: int = int(os.getenv("ROLLUPS_RESUMO_HORARIO_MAX_DIAS", "31"))  # intervalo máximo do resumo por hora
+    ANALYTICS_JANELA_VENDAS_DIAS: int = int(os.getenv("ANALYTICS_JANELA_VENDAS_DIAS", "30"))  # giro e dias de estoque
+
     # === API ===
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
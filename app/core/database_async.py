@@ -0,0 +1,59 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ✅ Engine assíncrono (asyncpg) - não bloqueia workers do threadpool
+async_engine = create_async_engine(
+    settings.database_url_async,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=1800,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    echo=False
+)
+
+# ✅ AsyncSessionLocal
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    """Dependency assíncrona para database"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Erro na sessão assíncrona: {e}")
+            await db.rollback()
+            raise
+
+def async_pool_stats() -> dict:
+    """Estatísticas do pool do engine assíncrono"""
+    pool = async_engine.pool
+    return {
+        "pool_size": pool.size(),
+        "conexoes_em_uso": pool.checkedout(),
+        "conexoes_ociosas": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+async def test_async_connection():
+    """Testar conexão assíncrona"""
+    try:
+        async with async_engine.connect() as connection:
+            result = await connection.execute(text("SELECT 1"))
+            return result.scalar() == 1
+    except Exception as e:
+        logger.error(f"❌ Erro de conexão assíncrona: {e}")
+        return False
+
+async def close_async_engine():
+    """Fechar conexões do engine assíncrono"""
+    await async_engine.dispose()
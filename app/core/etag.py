@@ -0,0 +1,74 @@
+import zlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import versoes_cache
+
+# MAX(updated_at) sai do índice idx_produtos_updated_at; COUNT(*) detecta exclusões.
+# Deltas pendentes mudam o estoque sem tocar em updated_at (MAX(id) pela PK); as
+# métricas por produto dependem dos rollups (atualizado_em da marca
+# MARCA_ROLLUPS de app/services/rollups.py) e do dia corrente (dias sem venda)
+VERSAO_PRODUTOS_SQL = """
+    SELECT COUNT(*) as total, MAX(updated_at) as ultima_alteracao,
+           (SELECT COALESCE(MAX(id), 0) FROM estoque_deltas) as ultimo_delta,
+           (SELECT atualizado_em FROM rollups_marca_dagua
+            WHERE nome = 'movimentacoes_processadas') as rollups_alterados,
+           CURRENT_DATE as hoje
+    FROM produtos
+"""
+
+# Tabelas cuja alteração invalida a versão em memória
+TABELAS_VERSAO = ("produtos", "movimentacoes_diarias", "vendas_ultima")
+
+
+def _micros(momento) -> int:
+    return int(momento.timestamp() * 1_000_000) if momento else 0
+
+
+async def versao_produtos() -> str:
+    """Versão barata de produtos, deltas e rollups (em memória por ETAG_VERSAO_TTL segundos)"""
+    async def calcular(sessao: AsyncSession) -> str:
+        result = await sessao.execute(text(VERSAO_PRODUTOS_SQL))
+        total, ultima_alteracao, ultimo_delta, rollups_alterados, hoje = result.one()
+        return (
+            f"{total}-{_micros(ultima_alteracao)}-{ultimo_delta}"
+            f"-{_micros(rollups_alterados)}-{hoje:%Y%m%d}"
+        )
+
+    # Invalidada (invalidar_tabelas) quando produtos ou os rollups mudam
+    return await versoes_cache.obter_ou_calcular("versao:produtos", calcular, tabelas=TABELAS_VERSAO)
+
+
+def gerar_etag(request: Request, versao: str, variante: str = "") -> str:
+    """ETag forte: recurso (caminho + query + variante negociada) + versão da tabela"""
+    recurso = f"{request.url.path}?{request.url.query}{variante}"
+    return f'"{zlib.crc32(recurso.encode()):08x}-{versao}"'
+
+
+def etag_corresponde(request: Request, etag: str) -> bool:
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in cabecalho.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+async def verificar_etag(
+    request: Request, response: Response, variante: str = ""
+) -> Optional[Response]:
+    """Retornar 304 se o cliente já tem a versão atual; senão anexar ETag à resposta
+
+    `variante` distingue representações da mesma URL (ex.: formato pelo Accept).
+    """
+    etag = gerar_etag(request, await versao_produtos(), variante)
+    if etag_corresponde(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return None
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import asyncpg
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Canal fixo em notificar_alteracao_tabela() (create_advanced_tables.sql):
+# trigger e listener precisam usar o mesmo nome
+CANAL_ALTERACOES = "arvore_pao_alteracoes"
+
+# Tabelas com trigger de NOTIFY em create_advanced_tables.sql; os rollups
+# são notificados pela própria tarefa (app/services/rollups.py)
+TABELAS_MONITORADAS: Tuple[str, ...] = (
+    "produtos", "lotes", "ingredientes", "movimentacoes_diarias", "vendas_ultima"
+)
+
+
+class ListenerAlteracoes:
+    """LISTEN em background: repassa alterações de tabelas aos callbacks registrados
+
+    Cada worker da API mantém uma conexão dedicada escutando o canal. Ao
+    (re)conectar, todas as tabelas monitoradas são tratadas como alteradas,
+    pois notificações enviadas enquanto estávamos desconectados se perderam.
+    """
+
+    def __init__(self, canal: str, tabelas: Tuple[str, ...] = TABELAS_MONITORADAS):
+        self.canal = canal
+        self.tabelas = tabelas
+        self._callbacks: List[Callable[[Tuple[str, ...]], None]] = []
+        self._tarefa: Optional[asyncio.Task] = None
+        self.conectado = False
+        self.notificacoes_recebidas = 0
+        self.reconexoes = 0
+
+    def registrar(self, callback: Callable[[Tuple[str, ...]], None]) -> None:
+        self._callbacks.append(callback)
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    def stats(self) -> dict:
+        return {
+            "canal": self.canal,
+            "conectado": self.conectado,
+            "notificacoes_recebidas": self.notificacoes_recebidas,
+            "reconexoes": self.reconexoes,
+        }
+
+    def _disparar(self, tabelas: Tuple[str, ...]) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(tabelas)
+            except Exception as e:
+                logger.error(f"Erro no callback de alteração {tabelas}: {e}")
+
+    def _ao_notificar(self, conexao, pid, canal, payload) -> None:
+        self.notificacoes_recebidas += 1
+        tabela = (payload or "").strip()
+        if tabela in self.tabelas:
+            self._disparar((tabela,))
+
+    async def _executar(self) -> None:
+        espera = 1
+        while True:
+            conexao = None
+            try:
+                conexao = await asyncpg.connect(
+                    host=settings.DB_HOST,
+                    port=settings.DB_PORT,
+                    user=settings.DB_USER,
+                    password=settings.DB_PASSWORD,
+                    database=settings.DB_NAME
+                )
+                await conexao.add_listener(self.canal, self._ao_notificar)
+                self.conectado = True
+                espera = 1
+                logger.info(f"✅ Escutando alterações no canal '{self.canal}'")
+
+                self._disparar(self.tabelas)
+
+                # Keepalive: detectar conexão perdida e reconectar
+                while True:
+                    await asyncio.sleep(30)
+                    await conexao.execute("SELECT 1")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Listener de alterações desconectado: {e}")
+            finally:
+                self.conectado = False
+                if conexao is not None and not conexao.is_closed():
+                    await conexao.close()
+
+            self.reconexoes += 1
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 60)
+
+
+listener_alteracoes = ListenerAlteracoes(canal=CANAL_ALTERACOES)
@@ -0,0 +1,278 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão livre dentro do tempo limite do pool"""
+
+
+class ConnectionPool:
+    """Pool de conexões psycopg2 compartilhado por todo o processo"""
+
+    def __init__(
+        self,
+        min_size: int,
+        max_size: int,
+        timeout: float,
+        pre_ping: bool = True,
+        **connect_kwargs
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamanhos de pool inválidos (0 <= min <= max, max >= 1)")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle: List[Any] = []
+        self._total = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Contadores para dimensionamento do pool
+        self._stats = {
+            "checkouts": 0,
+            "conexoes_criadas": 0,
+            "conexoes_descartadas": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "pings_falhos": 0,
+            "tempo_espera_total_ms": 0.0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+            self._total += 1
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        self._stats["conexoes_criadas"] += 1
+        return conn
+
+    def _is_healthy(self, conn) -> bool:
+        """Health-check executado ao emprestar uma conexão"""
+        if conn.closed:
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            self._stats["pings_falhos"] += 1
+            return False
+
+    def _discard(self, conn) -> None:
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+        self._stats["conexoes_descartadas"] += 1
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Emprestar uma conexão, aguardando até `timeout` segundos"""
+        timeout = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        deadline = inicio + timeout
+        conn = None
+
+        with self._cond:
+            if self._closed:
+                raise PoolTimeoutError("Pool de conexões encerrado")
+
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._total < self.max_size:
+                    # Reserva a vaga; a conexão é aberta fora do lock
+                    self._total += 1
+                    break
+
+                restante = deadline - time.monotonic()
+                if restante <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão livre em {timeout:.1f}s "
+                        f"(em uso: {self._in_use}/{self.max_size})"
+                    )
+                self._stats["esperas"] += 1
+                self._cond.wait(restante)
+
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["tempo_espera_total_ms"] += (time.monotonic() - inicio) * 1000
+
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Devolver uma conexão ao pool"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._total -= 1
+                self._discard(conn)
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager: commit ao sair, rollback em erro, sempre devolve ao pool"""
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                discard = True
+            elif not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def closeall(self) -> None:
+        """Fechar todas as conexões ociosas e impedir novos empréstimos"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._total -= 1
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do pool para dimensionamento"""
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "timeout_segundos": self.timeout,
+                "conexoes_abertas": self._total,
+                "conexoes_em_uso": self._in_use,
+                "conexoes_ociosas": len(self._idle),
+                **self._stats,
+                "tempo_espera_medio_ms": round(
+                    self._stats["tempo_espera_total_ms"] / checkouts, 3
+                ) if checkouts else 0.0,
+            }
+
+
+# ====================================
+# POOLS GLOBAIS DO PROCESSO
+# ====================================
+_pool: Optional[ConnectionPool] = None
+_pool_exportacao: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _criar_pool(min_size: int, max_size: int, timeout: float) -> ConnectionPool:
+    return ConnectionPool(
+        min_size=min_size,
+        max_size=max_size,
+        timeout=timeout,
+        pre_ping=settings.DB_POOL_PRE_PING,
+        dbname=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+    )
+
+
+def get_pool() -> ConnectionPool:
+    """Obter (criando na primeira chamada) o pool global"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _criar_pool(settings.DB_POOL_MIN_SIZE, settings.DB_POOL_MAX_SIZE, settings.DB_POOL_TIMEOUT)
+                logger.info(
+                    f"✅ Pool de conexões criado "
+                    f"(min={settings.DB_POOL_MIN_SIZE}, max={settings.DB_POOL_MAX_SIZE})"
+                )
+    return _pool
+
+
+def get_export_pool() -> ConnectionPool:
+    """Pool pequeno e separado para exportações em streaming
+
+    Um download segura a conexão até o fim; exportações lentas esgotam
+    este pool, nunca o usado pelo restante da API.
+    """
+    global _pool_exportacao
+    if _pool_exportacao is None:
+        with _pool_lock:
+            if _pool_exportacao is None:
+                _pool_exportacao = _criar_pool(0, settings.EXPORT_POOL_MAX_SIZE, settings.EXPORT_POOL_TIMEOUT)
+    return _pool_exportacao
+
+
+def get_db_connection(timeout: Optional[float] = None):
+    """Conexão emprestada do pool (usar com `with get_db_connection() as conn:`)"""
+    return get_pool().connection(timeout)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Estatísticas do pool, ou status 'nao_iniciado' se ainda não foi usado"""
+    if _pool is None:
+        return {"status": "nao_iniciado"}
+    return {"status": "ativo", **_pool.stats()}
+
+
+def export_pool_stats() -> Dict[str, Any]:
+    """Estatísticas do pool de exportações"""
+    if _pool_exportacao is None:
+        return {"status": "nao_iniciado"}
+    return {"status": "ativo", **_pool_exportacao.stats()}
+
+
+def close_pool() -> None:
+    """Encerrar os pools globais (shutdown da aplicação)"""
+    global _pool, _pool_exportacao
+    with _pool_lock:
+        for pool in (_pool, _pool_exportacao):
+            if pool is not None:
+                pool.closeall()
+        _pool = None
+        _pool_exportacao = None
@@ -0,0 +1,62 @@
+from decimal import Decimal
+from typing import Any, Dict, Tuple, get_args
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+# Campos Decimal por classe de modelo, preenchido na primeira serialização
+_CAMPOS_DECIMAIS: Dict[type, Tuple[str, ...]] = {}
+
+
+def _campos_decimais(modelo: type) -> Tuple[str, ...]:
+    """Campos Decimal (ou Optional[Decimal]) do modelo"""
+    return tuple(
+        nome for nome, campo in modelo.model_fields.items()
+        if campo.annotation is Decimal or Decimal in get_args(campo.annotation)
+    )
+
+
+def _serializar(obj: Any) -> Any:
+    """Fallback do orjson: modelos viram o próprio __dict__ (sem model_dump)
+
+    Campos Decimal saem como texto, como no JSON do Pydantic; o valor pode
+    ser Decimal ou já o texto do NUMERIC (métricas vetorizadas).
+    """
+    decimais = _CAMPOS_DECIMAIS.get(type(obj))
+    if decimais is None:
+        if isinstance(obj, Decimal):
+            return str(obj)
+        if not isinstance(obj, BaseModel):
+            raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+        decimais = _CAMPOS_DECIMAIS[type(obj)] = _campos_decimais(type(obj))
+
+    dados = obj.__dict__
+    if not decimais:
+        return dados
+    dados = dict(dados)
+    for campo in decimais:
+        valor = dados[campo]
+        if valor is not None:
+            dados[campo] = str(valor)
+    return dados
+
+
+class RespostaORJSON(JSONResponse):
+    """JSON via orjson, para conteúdo montado pelo próprio servidor (já confiável)
+
+    Não passa pelo response_model: os modelos devem ter sido criados com
+    model_construct ou validados antes. O response_model continua no
+    decorador apenas para a documentação OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_serializar, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def resposta_confiavel(conteudo: Any, response: Response) -> RespostaORJSON:
+    """RespostaORJSON levando os cabeçalhos já definidos na resposta injetada (ETag etc.)"""
+    cabecalhos = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return RespostaORJSON(conteudo, headers=cabecalhos)
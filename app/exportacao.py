@@ -0,0 +1,215 @@
+# ========================
+# EXPORTAÇÃO EM STREAMING (NDJSON / CSV)
+# ========================
+# Cada exportação usa um cursor nomeado (server-side) do psycopg2: o
+# PostgreSQL entrega as linhas em lotes de EXPORT_LOTE_LINHAS e cada lote
+# é serializado e enviado antes do próximo ser buscado. A memória do
+# processo fica constante com 1 mil ou 50 milhões de linhas.
+#
+# A conexão fica presa durante todo o download, então as exportações usam
+# um pool próprio e pequeno (EXPORT_POOL_MAX_SIZE): downloads lentos não
+# tiram conexões do restante da API.
+
+import csv
+import io
+import itertools
+import json
+import logging
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.pool import PoolTimeoutError, get_export_pool
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["exportacao"])
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+PRODUTOS_EXPORT_SQL = """
+    SELECT id, nome, categoria, unidade_medida,
+           preco_venda, preco_custo, quantidade_atual, quantidade_minima,
+           is_active, created_at, updated_at
+    FROM produtos_com_estoque
+    ORDER BY id
+"""
+
+LOTES_EXPORT_SQL = """
+    SELECT id, numero_lote, ingrediente_id, fornecedor_id,
+           quantidade, quantidade_disponivel, preco_unitario,
+           data_fabricacao, data_validade, data_recebimento, status,
+           numero_nota_fiscal, created_at
+    FROM lotes
+    ORDER BY id
+"""
+
+MOVIMENTACOES_COLUNAS = """
+    id, produto_id, tipo, motivo, quantidade,
+    quantidade_anterior, quantidade_atual, valor_unitario, valor_total,
+    documento_tipo, documento_numero, numero_lote,
+    usuario_responsavel, status, created_at
+"""
+
+
+def montar_movimentacoes_sql(
+    produto_id: Optional[int] = None,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """SQL de movimentações; ordem (produto_id, created_at) segue idx_mov_produto_data, sem sort
+
+    Com data_inicio/data_fim apenas as partições mensais do período são lidas.
+    """
+    condicoes = []
+    params: Dict[str, Any] = {}
+
+    if produto_id is not None:
+        condicoes.append("produto_id = %(produto_id)s")
+        params["produto_id"] = produto_id
+    if data_inicio is not None:
+        condicoes.append("created_at >= %(data_inicio)s")
+        params["data_inicio"] = data_inicio
+    if data_fim is not None:
+        condicoes.append("created_at < %(data_fim)s")
+        params["data_fim"] = data_fim
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    sql = f"""
+        SELECT {MOVIMENTACOES_COLUNAS}
+        FROM movimentacoes_estoque
+        {where}
+        ORDER BY produto_id, created_at, id
+    """
+    return sql, params
+
+
+def _valor_json(valor: Any) -> Any:
+    # NUMERIC sai como texto exato (ex.: "10.50"), como Decimal no JSON do Pydantic
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def _lote_ndjson(colunas: List[str], linhas: List[tuple]) -> str:
+    return "".join(
+        json.dumps(dict(zip(colunas, linha)), default=_valor_json, ensure_ascii=False) + "\n"
+        for linha in linhas
+    )
+
+
+def _lote_csv(linhas: List[tuple]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [v.isoformat() if isinstance(v, (datetime, date)) else v for v in linha]
+        for linha in linhas
+    )
+    return buffer.getvalue()
+
+
+def exportar_linhas(conn, sql: str, params: Dict[str, Any], formato: str) -> Iterator[str]:
+    """Gerador síncrono: um lote do cursor nomeado por vez (roda no threadpool do Starlette)
+
+    Recebe a conexão já emprestada do pool de exportações e a devolve ao
+    terminar; se o cliente desconectar, o pool faz rollback ao recebê-la de volta.
+    """
+    discard = False
+    try:
+        with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = settings.EXPORT_LOTE_LINHAS
+            cursor.execute(sql, params)
+
+            primeiro = True
+            linhas_enviadas = 0
+            while True:
+                linhas = cursor.fetchmany(settings.EXPORT_LOTE_LINHAS)
+
+                if primeiro:
+                    # Em cursores nomeados a descrição só existe após o primeiro fetch
+                    colunas = [c.name for c in cursor.description]
+                    if formato == "csv":
+                        yield _lote_csv([tuple(colunas)])
+                    primeiro = False
+
+                if not linhas:
+                    break
+
+                linhas_enviadas += len(linhas)
+                yield _lote_ndjson(colunas, linhas) if formato == "ndjson" else _lote_csv(linhas)
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        discard = True
+        raise
+    finally:
+        get_export_pool().putconn(conn, discard=discard)
+
+    logger.info(f"📤 Exportação concluída: {linhas_enviadas} linhas ({formato})")
+
+
+def _resposta(nome: str, sql: str, params: Dict[str, Any], formato: str) -> StreamingResponse:
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Use: {', '.join(FORMATOS)}")
+
+    # A conexão é emprestada antes do streaming: depois do primeiro byte não dá mais para responder 503
+    try:
+        conn = get_export_pool().getconn(settings.EXPORT_POOL_TIMEOUT)
+    except PoolTimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Limite de exportações simultâneas atingido; tente novamente em instantes",
+            headers={"Retry-After": "30"}
+        )
+
+    # O primeiro lote é lido aqui: com o gerador iniciado, o finally dele sempre
+    # devolve a conexão (mesmo se o cliente cair antes do streaming começar), e
+    # erros na consulta viram 500 em vez de um download truncado
+    gerador = exportar_linhas(conn, sql, params, formato)
+    primeiro_lote = next(gerador, None)
+    corpo = itertools.chain([primeiro_lote], gerador) if primeiro_lote is not None else iter(())
+
+    arquivo = f"{nome}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    return StreamingResponse(
+        corpo,
+        media_type=FORMATOS[formato],
+        headers={
+            "Content-Disposition": f'attachment; filename="{arquivo}"',
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.get("/api/v1/exportar/produtos")
+def exportar_produtos(formato: str = Query("ndjson", description="ndjson ou csv")):
+    """📤 Exportar todos os produtos (streaming)"""
+    return _resposta("produtos", PRODUTOS_EXPORT_SQL, {}, formato)
+
+
+@router.get("/api/v1/exportar/movimentacoes")
+def exportar_movimentacoes(
+    formato: str = Query("ndjson", description="ndjson ou csv"),
+    produto_id: Optional[int] = None,
+    data_inicio: Optional[datetime] = Query(None, description="Início do período (inclusivo)"),
+    data_fim: Optional[datetime] = Query(None, description="Fim do período (exclusivo)")
+):
+    """📤 Exportar movimentações de estoque por produto/período (streaming)"""
+    if data_inicio and data_fim and data_fim <= data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim deve ser posterior a data_inicio")
+
+    sql, params = montar_movimentacoes_sql(produto_id, data_inicio, data_fim)
+    return _resposta("movimentacoes", sql, params, formato)
+
+
+@router.get("/api/v1/exportar/lotes")
+def exportar_lotes(formato: str = Query("ndjson", description="ndjson ou csv")):
+    """📤 Exportar lotes (streaming)"""
+    return _resposta("lotes", LOTES_EXPORT_SQL, {}, formato)
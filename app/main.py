@@ -1,12 +1,30 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 import logging
 
+from app.core.pool import export_pool_stats, pool_stats, close_pool
+from app.core.database_async import async_pool_stats, close_async_engine
+from app.core.cache import analytics_cache, invalidar_tabelas
+from app.core.etag import verificar_etag
+from app.core.notificacoes import listener_alteracoes
+from app.core.config import settings
+from app.analytics_real_data import router as analytics_real_router
+from app.analytics_stream import router as analytics_stream_router, broadcaster
+from app.produtos_api import router as produtos_router
+from app.exportacao import router as exportacao_router
+from app.movimentacoes_api import router as movimentacoes_router
+from app.services.estoque_deltas import consolidador_deltas
+from app.services.particoes import manutencao_particoes
+from app.services.estoque_snapshots import snapshots_estoque
+from app.services.rollups import rollups_movimentacoes
+from app.services.autocomplete import indice_autocomplete
+from app.services.codigo_barras import mapa_codigo_barras
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,23 +47,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(analytics_real_router)
+app.include_router(analytics_stream_router)
+app.include_router(produtos_router)
+app.include_router(exportacao_router)
+app.include_router(movimentacoes_router)
+
 # ====================================
-# FUNÇÃO DE CONEXÃO COM BANCO
+# CONEXÃO COM BANCO (POOL COMPARTILHADO)
 # ====================================
-def get_db_connection():
-    """Conexão segura com PostgreSQL"""
-    try:
-        conn = psycopg2.connect(
-            dbname="arvore_pao",
-            user="postgres",
-            password="123456",
-            host="db",
-            port=5432
-        )
-        return conn
-    except Exception as e:
-        logger.error(f"Erro na conexão com banco: {e}")
-        raise
+def _ao_alterar_tabelas(tabelas):
+    """Alteração vinda de qualquer worker: invalidar cache e acordar o stream"""
+    invalidar_tabelas(*tabelas)
+    if "produtos" in tabelas:
+        broadcaster.notificar_alteracao()
+        indice_autocomplete.agendar_sincronizacao()
+        mapa_codigo_barras.agendar_sincronizacao()
+
+@app.on_event("startup")
+async def iniciar_listener_alteracoes():
+    """Escutar NOTIFY do PostgreSQL para manter o cache coerente entre workers"""
+    if settings.DB_NOTIFY_ATIVO:
+        listener_alteracoes.registrar(_ao_alterar_tabelas)
+        listener_alteracoes.iniciar()
+
+@app.on_event("startup")
+async def iniciar_consolidacao_estoque():
+    """Consolidar periodicamente os deltas de estoque dos produtos mais vendidos"""
+    consolidador_deltas.iniciar()
+
+@app.on_event("startup")
+async def iniciar_manutencao_particoes():
+    """Criar partições mensais futuras de movimentacoes_estoque (e desanexar antigas)"""
+    manutencao_particoes.iniciar()
+
+@app.on_event("startup")
+async def iniciar_snapshots_estoque():
+    """Gravar o snapshot de fechamento do dia anterior (estoque em uma data)"""
+    snapshots_estoque.iniciar()
+
+@app.on_event("startup")
+async def iniciar_rollups_movimentacoes():
+    """Manter os rollups diários de movimentações (giro, dias sem venda)"""
+    rollups_movimentacoes.iniciar()
+
+@app.on_event("shutdown")
+async def fechar_pool_conexoes():
+    """Fechar conexões dos pools ao encerrar a aplicação"""
+    await listener_alteracoes.parar()
+    await consolidador_deltas.parar()
+    await manutencao_particoes.parar()
+    await snapshots_estoque.parar()
+    await rollups_movimentacoes.parar()
+    close_pool()
+    await close_async_engine()
 
 # ====================================
 # ENDPOINTS BÁSICOS (APÓS app SER CRIADO)
@@ -60,132 +115,134 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/health/pool")
+def health_pool():
+    """🔌 Estatísticas dos pools de conexões"""
+    return {
+        "psycopg2": pool_stats(),
+        "psycopg2_exportacao": export_pool_stats(),
+        "asyncpg": async_pool_stats()
+    }
+
+@app.get("/health/cache")
+def health_cache():
+    """🗄️ Estatísticas do cache de analytics (hits/misses) e do listener"""
+    return {
+        **analytics_cache.stats(),
+        "listener": listener_alteracoes.stats(),
+        "autocomplete": indice_autocomplete.stats(),
+        "codigo_barras": mapa_codigo_barras.stats()
+    }
+
 @app.get("/")
 def root():
     """🏠 Endpoint raiz"""
     return {
         "message": "🍞 Sistema Árvore Pão",
         "status": "funcionando",
-        "endpoints": ["/health", "/produtos", "/api/v1/analytics/resumo"]
+        "endpoints": ["/health", "/health/pool", "/health/cache", "/produtos", "/api/v1/analytics/resumo"]
     }
 
-@app.get("/produtos")
-def listar_produtos():
-    """📦 Listar todos os produtos ativos"""
-    try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT 
-                        id, nome, categoria, 
-                        COALESCE(preco_venda, 0) as preco_venda,
-                        COALESCE(preco_custo, 0) as preco_custo,
-                        COALESCE(quantidade_atual, 0) as quantidade_atual,
-                        COALESCE(quantidade_minima, 0) as quantidade_minima,
-                        is_active
-                    FROM produtos 
-                    WHERE is_active = true 
-                    ORDER BY nome
-                """)
-                produtos = cursor.fetchall()
-                
-        return {
-            "produtos": [dict(produto) for produto in produtos],
-            "total": len(produtos),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-    except Exception as e:
-        logger.error(f"Erro ao listar produtos: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
 # ====================================
 # ENDPOINTS DE ANALYTICS
 # ====================================
+async def carregar_resumo_basico(db: AsyncSession) -> dict:
+    """Resumo básico de estoque e margem"""
+    result = await db.execute(text("""
+        SELECT 
+            COUNT(*) as total_produtos,
+            COUNT(*) FILTER (WHERE is_active = true) as produtos_ativos,
+            COUNT(*) FILTER (WHERE quantidade_atual <= 5 AND is_active = true) as produtos_estoque_baixo,
+            ROUND(SUM(quantidade_atual * preco_venda) FILTER (WHERE is_active = true), 2) as valor_total_estoque,
+            ROUND(AVG(((preco_venda - preco_custo) / preco_venda * 100)) FILTER (WHERE is_active = true AND preco_custo > 0), 2) as margem_media
+        FROM produtos_com_estoque
+    """))
+    stats = result.mappings().first()
+
+    stats_data = {
+        "total_produtos": stats['total_produtos'] or 0,
+        "produtos_ativos": stats['produtos_ativos'] or 0,
+        "produtos_estoque_baixo": stats['produtos_estoque_baixo'] or 0,
+        "valor_total_estoque": float(stats['valor_total_estoque'] or 0),
+        "margem_media": float(stats['margem_media'] or 0),
+        "timestamp": datetime.now().isoformat()
+    }
+    return {"data_padaria": stats_data}
+
+
+async def carregar_alertas_basicos(db: AsyncSession) -> dict:
+    """Alertas de estoque zerado e baixo"""
+    alertas = []
+
+    # Produtos sem estoque (crítico)
+    result = await db.execute(text("""
+        SELECT id, nome, categoria, quantidade_atual, quantidade_minima
+        FROM produtos_com_estoque
+        WHERE is_active = true AND quantidade_atual <= 0
+        ORDER BY nome
+    """))
+    sem_estoque = result.mappings().all()
+
+    for produto in sem_estoque:
+        alertas.append({
+            "tipo": "CRITICO",
+            "titulo": f"Produto sem estoque: {produto['nome']}",
+            "descricao": f"Categoria: {produto['categoria']}",
+            "produto_id": produto['id'],
+            "urgencia": "CRITICA"
+        })
+
+    # Produtos com estoque baixo
+    result = await db.execute(text("""
+        SELECT id, nome, categoria, quantidade_atual, quantidade_minima
+        FROM produtos_com_estoque
+        WHERE is_active = true 
+          AND quantidade_atual > 0 
+          AND quantidade_atual <= quantidade_minima
+        ORDER BY quantidade_atual ASC
+    """))
+    estoque_baixo = result.mappings().all()
+
+    for produto in estoque_baixo:
+        alertas.append({
+            "tipo": "ALTO",
+            "titulo": f"Estoque baixo: {produto['nome']}",
+            "descricao": f"Atual: {produto['quantidade_atual']}, Mínimo: {produto['quantidade_minima']}",
+            "produto_id": produto['id'],
+            "urgencia": "ALTA"
+        })
+
+    return {
+        "alertas": alertas,
+        "total_alertas": len(alertas),
+        "alertas_criticos": len([a for a in alertas if a["tipo"] == "CRITICO"]),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/v1/analytics/resumo")
-def analytics_resumo():
+async def analytics_resumo(request: Request, response: Response):
     """📊 Resumo de analytics básico"""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_produtos,
-                        COUNT(*) FILTER (WHERE is_active = true) as produtos_ativos,
-                        COUNT(*) FILTER (WHERE quantidade_atual <= 5 AND is_active = true) as produtos_estoque_baixo,
-                        ROUND(SUM(quantidade_atual * preco_venda) FILTER (WHERE is_active = true), 2) as valor_total_estoque,
-                        ROUND(AVG(((preco_venda - preco_custo) / preco_venda * 100)) FILTER (WHERE is_active = true AND preco_custo > 0), 2) as margem_media
-                    FROM produtos
-                """)
-                stats = cursor.fetchone()
-                
-        stats_data = {
-            "total_produtos": stats['total_produtos'] or 0,
-            "produtos_ativos": stats['produtos_ativos'] or 0,
-            "produtos_estoque_baixo": stats['produtos_estoque_baixo'] or 0,
-            "valor_total_estoque": float(stats['valor_total_estoque'] or 0),
-            "margem_media": float(stats['margem_media'] or 0),
-            "timestamp": datetime.now().isoformat()
-        }
-        return {"data_padaria": stats_data}
-        
+        nao_modificado = await verificar_etag(request, response)
+        if nao_modificado:
+            return nao_modificado
+        return await analytics_cache.obter_ou_calcular(
+            "analytics:resumo", carregar_resumo_basico
+        )
     except Exception as e:
         logger.error(f"Erro no analytics resumo: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/analytics/alertas")
-def analytics_alertas():
+async def analytics_alertas(request: Request, response: Response):
     """⚠️ Sistema de alertas baseado no estoque"""
     try:
-        alertas = []
-        
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                # Produtos sem estoque (crítico)
-                cursor.execute("""
-                    SELECT id, nome, categoria, quantidade_atual, quantidade_minima
-                    FROM produtos 
-                    WHERE is_active = true AND quantidade_atual <= 0
-                    ORDER BY nome
-                """)
-                sem_estoque = cursor.fetchall()
-                
-                for produto in sem_estoque:
-                    alertas.append({
-                        "tipo": "CRITICO",
-                        "titulo": f"Produto sem estoque: {produto['nome']}",
-                        "descricao": f"Categoria: {produto['categoria']}",
-                        "produto_id": produto['id'],
-                        "urgencia": "CRITICA"
-                    })
-                
-                # Produtos com estoque baixo
-                cursor.execute("""
-                    SELECT id, nome, categoria, quantidade_atual, quantidade_minima
-                    FROM produtos 
-                    WHERE is_active = true 
-                      AND quantidade_atual > 0 
-                      AND quantidade_atual <= quantidade_minima
-                    ORDER BY quantidade_atual ASC
-                """)
-                estoque_baixo = cursor.fetchall()
-                
-                for produto in estoque_baixo:
-                    alertas.append({
-                        "tipo": "ALTO",
-                        "titulo": f"Estoque baixo: {produto['nome']}",
-                        "descricao": f"Atual: {produto['quantidade_atual']}, Mínimo: {produto['quantidade_minima']}",
-                        "produto_id": produto['id'],
-                        "urgencia": "ALTA"
-                    })
-        
-        return {
-            "alertas": alertas,
-            "total_alertas": len(alertas),
-            "alertas_criticos": len([a for a in alertas if a["tipo"] == "CRITICO"]),
-            "timestamp": datetime.now().isoformat()
-        }
-        
+        nao_modificado = await verificar_etag(request, response)
+        if nao_modificado:
+            return nao_modificado
+        return await analytics_cache.obter_ou_calcular(
+            "analytics:alertas", carregar_alertas_basicos
+        )
     except Exception as e:
         logger.error(f"Erro nos alertas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
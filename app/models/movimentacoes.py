@@ -65,6 +65,9 @@ class MovimentacaoEstoque(BaseModel):
     fornecedor = relationship("Fornecedor")
     
     # Índices para performance e relatórios
+    # Em produção a tabela é particionada por mês em created_at (PK = id, created_at)
+    # via particionar_movimentacoes.sql; os índices abaixo existem no pai e em cada
+    # partição. Filtre sempre por created_at para que só os meses do período sejam lidos.
     __table_args__ = (
         Index('idx_mov_produto_data', 'produto_id', 'created_at'),
         Index('idx_mov_tipo_data', 'tipo', 'created_at'),
@@ -72,6 +75,8 @@ class MovimentacaoEstoque(BaseModel):
         Index('idx_mov_documento', 'documento_tipo', 'documento_numero'),
         Index('idx_mov_status', 'status'),
         Index('idx_mov_usuario', 'usuario_responsavel', 'created_at'),
+        Index('idx_mov_created_at', 'created_at'),
+        Index('idx_mov_processado_em', 'processado_em'),
     )
     
     def __repr__(self):
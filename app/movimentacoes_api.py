@@ -0,0 +1,165 @@
+# ========================
+# MOVIMENTAÇÕES DE ESTOQUE - INGESTÃO
+# ========================
+# Terminais do PDV enviam as vendas acumuladas em lotes; cada lote custa
+# um COPY e um comando no banco, independente do número de eventos.
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.database_async import get_async_db
+from app.schemas.movimentacoes import (
+    EstoqueEmMomento, EstoqueProduto, MovimentacaoCreate, ResultadoLoteMovimentacoes, ResumoMovimentacoes,
+    ValorizacaoEstoque
+)
+from app.services.estoque_deltas import consolidador_deltas, estoque_produto
+from app.services.estoque_snapshots import estoque_em, snapshots_estoque, valorizacao_em
+from app.services.particoes import manutencao_particoes
+from app.services.rollups import resumo_movimentacoes, rollups_movimentacoes
+from app.services.movimentacoes import MovimentacaoService
+from app.utils.datas import momento_local
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["movimentacoes"])
+
+
+@router.post("/api/v1/movimentacoes/lote", response_model=ResultadoLoteMovimentacoes)
+def registrar_movimentacoes_lote(
+    movimentacoes: List[MovimentacaoCreate] = Body(..., description="Movimentações do lote"),
+    db: Session = Depends(get_db)
+):
+    """📦 Registrar um lote de movimentações e atualizar o estoque dos produtos"""
+    if len(movimentacoes) > settings.MOVIMENTACOES_LOTE_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote com {len(movimentacoes)} movimentações excede o máximo de {settings.MOVIMENTACOES_LOTE_MAX}"
+        )
+
+    try:
+        return MovimentacaoService(db).registrar_lote(movimentacoes)
+    except Exception as e:
+        logger.error(f"Erro na ingestão de movimentações: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/v1/produtos/{produto_id}/estoque", response_model=EstoqueProduto)
+async def obter_estoque_produto(produto_id: int, db: AsyncSession = Depends(get_async_db)):
+    """📦 Estoque efetivo do produto (base + movimentações ainda não consolidadas)"""
+    try:
+        estoque = await estoque_produto(db, produto_id)
+    except Exception as e:
+        logger.error(f"Erro ao consultar estoque do produto {produto_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if estoque is None:
+        raise HTTPException(status_code=404, detail=f"Produto {produto_id} não encontrado")
+    return estoque
+
+
+@router.get("/api/v1/produtos/{produto_id}/estoque/historico", response_model=EstoqueEmMomento)
+async def obter_estoque_em(
+    produto_id: int,
+    momento: datetime = Query(..., description="Data/hora da consulta"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🕰️ Estoque e valor do produto em uma data (snapshot diário + movimentações)"""
+    try:
+        estoque = await estoque_em(db, produto_id, momento_local(momento))
+    except Exception as e:
+        logger.error(f"Erro ao consultar estoque do produto {produto_id} em {momento}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if estoque is None:
+        raise HTTPException(status_code=404, detail=f"Produto {produto_id} não encontrado")
+    return estoque
+
+
+@router.get("/api/v1/estoque/valorizacao", response_model=ValorizacaoEstoque)
+async def obter_valorizacao_estoque(
+    momento: Optional[datetime] = Query(None, description="Data/hora da consulta (padrão: agora)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🕰️ Valor do estoque do catálogo em uma data, por categoria"""
+    try:
+        return await valorizacao_em(db, momento_local(momento or datetime.now()))
+    except Exception as e:
+        logger.error(f"Erro ao calcular valorização do estoque: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/v1/movimentacoes/resumo", response_model=ResumoMovimentacoes)
+async def obter_resumo_movimentacoes(
+    inicio: date = Query(..., description="Primeiro dia"),
+    fim: Optional[date] = Query(None, description="Último dia, inclusive (padrão: hoje)"),
+    granularidade: str = Query("dia", pattern="^(dia|hora)$"),
+    produto_id: Optional[int] = Query(None, description="Sem produto: todos, agrupados por motivo"),
+    motivo: Optional[str] = Query(None, description="Ex.: venda, perda, compra"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """📈 Quantidade e valor movimentados por dia ou hora e motivo (lidos dos rollups)"""
+    fim = fim or date.today()
+    if fim < inicio:
+        raise HTTPException(status_code=400, detail="fim deve ser igual ou posterior a inicio")
+    if granularidade == "hora" and (fim - inicio).days >= settings.ROLLUPS_RESUMO_HORARIO_MAX_DIAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Granularidade por hora limitada a {settings.ROLLUPS_RESUMO_HORARIO_MAX_DIAS} dias"
+        )
+
+    try:
+        return await resumo_movimentacoes(db, inicio, fim, granularidade, produto_id, motivo)
+    except Exception as e:
+        logger.error(f"Erro ao gerar resumo de movimentações: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/v1/estoque/snapshots")
+async def gerar_snapshot_estoque(
+    dia: Optional[date] = Query(None, description="Dia a fechar (padrão: ontem); dias antigos = backfill")
+):
+    """📸 Gravar (ou regravar) o snapshot de fechamento de um dia"""
+    dia = dia or date.today() - timedelta(days=1)
+    if dia >= date.today():
+        raise HTTPException(status_code=400, detail="Só é possível fechar dias já encerrados")
+
+    try:
+        produtos = await snapshots_estoque.gerar(dia)
+    except Exception as e:
+        logger.error(f"Erro ao gerar snapshot de estoque de {dia}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if produtos is None:
+        raise HTTPException(status_code=409, detail="Outro snapshot está sendo gerado; tente novamente")
+    return {"dia": dia, "produtos": produtos}
+
+
+@router.get("/api/v1/estoque/snapshots/stats")
+def snapshots_stats():
+    """📸 Estatísticas dos snapshots diários de estoque"""
+    return snapshots_estoque.stats()
+
+
+@router.get("/api/v1/movimentacoes/consolidacao/stats")
+def consolidacao_stats():
+    """📦 Estatísticas da consolidação de estoque_deltas"""
+    return consolidador_deltas.stats()
+
+
+@router.get("/api/v1/movimentacoes/particoes/stats")
+def particoes_stats():
+    """🗂️ Estatísticas da manutenção das partições mensais"""
+    return manutencao_particoes.stats()
+
+
+@router.get("/api/v1/movimentacoes/rollups/stats")
+def rollups_stats():
+    """📊 Estatísticas da manutenção dos rollups de movimentações"""
+    return rollups_movimentacoes.stats()
@@ -0,0 +1,178 @@
+# ========================
+# PRODUTOS - LISTAGEM PAGINADA
+# ========================
+# Paginação por keyset em (nome, id): cada página é uma busca no índice
+# parcial de produtos ativos, com custo constante independente da
+# posição, em vez de carregar a tabela inteira a cada requisição.
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.database_async import get_async_db
+from app.core.etag import verificar_etag
+from app.schemas.produtos import ProdutoUpdateLote, RegraReprecificacao
+from app.services.autocomplete import indice_autocomplete
+from app.services.codigo_barras import mapa_codigo_barras
+from app.services.produtos import (
+    LIMITE_MAXIMO_LISTAGEM,
+    LIMITE_PADRAO_LISTAGEM,
+    MODO_BUSCA_ILIKE,
+    MODO_BUSCA_SIMILARIDADE,
+    ProdutoService,
+    montar_listagem_sql,
+    paginar,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["produtos"])
+
+
+@router.get("/produtos")
+@router.get("/api/v1/produtos/")
+async def listar_produtos(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor retornado em `proximo_cursor`"),
+    limite: int = Query(LIMITE_PADRAO_LISTAGEM, ge=1, le=LIMITE_MAXIMO_LISTAGEM),
+    categoria: Optional[str] = None,
+    estoque_baixo: Optional[bool] = None,
+    tags: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """📦 Listar produtos ativos (paginação por cursor, filtros por categoria/estoque/tags)"""
+    try:
+        sql, params = montar_listagem_sql(categoria, estoque_baixo, tags, cursor, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        nao_modificado = await verificar_etag(request, response)
+        if nao_modificado:
+            return nao_modificado
+
+        result = await db.execute(text(sql), params)
+        produtos, proximo_cursor = paginar([dict(row) for row in result.mappings().all()], limite)
+
+        return {
+            "produtos": produtos,
+            "total": len(produtos),
+            "proximo_cursor": proximo_cursor,
+            "tem_mais": proximo_cursor is not None,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Erro ao listar produtos: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/v1/produtos/busca")
+def buscar_produtos(
+    q: str = Query(..., min_length=1, max_length=100, description="Termo de busca"),
+    modo: str = Query(MODO_BUSCA_SIMILARIDADE, pattern=f"^({MODO_BUSCA_SIMILARIDADE}|{MODO_BUSCA_ILIKE})$"),
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """🔍 Buscar produtos por nome (tolerante a acentos e erros de digitação)"""
+    try:
+        produtos = ProdutoService(db).buscar_por_nome(q, modo=modo, limite=limite)
+        return {"produtos": produtos, "total": len(produtos), "termo": q, "modo": modo}
+    except Exception as e:
+        logger.error(f"Erro na busca de produtos: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/v1/produtos/autocomplete")
+async def autocomplete_produtos(
+    q: str = Query(..., min_length=1, max_length=100, description="Início do nome (ou de uma palavra)"),
+    limite: int = Query(10, ge=1, le=50)
+):
+    """⌨️ Sugestões por prefixo para o PDV (índice em memória, sem ida ao banco)"""
+    try:
+        await indice_autocomplete.garantir_carregado()
+        sugestoes = indice_autocomplete.buscar(q, limite)
+        return {"sugestoes": sugestoes, "total": len(sugestoes), "termo": q}
+    except Exception as e:
+        logger.error(f"Erro no autocomplete de produtos: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/v1/produtos/barcode/{ean}")
+async def produto_por_codigo_barras(
+    ean: str = Path(..., pattern=r"^\d{8,14}$", description="EAN/GTIN lido no caixa")
+):
+    """🏷️ Produto pelo código de barras (mapa em memória, O(1))"""
+    try:
+        produto = await mapa_codigo_barras.obter_ou_buscar(ean)
+    except Exception as e:
+        logger.error(f"Erro na leitura do código de barras {ean}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if produto is None:
+        raise HTTPException(status_code=404, detail=f"Código de barras {ean} não encontrado")
+    return produto
+
+
+@router.post("/api/v1/produtos/importar")
+def importar_produtos(
+    linhas: List[Dict[str, Any]] = Body(..., description="Lista de produtos no formato de ProdutoCreate"),
+    db: Session = Depends(get_db)
+):
+    """📥 Importar/atualizar produtos em lote (upsert por código de barras)
+
+    Cada linha é validada individualmente: as inválidas voltam em `erros`
+    (com o índice da linha) e as demais são gravadas normalmente.
+    """
+    if len(linhas) > settings.IMPORTACAO_MAX_LINHAS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote com {len(linhas)} linhas excede o máximo de {settings.IMPORTACAO_MAX_LINHAS}"
+        )
+
+    try:
+        return ProdutoService(db).importar_produtos(linhas)
+    except Exception as e:
+        logger.error(f"Erro na importação de produtos: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.patch("/api/v1/produtos/lote")
+def atualizar_produtos_em_lote(
+    atualizacoes: List[ProdutoUpdateLote] = Body(..., description="Um item por produto com os campos a alterar"),
+    db: Session = Depends(get_db)
+):
+    """✏️ Revisão de preços/mínimos de vários produtos em uma transação"""
+    if len(atualizacoes) > settings.IMPORTACAO_MAX_LINHAS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote com {len(atualizacoes)} itens excede o máximo de {settings.IMPORTACAO_MAX_LINHAS}"
+        )
+
+    try:
+        return ProdutoService(db).atualizar_produtos_em_lote(atualizacoes)
+    except Exception as e:
+        logger.error(f"Erro na atualização em lote: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/v1/produtos/reprecificar")
+def reprecificar_produtos(
+    regra: RegraReprecificacao,
+    aplicar: bool = Query(False, description="false = apenas prévia do impacto"),
+    db: Session = Depends(get_db)
+):
+    """💲 Reajuste de preços por categoria: prévia do impacto e aplicação em um único UPDATE"""
+    try:
+        return ProdutoService(db).reprecificar(regra, aplicar=aplicar)
+    except Exception as e:
+        logger.error(f"Erro na reprecificação: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1 +1 @@
-from .produtos import ProdutoCreate, ProdutoUpdate, ProdutoResponse
+from .produtos import ProdutoCreate, ProdutoUpdate, ProdutoUpdateLote, ProdutoResponse
@@ -2,8 +2,9 @@
 
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any
 from decimal import Decimal
+from datetime import datetime, date
 
 class MetricaProduto(BaseModel):
     produto_id: int
@@ -21,6 +22,8 @@ class MetricaProduto(BaseModel):
     status_estoque: str
     precisa_reposicao: bool
     nivel_urgencia: int
+    giro_estoque: Optional[float] = None  # vendido / estoque médio na janela de vendas
+    dias_sem_venda: Optional[int] = None  # None = nenhuma venda registrada
 
 class ResumoAnalytics(BaseModel):
     total_produtos: int
@@ -42,6 +45,16 @@ class RelatorioAnalytics(BaseModel):
     produtos_atencao: List[Dict]
     recomendacoes: List[str]
 
+class RelatorioProdutos(BaseModel):
+    resumo_geral: Dict[str, Any]
+    top_produtos_vendas: List[Dict[str, Any]]
+    produtos_baixo_giro: List[Dict[str, Any]]
+    produtos_alta_margem: List[Dict[str, Any]]
+    alertas_estoque: List[Dict[str, Any]]
+    sugestoes_compra: List[Dict[str, Any]]
+    periodo: Dict[str, date]
+    gerado_em: datetime
+
 class AlertaInteligente(BaseModel):
     tipo: str = Field(..., description="Tipo de alerta (ex: CRITICO, ALTO, MEDIO)")
     categoria: str = Field(..., description="Categoria do alerta (ex: estoque, margem)")
@@ -74,4 +87,11 @@ class AnalyticsPorCategoria(BaseModel):
     margem_media: float
     produtos_estoque_baixo: int
     produto_mais_vendido: str
-    percentual_do_total: float
\ No newline at end of file
+    percentual_do_total: float
+
+class DashboardAnalytics(BaseModel):
+    resumo: ResumoAnalytics
+    produtos: List[MetricaProduto]
+    categorias: List[AnalyticsPorCategoria]
+    alertas: List[AlertaInteligente]
+    gerado_em: datetime
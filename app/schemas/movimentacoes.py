@@ -0,0 +1,117 @@
+# app/schemas/movimentacoes.py
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+from datetime import date, datetime
+from enum import Enum
+
+from app.schemas.produtos import PRECO_MAXIMO, QUANTIDADE_MAXIMA
+
+# quantidade * valor_unitario de uma movimentação; no intervalo de um
+# NUMERIC(10,2), sobra folga para as somas dos rollups (NUMERIC(14,2))
+VALOR_TOTAL_MAXIMO = 99_999_999.99
+
+# ========================
+# ENUMS DE MOVIMENTAÇÃO
+# ========================
+
+class TipoMovimentacao(str, Enum):
+    """Direção da movimentação"""
+    ENTRADA = "entrada"
+    SAIDA = "saida"
+
+class MotivoMovimentacao(str, Enum):
+    """Motivos aceitos (mesmos de MovimentacaoEstoque.motivo)"""
+    COMPRA = "compra"
+    VENDA = "venda"
+    AJUSTE = "ajuste"
+    PERDA = "perda"
+    PRODUCAO = "producao"
+    DEVOLUCAO = "devolucao"
+
+# ========================
+# SCHEMAS
+# ========================
+
+class MovimentacaoCreate(BaseModel):
+    """Movimentação enviada por um terminal/integração"""
+    produto_id: int = Field(..., gt=0)
+    tipo: TipoMovimentacao
+    motivo: MotivoMovimentacao
+    quantidade: float = Field(..., gt=0, le=QUANTIDADE_MAXIMA, allow_inf_nan=False, description="Quantidade movimentada (sempre positiva)")
+    valor_unitario: float = Field(0, ge=0, le=PRECO_MAXIMO, allow_inf_nan=False)
+    documento_tipo: Optional[str] = Field(None, max_length=50)
+    documento_numero: Optional[str] = Field(None, max_length=100)
+    usuario_responsavel: Optional[str] = Field(None, max_length=100)
+    operador: Optional[str] = Field(None, max_length=100)
+    numero_lote: Optional[str] = Field(None, max_length=50)
+    observacoes: Optional[str] = None
+    created_at: Optional[datetime] = Field(None, description="Momento da movimentação no terminal (padrão: agora)")
+
+    @model_validator(mode='after')
+    def validate_valor_total(self):
+        """Valor total precisa caber nas colunas; senão o COPY do lote inteiro falharia"""
+        if self.quantidade * self.valor_unitario > VALOR_TOTAL_MAXIMO:
+            raise ValueError(f'quantidade * valor_unitario acima de {VALOR_TOTAL_MAXIMO}')
+        return self
+
+class ResultadoLoteMovimentacoes(BaseModel):
+    """Resumo da ingestão de um lote"""
+    recebidas: int
+    registradas: int
+    produtos_atualizados: int
+    produtos_em_deltas: int = 0
+    produtos_nao_encontrados: List[int] = []
+    tempo_ms: float
+
+class EstoqueProduto(BaseModel):
+    """Estoque efetivo: base em produtos + deltas ainda não consolidados"""
+    produto_id: int
+    quantidade_base: float
+    quantidade_pendente: float
+    quantidade_atual: float
+    estoque_por_deltas: bool
+
+class EstoqueEmMomento(BaseModel):
+    """Estoque de um produto em uma data: snapshot mais próximo + movimentações até ela"""
+    produto_id: int
+    nome: str
+    momento: datetime
+    quantidade: float
+    preco_custo: float
+    valor: float
+    snapshot_dia: Optional[date] = None
+    origem: str = Field(..., description="anterior, posterior (snapshot) ou atual (sem snapshot)")
+    movimentacoes_aplicadas: int
+
+class ValorizacaoCategoria(BaseModel):
+    categoria: str
+    produtos: int
+    quantidade: float
+    valor: float
+
+class ValorizacaoEstoque(BaseModel):
+    """Valor do estoque do catálogo em uma data"""
+    momento: datetime
+    snapshot_dia: Optional[date] = None
+    origem: str
+    movimentacoes_aplicadas: int
+    produtos: int
+    valor_total: float
+    categorias: List[ValorizacaoCategoria]
+
+class PeriodoMovimentacoes(BaseModel):
+    periodo: datetime
+    motivo: str
+    tipo: str
+    quantidade: float
+    valor_total: float
+    movimentacoes: int
+
+class ResumoMovimentacoes(BaseModel):
+    """Movimentações somadas por dia ou hora, lidas dos rollups"""
+    granularidade: str
+    inicio: date
+    fim: date
+    produto_id: Optional[int] = None
+    atualizado_ate: Optional[datetime] = Field(None, description="Marca d'água dos rollups")
+    periodos: List[PeriodoMovimentacoes]
@@ -3,13 +3,20 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+# Maiores valores das colunas de produtos: quantidades NUMERIC(12,3), preços
+# NUMERIC(10,2). Acima disso (ou inf/nan) o banco recusaria o comando inteiro.
+QUANTIDADE_MAXIMA = 999_999_999.999
+PRECO_MAXIMO = 99_999_999.99
+
 class ProdutoBase(BaseModel):
     """Schema base para produtos"""
     nome: str = Field(..., min_length=1, max_length=255, description="Nome do produto")
     unidade_medida: str = Field("un", max_length=10, description="Unidade de medida")
-    quantidade_atual: float = Field(0, ge=0, description="Quantidade em estoque")
-    quantidade_minima: float = Field(0, ge=0, description="Estoque mínimo")
-    preco_venda: float = Field(0, ge=0, description="Preço de venda")
+    quantidade_atual: float = Field(0, ge=0, le=QUANTIDADE_MAXIMA, allow_inf_nan=False, description="Quantidade em estoque")
+    quantidade_minima: float = Field(0, ge=0, le=QUANTIDADE_MAXIMA, allow_inf_nan=False, description="Estoque mínimo")
+    preco_venda: float = Field(0, ge=0, le=PRECO_MAXIMO, allow_inf_nan=False, description="Preço de venda")
+    categoria: Optional[str] = Field(None, max_length=50, description="Categoria do produto")
+    codigo_barras: Optional[str] = Field(None, pattern=r"^\d{8,14}$", description="Código de barras (EAN/GTIN)")
 
 class ProdutoCreate(ProdutoBase):
     """Schema para criação de produtos"""
@@ -19,9 +26,26 @@ class ProdutoUpdate(BaseModel):
     """Schema para atualização de produtos (campos opcionais)"""
     nome: Optional[str] = Field(None, min_length=1, max_length=255)
     unidade_medida: Optional[str] = Field(None, max_length=10)
-    quantidade_atual: Optional[float] = Field(None, ge=0)
-    quantidade_minima: Optional[float] = Field(None, ge=0)
-    preco_venda: Optional[float] = Field(None, ge=0)
+    quantidade_atual: Optional[float] = Field(None, ge=0, le=QUANTIDADE_MAXIMA, allow_inf_nan=False)
+    quantidade_minima: Optional[float] = Field(None, ge=0, le=QUANTIDADE_MAXIMA, allow_inf_nan=False)
+    preco_venda: Optional[float] = Field(None, ge=0, le=PRECO_MAXIMO, allow_inf_nan=False)
+
+class ProdutoUpdateLote(ProdutoUpdate):
+    """Item de atualização em lote: id + campos a alterar"""
+    id: int = Field(..., gt=0)
+
+class RegraReprecificacao(BaseModel):
+    """Regra de reajuste de preços aplicada de uma vez a uma categoria (ou ao catálogo)"""
+    categoria: Optional[str] = Field(None, max_length=50, description="Categoria afetada (vazio = catálogo inteiro)")
+    ajuste_percentual: float = Field(0, ge=-90, le=1000, description="Reajuste sobre o preço atual (7 = +7%)")
+    margem_minima: Optional[float] = Field(
+        None, ge=0, lt=100,
+        description="Margem mínima sobre o preço de venda, (venda - custo) / venda, para produtos com preco_custo"
+    )
+    final_centavos: Optional[int] = Field(
+        None, ge=0, le=9,
+        description="Arredondar para cima até o final .x<d> (9 = preços terminados em .x9)"
+    )
 
 class ProdutoResponse(ProdutoBase):
     """Schema para resposta de produtos"""
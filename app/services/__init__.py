@@ -1 +1,2 @@
 from .produtos import ProdutoService
+from .movimentacoes import MovimentacaoService
@@ -0,0 +1,93 @@
+# ========================
+# AUTOCOMPLETE DE PRODUTOS (EM MEMÓRIA)
+# ========================
+# Array ordenado de chaves sem acento + bisect: a busca por prefixo não
+# toca o banco. Escritas do ProdutoService atualizam o índice na hora;
+# escritas de outros workers chegam pelo LISTEN/NOTIFY (ver
+# IndiceProdutosMemoria).
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import settings
+from app.services.indice_produtos import IndiceProdutosMemoria
+from app.utils.texto import palavras
+
+
+def chaves_do_nome(nome: str) -> List[str]:
+    """Uma chave por palavra: "Pão de Queijo" -> "pao de queijo", "de queijo", "queijo" """
+    termos = palavras(nome)
+    return [" ".join(termos[i:]) for i in range(len(termos))]
+
+
+class IndiceAutocomplete(IndiceProdutosMemoria):
+    """Índice de prefixos sobre produtos.nome, com acentos removidos"""
+
+    nome = "autocomplete"
+
+    def __init__(self, ressincronizacao: float, sobreposicao: float):
+        super().__init__(ressincronizacao, sobreposicao)
+        self._chaves: List[Tuple[str, int]] = []
+        self._produtos: Dict[int, Dict[str, Any]] = {}
+
+    # ---------- estrutura ----------
+    def _retirar(self, produto_id: int) -> None:
+        produto = self._produtos.pop(produto_id, None)
+        if produto is None:
+            return
+        for chave in chaves_do_nome(produto["nome"]):
+            i = bisect_left(self._chaves, (chave, produto_id))
+            if i < len(self._chaves) and self._chaves[i] == (chave, produto_id):
+                del self._chaves[i]
+
+    def _aplicar(self, produto: Dict[str, Any]) -> None:
+        self._produtos[produto["id"]] = produto
+        for chave in chaves_do_nome(produto["nome"]):
+            insort(self._chaves, (chave, produto["id"]))
+
+    def _reconstruir(self, produtos: List[Dict[str, Any]]) -> None:
+        # Montado fora do lock e trocado de uma vez
+        por_id = {produto["id"]: produto for produto in produtos}
+        chaves = sorted(
+            (chave, produto_id)
+            for produto_id, produto in por_id.items()
+            for chave in chaves_do_nome(produto["nome"])
+        )
+        with self._lock:
+            self._produtos = por_id
+            self._chaves = chaves
+
+    def _tamanho(self) -> Dict[str, int]:
+        return {"produtos": len(self._produtos), "chaves": len(self._chaves)}
+
+    # ---------- consulta ----------
+    def buscar(self, termo: str, limite: int = 10) -> List[Dict[str, Any]]:
+        """Produtos cujo nome (ou alguma palavra dele) começa com o termo"""
+        prefixo = " ".join(palavras(termo))
+        if not prefixo:
+            return []
+
+        self._agendar_se_antigo()
+        candidatos: Dict[int, bool] = {}
+        with self._lock:
+            self._stats["consultas"] += 1
+            i = bisect_left(self._chaves, (prefixo,))
+            while i < len(self._chaves) and len(candidatos) < limite * 10:
+                chave, produto_id = self._chaves[i]
+                if not chave.startswith(prefixo):
+                    break
+                produto = self._produtos[produto_id]
+                inicio_do_nome = chave == chaves_do_nome(produto["nome"])[0]
+                candidatos[produto_id] = candidatos.get(produto_id, False) or inicio_do_nome
+                i += 1
+            produtos = [(self._produtos[pid], inicio) for pid, inicio in candidatos.items()]
+
+        # Início do nome primeiro, depois nomes mais curtos
+        produtos.sort(key=lambda p: (not p[1], len(p[0]["nome"]), p[0]["nome"]))
+        return [dict(produto) for produto, _ in produtos[:limite]]
+
+
+indice_autocomplete = IndiceAutocomplete(
+    ressincronizacao=settings.INDICES_PRODUTOS_RESSINCRONIZACAO,
+    sobreposicao=settings.INDICES_PRODUTOS_SOBREPOSICAO
+)
@@ -0,0 +1,95 @@
+# ========================
+# CÓDIGO DE BARRAS -> PRODUTO (EM MEMÓRIA)
+# ========================
+# Leitura no caixa: um dict consultado em O(1), mantido quente entre
+# requisições e atualizado pelas mesmas escritas que o autocomplete.
+# Um código ausente do mapa (ex.: produto cadastrado há instantes em
+# outro worker) ainda é buscado no banco pelo índice único. Um código
+# presente nunca volta ao banco, então além da sincronização incremental
+# o mapa é recarregado por inteiro a cada CODIGO_BARRAS_RECARGA_COMPLETA.
+
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.indice_produtos import COLUNAS_INDICE, IndiceProdutosMemoria
+
+BUSCA_CODIGO_SQL = f"""
+    SELECT {COLUNAS_INDICE}
+    FROM produtos
+    WHERE codigo_barras = :codigo AND is_active = true
+"""
+
+
+def normalizar_codigo(codigo: Optional[str]) -> Optional[str]:
+    codigo = (codigo or "").strip()
+    return codigo or None
+
+
+class MapaCodigoBarras(IndiceProdutosMemoria):
+    """Mapa codigo_barras -> produto para leitura no PDV"""
+
+    nome = "codigo_barras"
+
+    def __init__(self, ressincronizacao: float, sobreposicao: float, recarga_completa: float):
+        super().__init__(ressincronizacao, sobreposicao, recarga_completa)
+        self._por_codigo: Dict[str, Dict[str, Any]] = {}
+        self._codigo_por_id: Dict[int, str] = {}
+        self._stats["buscas_banco"] = 0
+
+    # ---------- estrutura ----------
+    def _retirar(self, produto_id: int) -> None:
+        codigo = self._codigo_por_id.pop(produto_id, None)
+        if codigo is not None and self._por_codigo.get(codigo, {}).get("id") == produto_id:
+            del self._por_codigo[codigo]
+
+    def _aplicar(self, produto: Dict[str, Any]) -> None:
+        codigo = normalizar_codigo(produto["codigo_barras"])
+        if codigo is None:
+            return
+        self._por_codigo[codigo] = produto
+        self._codigo_por_id[produto["id"]] = codigo
+
+    def _reconstruir(self, produtos: List[Dict[str, Any]]) -> None:
+        por_codigo = {}
+        codigo_por_id = {}
+        for produto in produtos:
+            codigo = normalizar_codigo(produto["codigo_barras"])
+            if codigo is not None:
+                por_codigo[codigo] = produto
+                codigo_por_id[produto["id"]] = codigo
+        with self._lock:
+            self._por_codigo = por_codigo
+            self._codigo_por_id = codigo_por_id
+
+    def _tamanho(self) -> Dict[str, int]:
+        return {"codigos": len(self._por_codigo)}
+
+    # ---------- consulta ----------
+    def obter(self, codigo: str) -> Optional[Dict[str, Any]]:
+        """Consulta O(1) apenas em memória"""
+        self._agendar_se_antigo()
+        with self._lock:
+            self._stats["consultas"] += 1
+            produto = self._por_codigo.get(normalizar_codigo(codigo) or "")
+        return dict(produto) if produto else None
+
+    async def obter_ou_buscar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        """Memória primeiro; no miss, busca pelo índice único e aquece o mapa"""
+        await self.garantir_carregado()
+        produto = self.obter(codigo)
+        if produto is not None:
+            return produto
+
+        self._stats["buscas_banco"] += 1
+        linhas = await self._executar(BUSCA_CODIGO_SQL, {"codigo": normalizar_codigo(codigo)})
+        if not linhas:
+            return None
+        self.atualizar(linhas[0])
+        return self.obter(codigo)
+
+
+mapa_codigo_barras = MapaCodigoBarras(
+    ressincronizacao=settings.INDICES_PRODUTOS_RESSINCRONIZACAO,
+    sobreposicao=settings.INDICES_PRODUTOS_SOBREPOSICAO,
+    recarga_completa=settings.CODIGO_BARRAS_RECARGA_COMPLETA
+)
@@ -0,0 +1,138 @@
+# ========================
+# ESTOQUE POR DELTAS (PRODUTOS MAIS VENDIDOS)
+# ========================
+# Produtos com estoque_por_deltas = true não têm a linha de produtos
+# atualizada a cada venda: cada lote apenas acrescenta uma linha em
+# estoque_deltas (INSERT não disputa trava). Este consolidador soma os
+# deltas pendentes em produtos.quantidade_atual periodicamente, e as
+# leituras de estoque somam base + pendentes (view produtos_estoque).
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidar_tabelas
+from app.core.config import settings
+from app.core.database_async import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Apenas um worker consolida por vez; os demais pulam a rodada
+TRAVA_CONSOLIDACAO_SQL = "SELECT pg_try_advisory_xact_lock(hashtext('estoque_deltas'))"
+
+# DELETE e UPDATE no mesmo comando: uma leitura vê a base antiga + todos os
+# deltas ou a base nova + os restantes, nunca os dois ou nenhum. Deltas
+# inseridos durante a consolidação ficam para a próxima rodada.
+CONSOLIDAR_DELTAS_SQL = """
+    WITH movidos AS (
+        DELETE FROM estoque_deltas
+        RETURNING produto_id, delta
+    ),
+    somas AS (
+        SELECT produto_id, SUM(delta) as total, COUNT(*) as deltas
+        FROM movidos
+        GROUP BY produto_id
+    ),
+    atualizados AS (
+        UPDATE produtos p
+        SET quantidade_atual = COALESCE(p.quantidade_atual, 0) + s.total,
+            updated_at = CURRENT_TIMESTAMP
+        FROM somas s
+        WHERE p.id = s.produto_id
+        RETURNING p.id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM atualizados) as produtos,
+        (SELECT COALESCE(SUM(deltas), 0) FROM somas) as deltas
+"""
+
+ESTOQUE_PRODUTO_SQL = """
+    SELECT id as produto_id, quantidade_base, quantidade_pendente,
+           quantidade_atual, estoque_por_deltas
+    FROM produtos_estoque
+    WHERE id = :produto_id
+"""
+
+
+async def estoque_produto(db: AsyncSession, produto_id: int) -> Optional[Dict[str, Any]]:
+    """Estoque efetivo de um produto (base + deltas pendentes)"""
+    result = await db.execute(text(ESTOQUE_PRODUTO_SQL), {"produto_id": produto_id})
+    row = result.mappings().first()
+    if row is None:
+        return None
+    return {
+        **row,
+        "quantidade_base": float(row["quantidade_base"] or 0),
+        "quantidade_pendente": float(row["quantidade_pendente"] or 0),
+        "quantidade_atual": float(row["quantidade_atual"] or 0),
+    }
+
+
+class ConsolidadorDeltas:
+    """Tarefa em background que incorpora estoque_deltas em produtos.quantidade_atual"""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._tarefa: Optional[asyncio.Task] = None
+        self.rodadas = 0
+        self.deltas_consolidados = 0
+        self.ultimo_erro: Optional[str] = None
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def consolidar(self) -> Dict[str, int]:
+        """Uma rodada de consolidação (também usada por scripts/benchmark)"""
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                obteve = (await db.execute(text(TRAVA_CONSOLIDACAO_SQL))).scalar()
+                if not obteve:
+                    return {"produtos": 0, "deltas": 0}
+                resultado = dict((await db.execute(text(CONSOLIDAR_DELTAS_SQL))).mappings().one())
+
+        if resultado["produtos"]:
+            invalidar_tabelas("produtos")
+        return {"produtos": int(resultado["produtos"]), "deltas": int(resultado["deltas"])}
+
+    async def _executar(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                resultado = await self.consolidar()
+                self.rodadas += 1
+                self.deltas_consolidados += resultado["deltas"]
+                self.ultimo_erro = None
+                if resultado["deltas"]:
+                    logger.debug(
+                        f"Estoque: {resultado['deltas']} deltas consolidados em {resultado['produtos']} produtos"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ultimo_erro = str(e)
+                logger.error(f"Erro ao consolidar deltas de estoque: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "intervalo_segundos": self.intervalo,
+            "rodadas": self.rodadas,
+            "deltas_consolidados": self.deltas_consolidados,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+
+consolidador_deltas = ConsolidadorDeltas(intervalo=settings.ESTOQUE_CONSOLIDACAO_INTERVALO)
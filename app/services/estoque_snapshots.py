@@ -0,0 +1,276 @@
+# ========================
+# ESTOQUE EM UMA DATA (SNAPSHOTS DIÁRIOS)
+# ========================
+# Um snapshot do dia D guarda o estoque de cada produto no fechamento de D
+# (D+1 00:00). "Qual era o estoque em T" parte do snapshot mais próximo de T
+# e aplica apenas as movimentações entre o fechamento dele e T, filtradas por
+# created_at (só as partições do intervalo são lidas): o custo da consulta
+# cresce com os dias desde o snapshot, não com o histórico inteiro.
+
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database_async import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+TRAVA_SNAPSHOT_SQL = "SELECT pg_try_advisory_xact_lock(hashtext('estoque_snapshots'))"
+
+# Fechamento do dia = estoque efetivo agora (base + deltas pendentes) menos
+# as movimentações posteriores ao fechamento. Rodando para o dia anterior,
+# só as movimentações de hoje são lidas. Um único comando: o estoque e as
+# movimentações vêm do mesmo snapshot MVCC.
+GERAR_SNAPSHOT_SQL = """
+    INSERT INTO estoque_snapshots (dia, produto_id, quantidade, preco_custo)
+    SELECT CAST(:dia AS DATE), e.id,
+           e.quantidade_atual - COALESCE(m.total, 0),
+           p.preco_custo
+    FROM produtos_estoque e
+    JOIN produtos p ON p.id = e.id
+    LEFT JOIN (
+        SELECT produto_id,
+               SUM(CASE WHEN tipo = 'entrada' THEN quantidade ELSE -quantidade END) as total
+        FROM movimentacoes_estoque
+        WHERE created_at >= :fechamento
+        GROUP BY produto_id
+    ) m ON m.produto_id = e.id
+    ON CONFLICT (dia, produto_id) DO UPDATE
+    SET quantidade = EXCLUDED.quantidade,
+        preco_custo = EXCLUDED.preco_custo,
+        created_at = CURRENT_TIMESTAMP
+"""
+
+SNAPSHOT_EXISTE_SQL = "SELECT EXISTS (SELECT 1 FROM estoque_snapshots WHERE dia = :dia)"
+
+# Snapshot mais próximo de T: o último fechado até T ou, se T é anterior a
+# todos, o primeiro depois de T (percorrido de trás para frente)
+SNAPSHOT_ANTERIOR_SQL = "SELECT MAX(dia) FROM estoque_snapshots WHERE dia <= :limite"
+SNAPSHOT_POSTERIOR_SQL = "SELECT MIN(dia) FROM estoque_snapshots WHERE dia > :limite"
+
+
+def _fechamento(dia: date) -> datetime:
+    """Momento em que o snapshot do dia vale: meia-noite do dia seguinte"""
+    return datetime.combine(dia + timedelta(days=1), time.min)
+
+
+def montar_estoque_em_sql(origem: str, produto_id: Optional[int] = None) -> str:
+    """Estoque por produto em :momento a partir de `origem`
+
+    origem = "anterior":  snapshot :dia + movimentações em [:inicio, :fim)
+    origem = "posterior": snapshot :dia - movimentações em [:inicio, :fim)
+    origem = "atual":     estoque atual - movimentações em [:inicio, agora)
+    """
+    filtro_mov = "AND produto_id = :produto_id" if produto_id is not None else ""
+    limite_fim = "AND created_at < :fim" if origem != "atual" else ""
+    sinal = "+" if origem == "anterior" else "-"
+
+    if origem == "atual":
+        base = """
+            SELECT e.id as produto_id, e.quantidade_atual as quantidade, p.preco_custo
+            FROM produtos_estoque e
+            JOIN produtos p ON p.id = e.id
+        """
+        filtro_base = "WHERE e.id = :produto_id" if produto_id is not None else ""
+    else:
+        base = """
+            SELECT produto_id, quantidade, preco_custo
+            FROM estoque_snapshots
+            WHERE dia = :dia
+        """
+        filtro_base = "AND produto_id = :produto_id" if produto_id is not None else ""
+
+    return f"""
+        WITH base AS (
+            {base}
+            {filtro_base}
+        ),
+        movimentos AS (
+            SELECT produto_id,
+                   SUM(CASE WHEN tipo = 'entrada' THEN quantidade ELSE -quantidade END) as total,
+                   COUNT(*) as movimentacoes
+            FROM movimentacoes_estoque
+            WHERE created_at >= :inicio {limite_fim}
+              {filtro_mov}
+            GROUP BY produto_id
+        )
+        SELECT b.produto_id, pr.nome, pr.categoria,
+               COALESCE(b.quantidade, 0) {sinal} COALESCE(m.total, 0) as quantidade,
+               COALESCE(b.preco_custo, 0) as preco_custo,
+               COALESCE(m.movimentacoes, 0) as movimentacoes
+        FROM base b
+        JOIN produtos pr ON pr.id = b.produto_id
+        LEFT JOIN movimentos m ON m.produto_id = b.produto_id
+    """
+
+
+async def _origem(db: AsyncSession, momento: datetime) -> Dict[str, Any]:
+    """Escolhe o ponto de partida e o intervalo de movimentações a aplicar"""
+    # Último dia cujo fechamento (dia + 1 00:00) é <= momento
+    limite = (momento - timedelta(days=1)).date()
+
+    dia = (await db.execute(text(SNAPSHOT_ANTERIOR_SQL), {"limite": limite})).scalar()
+    if dia is not None:
+        return {"origem": "anterior", "dia": dia, "inicio": _fechamento(dia), "fim": momento}
+
+    dia = (await db.execute(text(SNAPSHOT_POSTERIOR_SQL), {"limite": limite})).scalar()
+    if dia is not None:
+        return {"origem": "posterior", "dia": dia, "inicio": momento, "fim": _fechamento(dia)}
+
+    return {"origem": "atual", "dia": None, "inicio": momento, "fim": None}
+
+
+def _params(origem: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in origem.items() if k != "origem" and v is not None}
+
+
+async def estoque_em(db: AsyncSession, produto_id: int, momento: datetime) -> Optional[Dict[str, Any]]:
+    """Estoque e valor de um produto em `momento`"""
+    origem = await _origem(db, momento)
+    params = {"produto_id": produto_id, **_params(origem)}
+
+    row = (await db.execute(
+        text(montar_estoque_em_sql(origem["origem"], produto_id)), params
+    )).mappings().first()
+
+    # Produto ausente do snapshot (criado depois dele): parte do estoque atual
+    if row is None and origem["origem"] != "atual":
+        origem = {"origem": "atual", "dia": None, "inicio": momento, "fim": None}
+        row = (await db.execute(
+            text(montar_estoque_em_sql("atual", produto_id)),
+            {"produto_id": produto_id, "inicio": momento}
+        )).mappings().first()
+
+    if row is None:
+        return None
+
+    quantidade = float(row["quantidade"])
+    preco_custo = float(row["preco_custo"])
+    return {
+        "produto_id": row["produto_id"],
+        "nome": row["nome"],
+        "momento": momento,
+        "quantidade": round(quantidade, 3),
+        "preco_custo": preco_custo,
+        "valor": round(quantidade * preco_custo, 2),
+        "snapshot_dia": origem["dia"],
+        "origem": origem["origem"],
+        "movimentacoes_aplicadas": int(row["movimentacoes"]),
+    }
+
+
+async def valorizacao_em(db: AsyncSession, momento: datetime) -> Dict[str, Any]:
+    """Estoque e valor do catálogo inteiro em `momento`, por categoria"""
+    origem = await _origem(db, momento)
+    params = _params(origem)
+
+    sql = f"""
+        SELECT COALESCE(categoria, 'Sem categoria') as categoria,
+               COUNT(*) as produtos,
+               SUM(quantidade) as quantidade,
+               SUM(quantidade * preco_custo) as valor,
+               SUM(movimentacoes) as movimentacoes
+        FROM ({montar_estoque_em_sql(origem["origem"])}) estoque
+        GROUP BY 1
+        ORDER BY valor DESC NULLS LAST
+    """
+    rows = (await db.execute(text(sql), params)).mappings().all()
+
+    categorias = [
+        {
+            "categoria": row["categoria"],
+            "produtos": int(row["produtos"]),
+            "quantidade": round(float(row["quantidade"] or 0), 3),
+            "valor": round(float(row["valor"] or 0), 2),
+        }
+        for row in rows
+    ]
+    return {
+        "momento": momento,
+        "snapshot_dia": origem["dia"],
+        "origem": origem["origem"],
+        "movimentacoes_aplicadas": sum(int(row["movimentacoes"] or 0) for row in rows),
+        "produtos": sum(c["produtos"] for c in categorias),
+        "valor_total": round(sum(c["valor"] for c in categorias), 2),
+        "categorias": categorias,
+    }
+
+
+class SnapshotsEstoque:
+    """Tarefa em background que grava o fechamento do dia anterior, uma vez por dia"""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._tarefa: Optional[asyncio.Task] = None
+        self.snapshots_gerados = 0
+        self.ultimo_dia: Optional[date] = None
+        self.ultimo_erro: Optional[str] = None
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def gerar(self, dia: date, substituir: bool = True) -> Optional[int]:
+        """Grava (ou regrava) o snapshot de `dia`; retorna o número de produtos
+
+        None quando outro worker está gerando ou o dia já existe (substituir=False).
+
+        Também usada para backfill: dias antigos custam as movimentações
+        desde o fechamento do dia até agora.
+        """
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                obteve = (await db.execute(text(TRAVA_SNAPSHOT_SQL))).scalar()
+                if not obteve:
+                    return None
+                if not substituir and (await db.execute(text(SNAPSHOT_EXISTE_SQL), {"dia": dia})).scalar():
+                    return None
+                result = await db.execute(text(GERAR_SNAPSHOT_SQL), {
+                    "dia": dia,
+                    "fechamento": _fechamento(dia)
+                })
+                produtos = result.rowcount
+
+        if produtos:
+            self.snapshots_gerados += 1
+            self.ultimo_dia = dia
+            logger.info(f"📸 Snapshot de estoque de {dia}: {produtos} produtos")
+        return produtos
+
+    async def _executar(self) -> None:
+        while True:
+            try:
+                await self.gerar(date.today() - timedelta(days=1), substituir=False)
+                self.ultimo_erro = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ultimo_erro = str(e)
+                logger.error(f"Erro ao gerar snapshot de estoque: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "intervalo_segundos": self.intervalo,
+            "snapshots_gerados": self.snapshots_gerados,
+            "ultimo_dia": self.ultimo_dia.isoformat() if self.ultimo_dia else None,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+
+snapshots_estoque = SnapshotsEstoque(intervalo=settings.ESTOQUE_SNAPSHOT_INTERVALO)
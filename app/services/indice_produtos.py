@@ -0,0 +1,206 @@
+# ========================
+# ÍNDICES DE PRODUTOS EM MEMÓRIA
+# ========================
+# Base comum dos índices consultados sem ida ao banco (autocomplete,
+# código de barras). A carga inicial lê os produtos ativos; depois só as
+# linhas com updated_at posterior à última sincronização são reaplicadas,
+# disparadas pelo LISTEN/NOTIFY ou, na falta dele, por tempo.
+#
+# updated_at é o início da transação, não o commit: uma transação longa
+# (ex.: importação em lote) pode ficar visível depois que a marca já
+# passou do seu updated_at. Por isso cada sincronização relê também os
+# últimos `sobreposicao` segundos antes da marca; linhas já aplicadas na
+# mesma versão (id + updated_at) são descartadas.
+
+import asyncio
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.database_async import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_INDICE = """
+    id, nome, unidade_medida, codigo_barras,
+    COALESCE(preco_venda, 0) as preco_venda,
+    is_active, updated_at
+"""
+
+CARGA_SQL = f"""
+    SELECT {COLUNAS_INDICE}
+    FROM produtos
+    WHERE is_active = true
+"""
+
+# idx_produtos_updated_at; `desde` = marca - sobreposição
+ALTERADOS_SQL = f"""
+    SELECT {COLUNAS_INDICE}
+    FROM produtos
+    WHERE updated_at >= :desde
+"""
+
+
+def entrada_produto(linha: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos mantidos em memória (estoque fica de fora: muda a cada venda)"""
+    return {
+        "id": linha["id"],
+        "nome": linha["nome"],
+        "unidade_medida": linha.get("unidade_medida"),
+        "codigo_barras": linha.get("codigo_barras"),
+        "preco_venda": float(linha.get("preco_venda") or 0),
+    }
+
+
+class IndiceProdutosMemoria(ABC):
+    """Sincronização incremental com a tabela produtos; subclasses definem a estrutura
+
+    Subclasses implementam `_reconstruir`, `_aplicar`, `_retirar` e
+    `_tamanho`; os três últimos são chamados com `self._lock` adquirido.
+    """
+
+    nome = "indice"
+
+    def __init__(self, ressincronizacao: float, sobreposicao: float, recarga_completa: Optional[float] = None):
+        self.ressincronizacao = ressincronizacao
+        self.sobreposicao = timedelta(seconds=sobreposicao)
+        # Rede de segurança para transações mais longas que a sobreposição
+        self.recarga_completa = recarga_completa
+        self._ultima_recarga = 0.0
+        self._lock = threading.Lock()
+        self._carga_lock: Optional[asyncio.Lock] = None
+        self._marca: Optional[datetime] = None
+        # Versão (updated_at) de cada id aplicado dentro da janela de sobreposição
+        self._aplicados: Dict[int, datetime] = {}
+        self._ultima_sincronizacao = 0.0
+        self._tarefa: Optional[asyncio.Task] = None
+        self._pendente = False
+        self.carregado = False
+        self._stats = {"consultas": 0, "atualizacoes": 0, "sincronizacoes": 0, "recargas": 0}
+
+    # ---------- estrutura (subclasses) ----------
+    @abstractmethod
+    def _reconstruir(self, produtos: List[Dict[str, Any]]) -> None: ...
+
+    @abstractmethod
+    def _aplicar(self, produto: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def _retirar(self, produto_id: int) -> None: ...
+
+    @abstractmethod
+    def _tamanho(self) -> Dict[str, int]: ...
+
+    # ---------- manutenção ----------
+    def atualizar(self, linha: Dict[str, Any]) -> None:
+        """Aplicar um produto criado/alterado (inativo = removido do índice)"""
+        with self._lock:
+            self._retirar(linha["id"])
+            if linha.get("is_active", True):
+                self._aplicar(entrada_produto(linha))
+            self._stats["atualizacoes"] += 1
+
+    def remover(self, produto_id: int) -> None:
+        with self._lock:
+            self._retirar(produto_id)
+            self._stats["atualizacoes"] += 1
+
+    def carregar(self, linhas: List[Dict[str, Any]]) -> None:
+        """Reconstruir o índice inteiro a partir dos produtos ativos"""
+        self._reconstruir([entrada_produto(linha) for linha in linhas])
+        self.carregado = True
+
+    # ---------- sincronização com o banco ----------
+    async def _executar(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(text(sql), params)
+            return [dict(row) for row in result.mappings().all()]
+
+    def _avancar_marca(self, linhas: List[Dict[str, Any]]) -> None:
+        marcas = [linha["updated_at"] for linha in linhas if linha["updated_at"] is not None]
+        if marcas:
+            self._marca = max([self._marca, *marcas] if self._marca else marcas)
+        if self._marca is not None:
+            desde = self._marca - self.sobreposicao
+            for linha in linhas:
+                if linha["updated_at"] is not None and linha["updated_at"] >= desde:
+                    self._aplicados[linha["id"]] = linha["updated_at"]
+            self._aplicados = {i: v for i, v in self._aplicados.items() if v >= desde}
+        self._ultima_sincronizacao = time.monotonic()
+
+    async def garantir_carregado(self) -> None:
+        if self.carregado:
+            return
+        if self._carga_lock is None:
+            self._carga_lock = asyncio.Lock()
+        async with self._carga_lock:
+            if not self.carregado:
+                await self.recarregar()
+
+    async def recarregar(self) -> None:
+        linhas = await self._executar(CARGA_SQL, {})
+        self.carregar(linhas)
+        self._marca = None
+        self._aplicados = {}
+        self._avancar_marca(linhas)
+        self._ultima_recarga = time.monotonic()
+        self._stats["recargas"] += 1
+        logger.info(f"✅ Índice '{self.nome}' carregado ({len(linhas)} produtos)")
+
+    async def sincronizar(self) -> None:
+        """Aplicar apenas os produtos alterados desde a última sincronização"""
+        vencida = (
+            self.recarga_completa is not None
+            and time.monotonic() - self._ultima_recarga >= self.recarga_completa
+        )
+        if self._marca is None or vencida:
+            await self.recarregar()
+            return
+        linhas = await self._executar(ALTERADOS_SQL, {"desde": self._marca - self.sobreposicao})
+        for linha in linhas:
+            if self._aplicados.get(linha["id"]) != linha["updated_at"]:
+                self.atualizar(linha)
+        self._avancar_marca(linhas)
+        self._stats["sincronizacoes"] += 1
+
+    def agendar_sincronizacao(self) -> None:
+        """Sincronizar em background (callback do LISTEN); ignorado se nunca carregado"""
+        if not self.carregado:
+            return
+        if self._tarefa is not None and not self._tarefa.done():
+            self._pendente = True
+            return
+        self._tarefa = asyncio.get_running_loop().create_task(self._sincronizar_em_loop())
+
+    async def _sincronizar_em_loop(self) -> None:
+        while True:
+            self._pendente = False
+            try:
+                await self.sincronizar()
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar índice '{self.nome}': {e}")
+            if not self._pendente:
+                return
+
+    def _agendar_se_antigo(self) -> None:
+        # Rede de segurança para NOTIFY desativado ou perdido
+        if time.monotonic() - self._ultima_sincronizacao < self.ressincronizacao:
+            return
+        try:
+            self.agendar_sincronizacao()
+        except RuntimeError:
+            pass  # fora do event loop (ex.: chamado de uma thread)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "carregado": self.carregado,
+                **self._tamanho(),
+                "ultima_alteracao": self._marca.isoformat() if self._marca else None,
+                **self._stats,
+            }
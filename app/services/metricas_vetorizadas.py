@@ -0,0 +1,203 @@
+# ========================
+# MÉTRICAS POR PRODUTO VETORIZADAS (NumPy)
+# ========================
+# O banco entrega só as colunas base (uma leitura de `produtos_com_estoque`,
+# já em float8); margens, status, urgência, dias de estoque e percentual são
+# calculados de uma vez sobre arrays NumPy. Os campos Decimal da resposta
+# JSON vêm do próprio NUMERIC em texto (mesma escala do banco), não do
+# float. Os valores já saem nos tipos finais, então os modelos são criados
+# com model_construct (sem validação) e serializados por app/core/respostas.py.
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.analytics_produtos import MetricaProduto
+
+# Ordenado por nome aqui; a ordem por criticidade é aplicada depois com um
+# sort estável, preservando o nome como critério de desempate. Vendas e
+# saldo da janela e a última venda vêm dos rollups (app/services/rollups.py),
+# sem reler movimentacoes_estoque.
+COLUNAS_PRODUTOS_SQL = f"""
+    SELECT p.id, p.nome, p.categoria,
+           COALESCE(p.quantidade_atual, 0)::float8 as quantidade_atual,
+           COALESCE(p.quantidade_minima, 0)::float8 as quantidade_minima,
+           COALESCE(p.preco_venda, 0)::float8 as preco_venda,
+           COALESCE(p.preco_custo, 0)::float8 as preco_custo,
+           COALESCE(r.vendidos, 0)::float8 as vendidos_periodo,
+           COALESCE(r.saldo, 0)::float8 as saldo_periodo,
+           (CURRENT_DATE - v.ultima_venda::date)::float8 as dias_sem_venda,
+           COALESCE(p.quantidade_atual, 0)::text as quantidade_atual_exata,
+           COALESCE(p.quantidade_minima, 0)::text as quantidade_minima_exata,
+           COALESCE(p.preco_venda, 0)::text as preco_venda_exata,
+           -- custo zero ou ausente sai como "0", igual ao antigo Decimal(str(custo or 0))
+           COALESCE(NULLIF(p.preco_custo, 0), 0)::text as preco_custo_exata,
+           CASE WHEN p.preco_custo > 0 AND p.preco_venda > p.preco_custo
+                THEN (p.preco_venda - p.preco_custo)::text
+                ELSE '0'
+           END as margem_bruta_exata,
+           (COALESCE(p.quantidade_atual, 0) * COALESCE(p.preco_venda, 0))::text as valor_estoque_total_exata
+    FROM produtos_com_estoque p
+    LEFT JOIN (
+        SELECT produto_id,
+               SUM(quantidade) FILTER (WHERE motivo = 'venda') as vendidos,
+               SUM(CASE WHEN tipo = 'entrada' THEN quantidade ELSE -quantidade END) as saldo
+        FROM movimentacoes_diarias
+        WHERE dia > CURRENT_DATE - {settings.ANALYTICS_JANELA_VENDAS_DIAS}
+        GROUP BY produto_id
+    ) r ON r.produto_id = p.id
+    LEFT JOIN vendas_ultima v ON v.produto_id = p.id
+    WHERE p.is_active = true
+    ORDER BY p.nome
+"""
+
+COLUNAS_NUMERICAS = (
+    "quantidade_atual", "quantidade_minima", "preco_venda", "preco_custo",
+    "vendidos_periodo", "saldo_periodo", "dias_sem_venda",
+)
+
+# Inteiros que podem faltar (NaN no array, None na resposta)
+COLUNAS_INTEIRAS_OPCIONAIS = ("dias_sem_venda",)
+
+# Campos Decimal de MetricaProduto, lidos como texto do NUMERIC (`<campo>_exata`)
+COLUNAS_EXATAS = (
+    "quantidade_atual", "quantidade_minima", "preco_venda", "preco_custo",
+    "margem_bruta", "valor_estoque_total",
+)
+
+# Cobertura máxima reportada; também usada para produtos sem vendas na janela
+DIAS_ESTOQUE_MAXIMO = 999
+
+STATUS_ESTOQUE = np.array(["sem_estoque", "baixo", "atencao", "normal"], dtype=object)
+
+CAMPOS_METRICA = frozenset(MetricaProduto.model_fields)
+
+
+def colunas_de_linhas(linhas: Sequence[Sequence[Any]]) -> Dict[str, np.ndarray]:
+    """Transpõe as linhas de COLUNAS_PRODUTOS_SQL em um array por coluna"""
+    if not linhas:
+        vazio = np.empty(0, dtype=np.float64)
+        return {
+            "id": np.empty(0, dtype=np.int64),
+            "nome": np.empty(0, dtype=object),
+            "categoria": np.empty(0, dtype=object),
+            **{coluna: vazio for coluna in COLUNAS_NUMERICAS},
+            **{f"{coluna}_exata": np.empty(0, dtype=object) for coluna in COLUNAS_EXATAS},
+        }
+
+    ids, nomes, categorias, *valores = zip(*linhas)
+    numericas, exatas = valores[:len(COLUNAS_NUMERICAS)], valores[len(COLUNAS_NUMERICAS):]
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "nome": np.array(nomes, dtype=object),
+        "categoria": np.array(categorias, dtype=object),
+        **{
+            coluna: np.array(valores, dtype=np.float64)
+            for coluna, valores in zip(COLUNAS_NUMERICAS, numericas)
+        },
+        **{
+            f"{coluna}_exata": np.array(valores, dtype=object)
+            for coluna, valores in zip(COLUNAS_EXATAS, exatas)
+        },
+    }
+
+
+def calcular_metricas(colunas: Dict[str, np.ndarray], exatas: bool = False) -> Dict[str, np.ndarray]:
+    """Métricas do catálogo inteiro de uma vez
+
+    Status, urgência e margens seguem as antigas expressões CASE.
+    dias_estoque_restante é a cobertura pela média diária de vendas da
+    janela; giro_estoque é vendido / estoque médio na janela, com o estoque
+    do início da janela = atual - saldo das movimentações.
+
+    Retorna as colunas de MetricaProduto já na ordem de criticidade
+    (sem estoque, estoque baixo, demais), mantendo a ordem por nome.
+    Com exatas=True os campos Decimal trazem o texto do NUMERIC (resposta
+    JSON); sem ele ficam em float64 (Arrow/Parquet).
+    """
+    q = colunas["quantidade_atual"]
+    q_min = colunas["quantidade_minima"]
+    venda = colunas["preco_venda"]
+    custo = colunas["preco_custo"]
+    vendidos = colunas["vendidos_periodo"]
+
+    sem_estoque = q <= 0
+    abaixo_minimo = q <= q_min
+
+    tem_margem = (custo > 0) & (venda > custo)
+    margem_bruta = np.where(tem_margem, venda - custo, 0.0)
+    margem_percentual = np.divide(
+        margem_bruta * 100, venda, out=np.zeros_like(venda), where=tem_margem
+    )
+
+    status = STATUS_ESTOQUE[np.select(
+        [sem_estoque, abaixo_minimo, q <= q_min * 2], [0, 1, 2], default=3
+    )]
+    nivel_urgencia = np.select(
+        [sem_estoque, abaixo_minimo, q <= q_min * 1.5], [5, 4, 3], default=1
+    )
+
+    media_diaria = vendidos / settings.ANALYTICS_JANELA_VENDAS_DIAS
+    cobertura = np.divide(
+        q, media_diaria, out=np.full_like(q, DIAS_ESTOQUE_MAXIMO), where=media_diaria > 0
+    )
+    dias_restantes = np.where(q > 0, np.minimum(cobertura, DIAS_ESTOQUE_MAXIMO), 0).astype(np.int64)
+
+    estoque_medio = q - colunas["saldo_periodo"] / 2
+    giro = np.divide(vendidos, estoque_medio, out=np.zeros_like(q), where=estoque_medio > 0)
+
+    percentual_estoque = q * 100.0 / np.maximum(q_min * 3, 1)
+
+    ordem = np.argsort(np.select([sem_estoque, abaixo_minimo], [1, 2], default=3), kind="stable")
+
+    metricas = {
+        "produto_id": colunas["id"][ordem],
+        "nome": colunas["nome"][ordem],
+        "categoria": colunas["categoria"][ordem],
+        "quantidade_atual": q[ordem],
+        "quantidade_minima": q_min[ordem],
+        "percentual_estoque": percentual_estoque[ordem],
+        "dias_estoque_restante": dias_restantes[ordem],
+        "preco_venda": venda[ordem],
+        "preco_custo": custo[ordem],
+        "margem_bruta": np.round(margem_bruta, 2)[ordem],
+        "margem_percentual": margem_percentual[ordem],
+        "valor_estoque_total": np.round(q * venda, 5)[ordem],
+        "status_estoque": status[ordem],
+        "precisa_reposicao": abaixo_minimo[ordem],
+        "nivel_urgencia": nivel_urgencia[ordem],
+        "giro_estoque": np.round(giro, 4)[ordem],
+        "dias_sem_venda": colunas["dias_sem_venda"][ordem],
+    }
+    if exatas:
+        for coluna in COLUNAS_EXATAS:
+            metricas[coluna] = colunas[f"{coluna}_exata"][ordem]
+    return metricas
+
+
+def metricas_para_linhas(metricas: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Colunas -> dicts; tolist() converte cada coluna para tipos Python de uma vez"""
+    nomes = list(metricas)
+    valores_por_coluna = []
+    for nome in nomes:
+        valores = metricas[nome].tolist()
+        if nome in COLUNAS_INTEIRAS_OPCIONAIS:
+            valores = [None if v != v else int(v) for v in valores]
+        valores_por_coluna.append(valores)
+    return [dict(zip(nomes, valores)) for valores in zip(*valores_por_coluna)]
+
+
+def montar_metricas(metricas: Dict[str, np.ndarray]) -> List[MetricaProduto]:
+    """Saída confiável: model_construct, sem revalidar o que acabou de ser calculado
+
+    Campos Decimal ficam com o texto do NUMERIC (calcular_metricas com
+    exatas=True); o serializador os emite como estão, igual ao JSON do Pydantic.
+    """
+    construir = MetricaProduto.model_construct
+    return [construir(CAMPOS_METRICA, **linha) for linha in metricas_para_linhas(metricas)]
+
+
+def metricas_produtos(linhas: Sequence[Sequence[Any]]) -> List[MetricaProduto]:
+    """Linhas de COLUNAS_PRODUTOS_SQL -> MetricaProduto"""
+    return montar_metricas(calcular_metricas(colunas_de_linhas(linhas), exatas=True))
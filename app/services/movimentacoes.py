@@ -0,0 +1,224 @@
+# app/services/movimentacoes.py
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Dict, Any
+from app.schemas.movimentacoes import MovimentacaoCreate, ResultadoLoteMovimentacoes
+from app.core.cache import invalidar_tabelas
+from app.utils.datas import momento_local
+import csv
+import io
+import logging
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# ========================
+# INGESTÃO EM LOTE (COPY + UM COMANDO)
+# ========================
+COLUNAS_ENTRADA = (
+    "ordem", "produto_id", "tipo", "motivo", "quantidade", "valor_unitario",
+    "documento_tipo", "documento_numero", "usuario_responsavel", "operador",
+    "numero_lote", "observacoes", "created_at"
+)
+
+ENTRADA_TEMP_SQL = """
+    CREATE TEMP TABLE entrada_movimentacoes (
+        ordem INTEGER,
+        produto_id INTEGER,
+        tipo VARCHAR(20),
+        motivo VARCHAR(50),
+        quantidade NUMERIC(12,3),
+        valor_unitario NUMERIC(10,2),
+        documento_tipo VARCHAR(50),
+        documento_numero VARCHAR(100),
+        usuario_responsavel VARCHAR(100),
+        operador VARCHAR(100),
+        numero_lote VARCHAR(50),
+        observacoes TEXT,
+        created_at TIMESTAMP
+    ) ON COMMIT DROP
+"""
+
+# Um único comando por lote:
+#  1. trava os produtos do lote em ordem de id (lotes concorrentes não se travam mutuamente)
+#  2. um UPDATE agregado por produto (soma dos deltas do lote)
+#  3. produtos com estoque_por_deltas (itens mais vendidos) não são travados nem
+#     atualizados: o total do lote vai para estoque_deltas e é consolidado depois
+#     (ver app/services/estoque_deltas.py)
+#  4. INSERT das movimentações com quantidade_anterior/atual pela soma acumulada
+#     sobre o estoque anterior ao lote. Para produtos em modo deltas esse estoque
+#     é base + pendentes lido sem trava: lotes simultâneos do mesmo produto podem
+#     registrar valores intermediários aproximados (o saldo final é exato).
+REGISTRAR_LOTE_SQL = """
+    WITH deltas AS (
+        SELECT ordem, produto_id,
+               CASE WHEN tipo = 'entrada' THEN quantidade ELSE -quantidade END as delta
+        FROM entrada_movimentacoes
+    ),
+    alvo AS (
+        SELECT id, COALESCE(estoque_por_deltas, false) as por_deltas,
+               COALESCE(quantidade_atual, 0) as quantidade_base
+        FROM produtos
+        WHERE id IN (SELECT produto_id FROM deltas)
+    ),
+    travados AS (
+        SELECT id
+        FROM produtos
+        WHERE id IN (SELECT id FROM alvo WHERE NOT por_deltas)
+        ORDER BY id
+        FOR UPDATE
+    ),
+    totais AS (
+        SELECT produto_id, SUM(delta) as total
+        FROM deltas
+        WHERE produto_id IN (SELECT id FROM alvo)
+        GROUP BY produto_id
+    ),
+    atualizados AS (
+        UPDATE produtos p
+        SET quantidade_atual = COALESCE(p.quantidade_atual, 0) + t.total,
+            updated_at = CURRENT_TIMESTAMP
+        FROM totais t
+        WHERE p.id = t.produto_id
+          AND p.id IN (SELECT id FROM travados)
+        RETURNING p.id, p.quantidade_atual - t.total as estoque_inicial
+    ),
+    pendentes AS (
+        INSERT INTO estoque_deltas (produto_id, delta)
+        SELECT t.produto_id, t.total
+        FROM totais t
+        JOIN alvo ON alvo.id = t.produto_id AND alvo.por_deltas
+        RETURNING produto_id
+    ),
+    base_deltas AS (
+        SELECT alvo.id,
+               alvo.quantidade_base + COALESCE((
+                   SELECT SUM(d.delta) FROM estoque_deltas d WHERE d.produto_id = alvo.id
+               ), 0) as estoque_inicial
+        FROM alvo
+        WHERE alvo.por_deltas
+    ),
+    estoques AS (
+        SELECT id, estoque_inicial FROM atualizados
+        UNION ALL
+        SELECT id, estoque_inicial FROM base_deltas
+    ),
+    acumulado AS (
+        SELECT ordem, delta,
+               SUM(delta) OVER (PARTITION BY produto_id ORDER BY ordem) as acumulado
+        FROM deltas
+    ),
+    inseridos AS (
+        INSERT INTO movimentacoes_estoque (
+            produto_id, tipo, motivo, quantidade,
+            quantidade_anterior, quantidade_atual,
+            valor_unitario, valor_total,
+            documento_tipo, documento_numero, usuario_responsavel, operador,
+            numero_lote, observacoes, status, processado_em, created_at
+        )
+        SELECT e.produto_id, e.tipo, e.motivo, e.quantidade,
+               est.estoque_inicial + ac.acumulado - ac.delta,
+               est.estoque_inicial + ac.acumulado,
+               e.valor_unitario, e.quantidade * e.valor_unitario,
+               e.documento_tipo, e.documento_numero, e.usuario_responsavel, e.operador,
+               e.numero_lote, e.observacoes, 'processada', CURRENT_TIMESTAMP, e.created_at
+        FROM entrada_movimentacoes e
+        JOIN acumulado ac ON ac.ordem = e.ordem
+        JOIN estoques est ON est.id = e.produto_id
+        ORDER BY e.ordem
+        RETURNING produto_id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM inseridos) as registradas,
+        (SELECT COUNT(*) FROM estoques) as produtos_atualizados,
+        (SELECT COUNT(*) FROM pendentes) as produtos_em_deltas,
+        ARRAY(SELECT DISTINCT produto_id FROM deltas
+              WHERE produto_id NOT IN (SELECT id FROM alvo)) as produtos_nao_encontrados
+"""
+
+
+def _csv_entrada(movimentacoes: List[MovimentacaoCreate]) -> io.StringIO:
+    """Lote em ordem cronológica; `ordem` define a sequência de quantidade_anterior/atual
+
+    Terminais podem mandar created_at com ou sem fuso: tudo vira horário
+    local sem fuso (coluna TIMESTAMP) antes de ordenar e gravar.
+    """
+    agora = datetime.now()
+    momentos = [momento_local(m.created_at) if m.created_at else agora for m in movimentacoes]
+    ordenadas = sorted(zip(momentos, movimentacoes), key=lambda par: par[0])
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for ordem, (momento, mov) in enumerate(ordenadas):
+        escritor.writerow([
+            ordem, mov.produto_id, mov.tipo.value, mov.motivo.value,
+            mov.quantidade, mov.valor_unitario,
+            mov.documento_tipo, mov.documento_numero, mov.usuario_responsavel, mov.operador,
+            mov.numero_lote, mov.observacoes, momento.isoformat(),
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+class MovimentacaoService:
+    """Service de movimentações de estoque"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def registrar_lote(self, movimentacoes: List[MovimentacaoCreate]) -> ResultadoLoteMovimentacoes:
+        """Registrar um lote de movimentações: COPY para tabela temporária + um comando
+
+        Movimentações de produtos inexistentes são descartadas e informadas
+        em `produtos_nao_encontrados`; as demais são gravadas normalmente.
+        """
+        inicio = time.perf_counter()
+        try:
+            resultado: Dict[str, Any] = {
+                "registradas": 0, "produtos_atualizados": 0,
+                "produtos_em_deltas": 0, "produtos_nao_encontrados": []
+            }
+
+            if movimentacoes:
+                with self.db.begin():
+                    # COPY pela conexão psycopg2 da própria sessão (mesma transação)
+                    cursor = self.db.connection().connection.cursor()
+                    try:
+                        cursor.execute(ENTRADA_TEMP_SQL)
+                        cursor.copy_expert(
+                            f"COPY entrada_movimentacoes ({', '.join(COLUNAS_ENTRADA)}) FROM STDIN WITH (FORMAT csv)",
+                            _csv_entrada(movimentacoes)
+                        )
+                    finally:
+                        cursor.close()
+
+                    resultado = dict(self.db.execute(text(REGISTRAR_LOTE_SQL)).mappings().one())
+
+                invalidar_tabelas("produtos", "movimentacoes_estoque")
+
+            tempo_ms = (time.perf_counter() - inicio) * 1000
+            logger.info(
+                f"📦 Lote de movimentações: {resultado['registradas']}/{len(movimentacoes)} registradas, "
+                f"{resultado['produtos_atualizados']} produtos em {tempo_ms:.1f} ms"
+            )
+
+            return ResultadoLoteMovimentacoes(
+                recebidas=len(movimentacoes),
+                registradas=resultado["registradas"],
+                produtos_atualizados=resultado["produtos_atualizados"],
+                produtos_em_deltas=resultado["produtos_em_deltas"],
+                produtos_nao_encontrados=list(resultado["produtos_nao_encontrados"] or []),
+                tempo_ms=round(tempo_ms, 2)
+            )
+
+        except Exception as e:
+            try:
+                self.db.rollback()
+                logger.error(f"🔄 Rollback executado: {e}")
+            except:
+                pass
+
+            error_msg = f"Erro ao registrar lote de movimentações: {str(e)}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
@@ -0,0 +1,89 @@
+# ========================
+# MANUTENÇÃO DAS PARTIÇÕES DE MOVIMENTAÇÕES
+# ========================
+# movimentacoes_estoque é particionada por mês (particionar_movimentacoes.sql).
+# Esta tarefa garante que as partições dos próximos meses existam antes de
+# serem necessárias e desanexa as que passaram do prazo de retenção.
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database_async import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+MANTER_PARTICOES_SQL = "SELECT acao, particao FROM manter_particoes_movimentacoes(:futuros, :retencao)"
+
+
+class ManutencaoParticoes:
+    """Executa manter_particoes_movimentacoes() na inicialização e a cada `intervalo`"""
+
+    def __init__(self, intervalo: float, meses_futuros: int, meses_retencao: int):
+        self.intervalo = intervalo
+        self.meses_futuros = meses_futuros
+        self.meses_retencao = meses_retencao
+        self._tarefa: Optional[asyncio.Task] = None
+        self.execucoes = 0
+        self.ultimas_acoes: List[Dict[str, str]] = []
+        self.ultimo_erro: Optional[str] = None
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def manter(self) -> List[Dict[str, str]]:
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                result = await db.execute(text(MANTER_PARTICOES_SQL), {
+                    "futuros": self.meses_futuros,
+                    "retencao": self.meses_retencao
+                })
+                acoes = [dict(row) for row in result.mappings().all()]
+
+        for acao in acoes:
+            logger.info(f"🗂️ Partição {acao['particao']} {acao['acao']}")
+        return acoes
+
+    async def _executar(self) -> None:
+        while True:
+            try:
+                self.ultimas_acoes = await self.manter()
+                self.execucoes += 1
+                self.ultimo_erro = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ultimo_erro = str(e)
+                logger.error(f"Erro na manutenção de partições de movimentações: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "intervalo_segundos": self.intervalo,
+            "meses_futuros": self.meses_futuros,
+            "meses_retencao": self.meses_retencao,
+            "execucoes": self.execucoes,
+            "ultimas_acoes": self.ultimas_acoes,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+
+manutencao_particoes = ManutencaoParticoes(
+    intervalo=settings.PARTICOES_INTERVALO,
+    meses_futuros=settings.PARTICOES_MESES_FUTUROS,
+    meses_retencao=settings.PARTICOES_MESES_RETENCAO
+)
@@ -2,13 +2,398 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional, Dict, Any, Tuple
-from app.schemas.produtos import ProdutoCreate, ProdutoUpdate
+from pydantic import ValidationError
+from app.schemas.produtos import ProdutoCreate, ProdutoUpdate, ProdutoUpdateLote, RegraReprecificacao
 from app.schemas.analytics_produtos import RelatorioProdutos
+from app.core.cache import invalidar_tabelas
+from app.core.config import settings
+from app.services.autocomplete import indice_autocomplete
+from app.services.codigo_barras import mapa_codigo_barras
+from app.utils.texto import normalizar_termo
+import base64
+import csv
+import io
+import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# ========================
+# LISTAGEM PAGINADA (KEYSET)
+# ========================
+LIMITE_PADRAO_LISTAGEM = 100
+LIMITE_MAXIMO_LISTAGEM = 1000
+
+
+def codificar_cursor(nome: str, produto_id: int) -> str:
+    """Cursor opaco com a chave (nome, id) do último item da página"""
+    bruto = json.dumps([nome, produto_id], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[str, int]:
+    """Decodificar cursor; ValueError se inválido"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        nome, produto_id = json.loads(bruto)
+        return str(nome), int(produto_id)
+    except Exception:
+        raise ValueError("Cursor de paginação inválido")
+
+
+COLUNAS_LISTAGEM = """
+            id, nome, categoria, 
+            COALESCE(preco_venda, 0) as preco_venda,
+            COALESCE(preco_custo, 0) as preco_custo,
+            COALESCE(quantidade_atual, 0) as quantidade_atual,
+            COALESCE(quantidade_minima, 0) as quantidade_minima,
+            tags,
+            is_active"""
+
+
+# Colunas que as duas partes da listagem de estoque baixo têm em comum
+COLUNAS_BASE_LISTAGEM = (
+    "id, nome, categoria, preco_venda, preco_custo, quantidade_atual, quantidade_minima, tags, is_active"
+)
+
+
+def montar_listagem_sql(
+    categoria: Optional[str] = None,
+    estoque_baixo: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    limite: int = LIMITE_PADRAO_LISTAGEM
+) -> Tuple[str, Dict[str, Any]]:
+    """SQL de listagem por (nome, id) com filtros; busca limite+1 para saber se há próxima página
+
+    Com estoque_baixo=true, produtos fora do modo deltas são lidos direto de
+    `produtos` (o estoque da tabela é o efetivo), pelo índice parcial
+    idx_produtos_estoque_baixo_nome_id; só os em modo deltas (poucos) passam
+    por produtos_com_estoque. As duas páginas são intercaladas por (nome, id).
+    """
+    condicoes = ["is_active = true"]
+    params: Dict[str, Any] = {"limite": limite + 1}
+
+    if categoria:
+        condicoes.append("categoria = :categoria")
+        params["categoria"] = categoria
+
+    if estoque_baixo is False:
+        condicoes.append("quantidade_atual > quantidade_minima")
+
+    if tags:
+        condicoes.append("tags @> :tags")
+        params["tags"] = [tag.lower().strip() for tag in tags]
+
+    if cursor:
+        params["cursor_nome"], params["cursor_id"] = decodificar_cursor(cursor)
+        condicoes.append("(nome, id) > (:cursor_nome, :cursor_id)")
+
+    if estoque_baixo is True:
+        condicoes.append("quantidade_atual <= quantidade_minima")
+        sql = f"""
+        SELECT {COLUNAS_LISTAGEM}
+        FROM (
+            (SELECT {COLUNAS_BASE_LISTAGEM} FROM produtos
+             WHERE {' AND '.join(condicoes)} AND NOT COALESCE(estoque_por_deltas, false)
+             ORDER BY nome, id
+             LIMIT :limite)
+            UNION ALL
+            (SELECT {COLUNAS_BASE_LISTAGEM} FROM produtos_com_estoque
+             WHERE {' AND '.join(condicoes)} AND estoque_por_deltas
+             ORDER BY nome, id
+             LIMIT :limite)
+        ) baixo
+        ORDER BY nome, id
+        LIMIT :limite
+    """
+        return sql, params
+
+    sql = f"""
+        SELECT {COLUNAS_LISTAGEM}
+        FROM produtos_com_estoque
+        WHERE {' AND '.join(condicoes)}
+        ORDER BY nome, id
+        LIMIT :limite
+    """
+    return sql, params
+
+
+# ========================
+# BUSCA POR NOME (TRIGRAMAS)
+# ========================
+MODO_BUSCA_SIMILARIDADE = "similaridade"
+MODO_BUSCA_ILIKE = "ilike"
+
+# f_unaccent(lower(nome)) é a mesma expressão do índice idx_produtos_nome_trgm.
+# `%>` filtra por word_similarity (erros de digitação) e LIKE cobre termos
+# curtos demais para trigramas; ambos usam o índice GIN.
+BUSCA_SIMILARIDADE_SQL = """
+    WITH termo AS (SELECT f_unaccent(lower(:termo)) as t)
+    SELECT id, nome, unidade_medida, quantidade_atual,
+           quantidade_minima, preco_venda, is_active,
+           word_similarity(termo.t, f_unaccent(lower(nome))) as relevancia
+    FROM produtos_com_estoque, termo
+    WHERE is_active = true
+      AND (f_unaccent(lower(nome)) %> termo.t
+           OR f_unaccent(lower(nome)) LIKE :padrao)
+    ORDER BY (f_unaccent(lower(nome)) LIKE termo.t || '%') DESC,
+             relevancia DESC,
+             nome
+    LIMIT :limite
+"""
+
+
+def escapar_like(termo: str) -> str:
+    """Escapar curingas do LIKE digitados pelo usuário"""
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def paginar(linhas: List[dict], limite: int) -> Tuple[List[dict], Optional[str]]:
+    """Cortar a linha extra e gerar o cursor da próxima página"""
+    if len(linhas) <= limite:
+        return linhas, None
+    pagina = linhas[:limite]
+    ultimo = pagina[-1]
+    return pagina, codificar_cursor(ultimo["nome"], ultimo["id"])
+
+
+# ========================
+# IMPORTAÇÃO EM LOTE (COPY + UPSERT)
+# ========================
+COLUNAS_IMPORTACAO = (
+    "linha", "nome", "unidade_medida", "quantidade_atual",
+    "quantidade_minima", "preco_venda", "categoria", "codigo_barras"
+)
+
+IMPORTACAO_TEMP_SQL = """
+    CREATE TEMP TABLE importacao_produtos (
+        linha INTEGER,
+        nome VARCHAR(255),
+        unidade_medida VARCHAR(10),
+        quantidade_atual NUMERIC(12,3),
+        quantidade_minima NUMERIC(12,3),
+        preco_venda NUMERIC(10,2),
+        categoria VARCHAR(50),
+        codigo_barras VARCHAR(14)
+    ) ON COMMIT DROP
+"""
+
+# Chave de conflito: codigo_barras (índice único parcial). Linhas sem código
+# são sempre inseridas. Em produtos existentes o estoque não é sobrescrito:
+# uma lista de preços não conhece a quantidade em loja.
+IMPORTACAO_UPSERT_SQL = """
+    INSERT INTO produtos (
+        nome, unidade_medida, quantidade_atual, quantidade_minima,
+        preco_venda, categoria, codigo_barras, is_active
+    )
+    SELECT nome, unidade_medida, quantidade_atual, quantidade_minima,
+           preco_venda, COALESCE(categoria, 'outros'), codigo_barras, true
+    FROM importacao_produtos
+    ORDER BY linha
+    ON CONFLICT (codigo_barras) WHERE codigo_barras IS NOT NULL DO UPDATE SET
+        nome = EXCLUDED.nome,
+        unidade_medida = EXCLUDED.unidade_medida,
+        quantidade_minima = EXCLUDED.quantidade_minima,
+        preco_venda = EXCLUDED.preco_venda,
+        categoria = COALESCE(EXCLUDED.categoria, produtos.categoria),
+        is_active = true,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING id, nome, unidade_medida, preco_venda, codigo_barras, is_active,
+              (xmax = 0) as inserido
+"""
+
+
+def validar_importacao(linhas: List[Dict[str, Any]]) -> Tuple[List[ProdutoCreate], List[int], List[dict]]:
+    """Validar o lote inteiro de uma vez; retorna (válidos, nº da linha de cada válido, erros)"""
+    validos: List[ProdutoCreate] = []
+    numeros: List[int] = []
+    erros: List[dict] = []
+    codigos_vistos: Dict[str, int] = {}
+
+    for numero, linha in enumerate(linhas):
+        try:
+            produto = ProdutoCreate.model_validate(linha)
+        except ValidationError as e:
+            erros.append({
+                "linha": numero,
+                "erros": [f"{'.'.join(str(p) for p in erro['loc'])}: {erro['msg']}" for erro in e.errors()]
+            })
+            continue
+
+        # ON CONFLICT não pode alterar a mesma linha duas vezes no mesmo comando
+        if produto.codigo_barras:
+            anterior = codigos_vistos.get(produto.codigo_barras)
+            if anterior is not None:
+                erros.append({
+                    "linha": numero,
+                    "erros": [f"codigo_barras: repetido no lote (linha {anterior})"]
+                })
+                continue
+            codigos_vistos[produto.codigo_barras] = numero
+
+        validos.append(produto)
+        numeros.append(numero)
+
+    return validos, numeros, erros
+
+
+def _csv_importacao(produtos: List[ProdutoCreate], numeros: List[int]) -> io.StringIO:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for numero, produto in zip(numeros, produtos):
+        escritor.writerow([
+            numero,
+            produto.nome.strip().title(),
+            produto.unidade_medida,
+            produto.quantidade_atual,
+            produto.quantidade_minima,
+            produto.preco_venda,
+            # Vazio sem aspas = NULL no COPY em CSV
+            produto.categoria.strip().lower() if produto.categoria else None,
+            produto.codigo_barras,
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+# ========================
+# ATUALIZAÇÃO EM LOTE (UPDATE ... FROM VALUES)
+# ========================
+# Coluna -> tipo SQL. NULL em uma linha do VALUES significa "manter o valor
+# atual" (COALESCE), o mesmo que um campo None em ProdutoUpdate.
+COLUNAS_ATUALIZACAO_LOTE = {
+    "nome": "VARCHAR(255)",
+    "unidade_medida": "VARCHAR(10)",
+    "quantidade_atual": "NUMERIC(12,3)",
+    "quantidade_minima": "NUMERIC(12,3)",
+    "preco_venda": "NUMERIC(10,2)",
+}
+TAMANHO_BLOCO_ATUALIZACAO = 1000
+
+
+def mesclar_atualizacoes(atualizacoes: List[ProdutoUpdateLote]) -> Dict[int, Dict[str, Any]]:
+    """Um item por id (campos posteriores prevalecem); UPDATE ... FROM aplicaria só um deles"""
+    por_id: Dict[int, Dict[str, Any]] = {}
+    for item in atualizacoes:
+        campos = item.model_dump(exclude={"id"}, exclude_none=True)
+        if "nome" in campos:
+            campos["nome"] = str(campos["nome"]).strip().title()
+        por_id.setdefault(item.id, {}).update(
+            {k: v for k, v in campos.items() if k in COLUNAS_ATUALIZACAO_LOTE}
+        )
+    return {produto_id: campos for produto_id, campos in por_id.items() if campos}
+
+
+def montar_atualizacao_lote_sql(bloco: List[Tuple[int, Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+    """UPDATE único para um bloco de produtos com campos diferentes em cada linha"""
+    colunas = list(COLUNAS_ATUALIZACAO_LOTE)
+    params: Dict[str, Any] = {}
+    valores = []
+    for i, (produto_id, campos) in enumerate(bloco):
+        params[f"id_{i}"] = produto_id
+        celulas = [f"CAST(:id_{i} AS INTEGER)"]
+        for coluna in colunas:
+            params[f"{coluna}_{i}"] = campos.get(coluna)
+            celulas.append(f"CAST(:{coluna}_{i} AS {COLUNAS_ATUALIZACAO_LOTE[coluna]})")
+        valores.append(f"({', '.join(celulas)})")
+
+    atribuicoes = ",\n            ".join(f"{c} = COALESCE(v.{c}, p.{c})" for c in colunas)
+    sql = f"""
+        UPDATE produtos p
+        SET {atribuicoes},
+            updated_at = CURRENT_TIMESTAMP
+        FROM (VALUES {', '.join(valores)}) AS v (id, {', '.join(colunas)})
+        WHERE p.id = v.id AND p.is_active = true
+        RETURNING p.id, p.nome, p.unidade_medida, p.quantidade_atual,
+                  p.quantidade_minima, p.preco_venda, p.codigo_barras,
+                  p.is_active, p.created_at, p.updated_at
+    """
+    return sql, params
+
+
+# ========================
+# REPRECIFICAÇÃO POR REGRA (SET-BASED)
+# ========================
+def montar_reprecificacao_sql(regra: RegraReprecificacao) -> Tuple[str, Dict[str, Any]]:
+    """SELECT com o novo preço de cada produto ativo (fora do escopo: preço atual)
+
+    Ordem: reajuste percentual -> piso da margem mínima -> arredondamento
+    para cima até o final escolhido (nunca desfaz o piso de margem).
+    """
+    params: Dict[str, Any] = {"ajuste": regra.ajuste_percentual}
+    novo = "COALESCE(preco_venda, 0) * (1 + CAST(:ajuste AS NUMERIC) / 100)"
+
+    if regra.margem_minima is not None:
+        params["margem"] = regra.margem_minima
+        novo = (
+            f"GREATEST({novo}, CASE WHEN preco_custo > 0 "
+            f"THEN preco_custo / (1 - CAST(:margem AS NUMERIC) / 100) ELSE 0 END)"
+        )
+
+    if regra.final_centavos is not None:
+        params["final"] = regra.final_centavos
+        final = "CAST(:final AS NUMERIC) / 100"
+        novo = f"CEIL(({novo} - {final}) * 10) / 10 + {final}"
+
+    escopo = "true"
+    if regra.categoria:
+        escopo = "categoria = :categoria"
+        params["categoria"] = regra.categoria
+
+    sql = f"""
+        SELECT id,
+               COALESCE(preco_venda, 0) as preco_atual,
+               preco_custo,
+               COALESCE(quantidade_atual, 0) as quantidade_atual,
+               CASE WHEN {escopo} THEN ROUND(CAST({novo} AS NUMERIC), 2) ELSE COALESCE(preco_venda, 0) END as preco_novo,
+               ({escopo}) as no_escopo
+        FROM produtos_com_estoque
+        WHERE is_active = true
+    """
+    return sql, params
+
+
+def previa_reprecificacao_sql(calculo_sql: str) -> str:
+    """Uma agregação com o antes/depois do catálogo ativo inteiro"""
+    return f"""
+        WITH calculo AS ({calculo_sql})
+        SELECT
+            COUNT(*) FILTER (WHERE no_escopo) as produtos_no_escopo,
+            COUNT(*) FILTER (WHERE preco_novo <> preco_atual) as produtos_alterados,
+            ROUND(SUM(quantidade_atual * preco_atual), 2) as valor_total_estoque_atual,
+            ROUND(SUM(quantidade_atual * preco_novo), 2) as valor_total_estoque_novo,
+            ROUND(AVG((preco_atual - preco_custo) / preco_atual * 100)
+                  FILTER (WHERE preco_custo > 0 AND preco_atual > 0), 2) as margem_media_atual,
+            ROUND(AVG((preco_novo - preco_custo) / preco_novo * 100)
+                  FILTER (WHERE preco_custo > 0 AND preco_novo > 0), 2) as margem_media_nova
+        FROM calculo
+    """
+
+
+def aplicar_reprecificacao_sql(calculo_sql: str) -> str:
+    return f"""
+        UPDATE produtos p
+        SET preco_venda = c.preco_novo,
+            updated_at = CURRENT_TIMESTAMP
+        FROM ({calculo_sql}) c
+        WHERE p.id = c.id AND c.no_escopo AND c.preco_novo <> c.preco_atual
+        RETURNING p.id, p.nome, p.unidade_medida, p.preco_venda, p.codigo_barras, p.is_active
+    """
+
+
+def atualizar_indices_memoria(linha: dict) -> None:
+    """Refletir uma escrita já confirmada nos índices em memória deste worker"""
+    indice_autocomplete.atualizar(linha)
+    mapa_codigo_barras.atualizar(linha)
+
+
+def remover_dos_indices_memoria(produto_id: int) -> None:
+    indice_autocomplete.remover(produto_id)
+    mapa_codigo_barras.remover(produto_id)
+
+
 class ProdutoService:
     """Service completo para gestão de produtos"""
     
@@ -20,10 +405,79 @@ class ProdutoService:
         # Manter implementação existente
         pass
     
-    def listar_produtos(self, **kwargs) -> Tuple[List[dict], int]:
-        """Listar produtos (método já implementado)"""
-        # Manter implementação existente  
-        pass
+    def importar_produtos(self, linhas: List[Dict[str, Any]]) -> dict:
+        """Importar/atualizar produtos em lote: validação única, COPY e um único upsert
+
+        Linhas inválidas são devolvidas em `erros` sem interromper as demais.
+        """
+        try:
+            produtos, numeros, erros = validar_importacao(linhas)
+            logger.info(f"📥 Importando {len(produtos)} produtos ({len(erros)} linhas inválidas)")
+            
+            resultado = []
+            if produtos:
+                with self.db.begin():
+                    # COPY pela conexão psycopg2 da própria sessão (mesma transação)
+                    cursor = self.db.connection().connection.cursor()
+                    try:
+                        cursor.execute(IMPORTACAO_TEMP_SQL)
+                        cursor.copy_expert(
+                            f"COPY importacao_produtos ({', '.join(COLUNAS_IMPORTACAO)}) FROM STDIN WITH (FORMAT csv)",
+                            _csv_importacao(produtos, numeros)
+                        )
+                    finally:
+                        cursor.close()
+                    
+                    resultado = [dict(row) for row in self.db.execute(text(IMPORTACAO_UPSERT_SQL)).mappings().all()]
+                
+                invalidar_tabelas("produtos")
+                for row in resultado:
+                    atualizar_indices_memoria(row)
+            
+            inseridos = sum(1 for row in resultado if row["inserido"])
+            logger.info(f"✅ Importação concluída: {inseridos} inseridos, {len(resultado) - inseridos} atualizados")
+            
+            return {
+                "total_linhas": len(linhas),
+                "inseridos": inseridos,
+                "atualizados": len(resultado) - inseridos,
+                "rejeitados": len(erros),
+                "erros": erros,
+                "produtos": [
+                    {
+                        "id": row["id"],
+                        "nome": row["nome"],
+                        "codigo_barras": row["codigo_barras"],
+                        "acao": "inserido" if row["inserido"] else "atualizado"
+                    }
+                    for row in resultado
+                ]
+            }
+            
+        except Exception as e:
+            try:
+                self.db.rollback()
+                logger.error(f"🔄 Rollback executado: {e}")
+            except:
+                pass
+            
+            error_msg = f"Erro ao importar produtos: {str(e)}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+    
+    def listar_produtos(
+        self,
+        categoria: Optional[str] = None,
+        estoque_baixo: Optional[bool] = None,
+        tags: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        limite: int = LIMITE_PADRAO_LISTAGEM
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Listar produtos ativos por (nome, id); retorna (página, próximo cursor)"""
+        limite = max(1, min(limite, LIMITE_MAXIMO_LISTAGEM))
+        sql, params = montar_listagem_sql(categoria, estoque_baixo, tags, cursor, limite)
+        linhas = [dict(row) for row in self.db.execute(text(sql), params).mappings().all()]
+        return paginar(linhas, limite)
     
     def obter_produto(self, produto_id: int) -> Optional[dict]:
         """Obter produto por ID (método já implementado)"""
@@ -77,7 +531,8 @@ class ProdutoService:
                     SET {', '.join(update_fields)}
                     WHERE id = :id AND ativo = true
                     RETURNING id, nome, unidade_medida, quantidade_atual, 
-                             quantidade_minima, preco_venda, ativo, created_at, updated_at
+                             quantidade_minima, preco_venda, ativo, created_at, updated_at,
+                             codigo_barras
                 """
                 
                 result = self.db.execute(text(update_query), params)
@@ -85,21 +540,130 @@ class ProdutoService:
                 
                 if not row:
                     return None
+            
+            # Após o commit: analytics em cache passam a estar desatualizados
+            invalidar_tabelas("produtos")
+            atualizar_indices_memoria({
+                "id": row[0], "nome": row[1], "unidade_medida": row[2],
+                "preco_venda": row[5], "is_active": row[6], "codigo_barras": row[9]
+            })
+            logger.info(f"✅ Produto {produto_id} atualizado com sucesso")
+            
+            return {
+                "id": row[0],
+                "nome": row[1],
+                "unidade_medida": row[2],
+                "quantidade_atual": float(row[3] or 0),
+                "quantidade_minima": float(row[4] or 0),
+                "preco_venda": float(row[5] or 0),
+                "is_active": row[6],
+                "created_at": row[7],
+                "updated_at": row[8]
+            }
                 
-                logger.info(f"✅ Produto {produto_id} atualizado com sucesso")
+        except Exception as e:
+            try:
+                self.db.rollback()
+                logger.error(f"🔄 Rollback executado: {e}")
+            except:
+                pass
+            
+            error_msg = f"Erro ao atualizar produto {produto_id}: {str(e)}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+    
+    def atualizar_produtos_em_lote(self, atualizacoes: List[ProdutoUpdateLote]) -> dict:
+        """Atualizar vários produtos (campos diferentes por produto) em uma transação
+
+        Um UPDATE ... FROM (VALUES ...) por bloco de até TAMANHO_BLOCO_ATUALIZACAO
+        produtos, sem a leitura prévia de atualizar_produto.
+        """
+        try:
+            por_id = mesclar_atualizacoes(atualizacoes)
+            logger.info(f"🔄 Atualizando {len(por_id)} produtos em lote")
+            
+            itens = list(por_id.items())
+            atualizados = []
+            if itens:
+                with self.db.begin():
+                    for inicio in range(0, len(itens), TAMANHO_BLOCO_ATUALIZACAO):
+                        sql, params = montar_atualizacao_lote_sql(itens[inicio:inicio + TAMANHO_BLOCO_ATUALIZACAO])
+                        atualizados.extend(dict(row) for row in self.db.execute(text(sql), params).mappings().all())
                 
-                return {
-                    "id": row[0],
-                    "nome": row[1],
-                    "unidade_medida": row[2],
-                    "quantidade_atual": float(row[3] or 0),
-                    "quantidade_minima": float(row[4] or 0),
-                    "preco_venda": float(row[5] or 0),
-                    "is_active": row[6],
-                    "created_at": row[7],
-                    "updated_at": row[8]
-                }
+                invalidar_tabelas("produtos")
+                for row in atualizados:
+                    atualizar_indices_memoria(row)
+            
+            encontrados = {row["id"] for row in atualizados}
+            nao_encontrados = [produto_id for produto_id in por_id if produto_id not in encontrados]
+            logger.info(f"✅ {len(atualizados)} produtos atualizados ({len(nao_encontrados)} não encontrados)")
+            
+            return {
+                "atualizados": len(atualizados),
+                "nao_encontrados": nao_encontrados,
+                "produtos": [
+                    {
+                        **row,
+                        "quantidade_atual": float(row["quantidade_atual"] or 0),
+                        "quantidade_minima": float(row["quantidade_minima"] or 0),
+                        "preco_venda": float(row["preco_venda"] or 0),
+                    }
+                    for row in atualizados
+                ]
+            }
+            
+        except Exception as e:
+            try:
+                self.db.rollback()
+                logger.error(f"🔄 Rollback executado: {e}")
+            except:
+                pass
+            
+            error_msg = f"Erro ao atualizar produtos em lote: {str(e)}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+    
+    def reprecificar(self, regra: RegraReprecificacao, aplicar: bool = False) -> dict:
+        """Prévia (e opcionalmente aplicação) de uma regra de preços em uma transação
+
+        A prévia é uma única agregação; a aplicação é um único UPDATE com o
+        mesmo cálculo, então o resultado aplicado é exatamente o previsto.
+        """
+        try:
+            calculo_sql, params = montar_reprecificacao_sql(regra)
+            logger.info(f"💲 Reprecificação {'(aplicando)' if aplicar else '(prévia)'}: {regra.model_dump()}")
+            
+            alterados = []
+            with self.db.begin():
+                if aplicar:
+                    # Ninguém altera preços entre a prévia e o UPDATE
+                    self.db.execute(text("LOCK TABLE produtos IN SHARE ROW EXCLUSIVE MODE"))
+                
+                previa = dict(self.db.execute(text(previa_reprecificacao_sql(calculo_sql)), params).mappings().one())
                 
+                if aplicar:
+                    alterados = [dict(row) for row in self.db.execute(text(aplicar_reprecificacao_sql(calculo_sql)), params).mappings().all()]
+            
+            if alterados:
+                invalidar_tabelas("produtos")
+                for row in alterados:
+                    atualizar_indices_memoria(row)
+                logger.info(f"✅ {len(alterados)} preços atualizados")
+            
+            valor_atual = float(previa["valor_total_estoque_atual"] or 0)
+            valor_novo = float(previa["valor_total_estoque_novo"] or 0)
+            return {
+                "regra": regra.model_dump(),
+                "aplicado": aplicar,
+                "produtos_no_escopo": previa["produtos_no_escopo"],
+                "produtos_alterados": len(alterados) if aplicar else previa["produtos_alterados"],
+                "valor_total_estoque_atual": valor_atual,
+                "valor_total_estoque_novo": valor_novo,
+                "variacao_valor_estoque": round(valor_novo - valor_atual, 2),
+                "margem_media_atual": float(previa["margem_media_atual"] or 0),
+                "margem_media_nova": float(previa["margem_media_nova"] or 0),
+            }
+            
         except Exception as e:
             try:
                 self.db.rollback()
@@ -107,7 +671,7 @@ class ProdutoService:
             except:
                 pass
             
-            error_msg = f"Erro ao atualizar produto {produto_id}: {str(e)}"
+            error_msg = f"Erro na reprecificação: {str(e)}"
             logger.error(error_msg)
             raise Exception(error_msg)
     
@@ -130,12 +694,15 @@ class ProdutoService:
                 })
                 
                 row = result.fetchone()
-                if row:
-                    logger.info(f"✅ Produto '{row[1]}' (ID: {row[0]}) deletado com sucesso")
-                    return True
-                else:
-                    logger.warning(f"⚠️ Produto ID {produto_id} não encontrado para deleção")
-                    return False
+            
+            if row:
+                invalidar_tabelas("produtos")
+                remover_dos_indices_memoria(row[0])
+                logger.info(f"✅ Produto '{row[1]}' (ID: {row[0]}) deletado com sucesso")
+                return True
+            else:
+                logger.warning(f"⚠️ Produto ID {produto_id} não encontrado para deleção")
+                return False
                 
         except Exception as e:
             try:
@@ -149,19 +716,38 @@ class ProdutoService:
             raise Exception(error_msg)
     
     # ✅ ADICIONAR: Método buscar_por_nome
-    def buscar_por_nome(self, nome: str) -> List[dict]:
-        """Buscar produtos por nome"""
+    def buscar_por_nome(self, nome: str, modo: str = MODO_BUSCA_SIMILARIDADE, limite: int = 20) -> List[dict]:
+        """Buscar produtos por nome
+
+        modo="similaridade" (padrão): trigramas sobre o nome sem acentos,
+        tolera erros de digitação e usa idx_produtos_nome_trgm.
+        modo="ilike": substring exata com ILIKE (comportamento anterior).
+        """
         try:
-            logger.info(f"🔍 Buscando produtos por nome: '{nome}'")
-            
-            result = self.db.execute(text("""
-                SELECT id, nome, unidade_medida, quantidade_atual, 
-                       quantidade_minima, preco_venda, ativo
-                FROM produtos 
-                WHERE nome ILIKE :nome AND ativo = true
-                ORDER BY nome
-                LIMIT 20
-            """), {"nome": f"%{nome}%"})
+            logger.info(f"🔍 Buscando produtos por nome: '{nome}' (modo={modo})")
+            
+            if modo == MODO_BUSCA_SIMILARIDADE:
+                # Limiar vale só para esta transação
+                self.db.execute(
+                    text("SELECT set_config('pg_trgm.word_similarity_threshold', :limiar, true)"),
+                    {"limiar": str(settings.BUSCA_SIMILARIDADE_MINIMA)}
+                )
+                result = self.db.execute(text(BUSCA_SIMILARIDADE_SQL), {
+                    "termo": nome.strip(),
+                    "padrao": f"%{escapar_like(normalizar_termo(nome))}%",
+                    "limite": limite
+                })
+            elif modo == MODO_BUSCA_ILIKE:
+                result = self.db.execute(text("""
+                    SELECT id, nome, unidade_medida, quantidade_atual, 
+                           quantidade_minima, preco_venda, is_active, NULL as relevancia
+                    FROM produtos_com_estoque
+                    WHERE nome ILIKE :nome AND is_active = true
+                    ORDER BY nome
+                    LIMIT :limite
+                """), {"nome": f"%{escapar_like(nome.strip())}%", "limite": limite})
+            else:
+                raise ValueError(f"Modo de busca inválido: {modo}")
             
             produtos = []
             for row in result.fetchall():
@@ -172,7 +758,8 @@ class ProdutoService:
                     "quantidade_atual": float(row[3] or 0),
                     "quantidade_minima": float(row[4] or 0),
                     "preco_venda": float(row[5] or 0),
-                    "is_active": row[6]
+                    "is_active": row[6],
+                    "relevancia": round(float(row[7]), 4) if row[7] is not None else None
                 })
             
             logger.info(f"✅ Encontrados {len(produtos)} produtos para '{nome}'")
@@ -194,10 +781,11 @@ class ProdutoService:
                 SELECT 
                     COUNT(*) as total_produtos,
                     COUNT(*) FILTER (WHERE ativo = true) as produtos_ativos,
-                    COUNT(*) FILTER (WHERE quantidade_atual <= 0) as produtos_esgotados,
-                    COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima) as produtos_estoque_baixo,
-                    SUM(quantidade_atual * preco_venda) as valor_total_estoque
-                FROM produtos
+                    COUNT(*) FILTER (WHERE e.quantidade_atual <= 0) as produtos_esgotados,
+                    COUNT(*) FILTER (WHERE e.quantidade_atual <= quantidade_minima) as produtos_estoque_baixo,
+                    SUM(e.quantidade_atual * preco_venda) as valor_total_estoque
+                FROM produtos p
+                JOIN produtos_estoque e ON e.id = p.id
             """
             
             if categoria:
@@ -217,30 +805,47 @@ class ProdutoService:
                 "valor_total_estoque": float(resumo_result[4] or 0)
             }
             
-            # Top produtos por valor de estoque
+            # Top produtos por vendas no período, lidos do rollup diário
+            # (app/services/rollups.py): o custo cresce com os dias do
+            # período, não com o número de vendas
+            # `dias` dias contando hoje
+            fim_periodo = date.today()
+            inicio_periodo = fim_periodo - timedelta(days=dias - 1)
             top_produtos_query = """
-                SELECT id, nome, quantidade_atual, preco_venda,
-                       (quantidade_atual * preco_venda) as valor_estoque
-                FROM produtos 
-                WHERE ativo = true
+                SELECT r.produto_id, p.nome,
+                       SUM(r.quantidade) as quantidade_vendida,
+                       SUM(r.valor_total) as valor_total_vendido,
+                       SUM(r.movimentacoes) as numero_transacoes
+                FROM movimentacoes_diarias r
+                JOIN produtos p ON p.id = r.produto_id
+                WHERE r.motivo = 'venda'
+                  AND r.dia >= :inicio AND r.dia <= :fim
             """
             
             if categoria:
-                top_produtos_query += " AND categoria = :categoria"
+                top_produtos_query += " AND p.categoria = :categoria"
             
-            top_produtos_query += " ORDER BY valor_estoque DESC LIMIT 10"
+            top_produtos_query += """
+                GROUP BY r.produto_id, p.nome
+                ORDER BY valor_total_vendido DESC
+                LIMIT 10
+            """
             
-            top_produtos_result = self.db.execute(text(top_produtos_query), params)
+            top_produtos_result = self.db.execute(
+                text(top_produtos_query),
+                {**params, "inicio": inicio_periodo, "fim": fim_periodo}
+            )
             top_produtos_vendas = []
             
             for row in top_produtos_result.fetchall():
+                valor_vendido = float(row[3] or 0)
                 top_produtos_vendas.append({
                     "produto_id": row[0],
                     "nome_produto": row[1],
-                    "quantidade_vendida": float(row[2]),
-                    "valor_total_vendido": float(row[4]),
-                    "numero_transacoes": 1,
-                    "ticket_medio": float(row[3])
+                    "quantidade_vendida": float(row[2] or 0),
+                    "valor_total_vendido": valor_vendido,
+                    "numero_transacoes": row[4],
+                    "ticket_medio": round(valor_vendido / row[4], 2) if row[4] else 0.0
                 })
             
             # Alertas de estoque
@@ -263,10 +868,11 @@ class ProdutoService:
             sugestoes_compra = []
             if resumo_geral["produtos_estoque_baixo"] > 0:
                 sugestoes_result = self.db.execute(text("""
-                    SELECT nome, quantidade_atual, quantidade_minima
-                    FROM produtos 
-                    WHERE ativo = true AND quantidade_atual <= quantidade_minima
-                    ORDER BY (quantidade_minima - quantidade_atual) DESC
+                    SELECT nome, e.quantidade_atual, quantidade_minima
+                    FROM produtos p
+                    JOIN produtos_estoque e ON e.id = p.id
+                    WHERE ativo = true AND e.quantidade_atual <= quantidade_minima
+                    ORDER BY (quantidade_minima - e.quantidade_atual) DESC
                     LIMIT 5
                 """))
                 
@@ -278,8 +884,6 @@ class ProdutoService:
                     })
             
             # Criar relatório
-            from datetime import date
-            
             relatorio = RelatorioProdutos(
                 resumo_geral=resumo_geral,
                 top_produtos_vendas=top_produtos_vendas,
@@ -288,8 +892,8 @@ class ProdutoService:
                 alertas_estoque=alertas_estoque,
                 sugestoes_compra=sugestoes_compra,
                 periodo={
-                    "inicio": (datetime.now() - timedelta(days=dias)).date(),
-                    "fim": date.today()
+                    "inicio": inicio_periodo,
+                    "fim": fim_periodo
                 },
                 gerado_em=datetime.now()
             )
@@ -0,0 +1,452 @@
+# ========================
+# ROLLUPS DE MOVIMENTAÇÕES (MANUTENÇÃO INCREMENTAL)
+# ========================
+# Somas de quantidade, valor_total e número de movimentações por hora e por
+# dia, em dois grãos: por produto (movimentacoes_horarias /
+# movimentacoes_diarias, chave produto + motivo + tipo) e só por motivo
+# (movimentacoes_*_motivo, todos os produtos). vendas_ultima guarda a última
+# venda de cada produto. A marca d'água é de processado_em, o horário do
+# servidor em que a movimentação foi gravada (idx_mov_processado_em): a cada
+# rodada só as movimentações com processado_em entre a marca e (agora -
+# atraso) são lidas e somadas aos buckets do seu created_at; a marca avança
+# na mesma transação. Lotes atrasados (terminal que ficou offline) entram na
+# rodada seguinte à gravação, nos dias/horas em que aconteceram. O histórico
+# nunca é relido: relatórios e métricas (giro, dias sem venda, top vendas)
+# custam dias, não transações.
+#
+# O atraso cobre transações de ingestão ainda abertas. Rodadas que somam
+# algo atualizam rollups_marca_dagua.atualizado_em (parte da versão do ETag)
+# e avisam os workers por NOTIFY. Movimentações sem processado_em (anteriores
+# à ingestão em lote) e correções manuais entram pelo reprocessamento dos dias:
+#
+#   python -m app.services.rollups --inicio 2024-01-01 --fim 2024-01-31
+
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidar_tabelas
+from app.core.config import settings
+from app.core.database_async import AsyncSessionLocal, async_engine
+from app.core.notificacoes import CANAL_ALTERACOES
+
+logger = logging.getLogger(__name__)
+
+# Marca por processado_em; "movimentacoes" era a antiga, por created_at
+MARCA_ROLLUPS = "movimentacoes_processadas"
+MARCA_ROLLUPS_ANTIGA = "movimentacoes"
+
+# Rollups lidos pelas métricas por produto (cache e NOTIFY usam estes nomes)
+TABELAS_ROLLUPS = ("movimentacoes_diarias", "vendas_ultima")
+
+TRAVA_ROLLUPS_SQL = "SELECT pg_try_advisory_xact_lock(hashtext('rollups_movimentacoes'))"
+
+# Backfill espera a rodada em andamento em vez de desistir
+ESPERAR_TRAVA_ROLLUPS_SQL = "SELECT pg_advisory_xact_lock(hashtext('rollups_movimentacoes'))"
+
+MARCA_DAGUA_SQL = "SELECT ate FROM rollups_marca_dagua WHERE nome = :nome FOR UPDATE"
+
+MARCA_ATUAL_SQL = "SELECT ate FROM rollups_marca_dagua WHERE nome = :nome"
+
+# Limite da rodada pelo relógio do banco, o mesmo que grava processado_em
+LIMITE_RODADA_SQL = "SELECT clock_timestamp() - make_interval(secs => :atraso)"
+
+# Primeira execução: começa na movimentação gravada há mais tempo (idx_mov_processado_em)
+INICIO_PROCESSADAS_SQL = "SELECT MIN(processado_em) FROM movimentacoes_estoque"
+
+# Backfill sem --inicio: dia da movimentação mais antiga (idx_mov_created_at)
+PRIMEIRO_DIA_SQL = "SELECT MIN(created_at) FROM movimentacoes_estoque"
+
+# atualizado_em só muda quando a rodada somou algo: é a versão do conteúdo
+SALVAR_MARCA_SQL = """
+    INSERT INTO rollups_marca_dagua (nome, ate, atualizado_em)
+    VALUES (:nome, :ate, CURRENT_TIMESTAMP)
+    ON CONFLICT (nome) DO UPDATE
+    SET ate = EXCLUDED.ate,
+        atualizado_em = CASE WHEN :alterou THEN EXCLUDED.atualizado_em
+                             ELSE rollups_marca_dagua.atualizado_em END
+"""
+
+MARCAR_ALTERACAO_SQL = "UPDATE rollups_marca_dagua SET atualizado_em = CURRENT_TIMESTAMP WHERE nome = :nome"
+
+REMOVER_MARCA_SQL = "DELETE FROM rollups_marca_dagua WHERE nome = :nome"
+
+NOTIFICAR_SQL = "SELECT pg_notify(:canal, :tabela)"
+
+
+def _somar(tabela: str) -> str:
+    """SET do ON CONFLICT: soma o incremento ao que o rollup já tem"""
+    return ", ".join(
+        f"{coluna} = {tabela}.{coluna} + EXCLUDED.{coluna}"
+        for coluna in ("quantidade", "valor_total", "movimentacoes")
+    )
+
+
+def _incrementar_sql(filtro: str) -> str:
+    """Uma leitura das movimentações selecionadas por `filtro` alimenta todos os rollups"""
+    return f"""
+    WITH novas AS MATERIALIZED (
+        SELECT produto_id, motivo, tipo, created_at, quantidade, COALESCE(valor_total, 0) as valor_total
+        FROM movimentacoes_estoque
+        WHERE {filtro}
+    ),
+    horarias AS (
+        INSERT INTO movimentacoes_horarias (hora, produto_id, motivo, tipo, quantidade, valor_total, movimentacoes)
+        SELECT date_trunc('hour', created_at), produto_id, motivo, tipo, SUM(quantidade), SUM(valor_total), COUNT(*)
+        FROM novas
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (hora, produto_id, motivo, tipo) DO UPDATE
+        SET {_somar("movimentacoes_horarias")}
+        RETURNING 1
+    ),
+    diarias AS (
+        INSERT INTO movimentacoes_diarias (dia, produto_id, motivo, tipo, quantidade, valor_total, movimentacoes)
+        SELECT created_at::date, produto_id, motivo, tipo, SUM(quantidade), SUM(valor_total), COUNT(*)
+        FROM novas
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (dia, produto_id, motivo, tipo) DO UPDATE
+        SET {_somar("movimentacoes_diarias")}
+        RETURNING 1
+    ),
+    horarias_motivo AS (
+        INSERT INTO movimentacoes_horarias_motivo (hora, motivo, tipo, quantidade, valor_total, movimentacoes)
+        SELECT date_trunc('hour', created_at), motivo, tipo, SUM(quantidade), SUM(valor_total), COUNT(*)
+        FROM novas
+        GROUP BY 1, 2, 3
+        ON CONFLICT (hora, motivo, tipo) DO UPDATE
+        SET {_somar("movimentacoes_horarias_motivo")}
+        RETURNING 1
+    ),
+    diarias_motivo AS (
+        INSERT INTO movimentacoes_diarias_motivo (dia, motivo, tipo, quantidade, valor_total, movimentacoes)
+        SELECT created_at::date, motivo, tipo, SUM(quantidade), SUM(valor_total), COUNT(*)
+        FROM novas
+        GROUP BY 1, 2, 3
+        ON CONFLICT (dia, motivo, tipo) DO UPDATE
+        SET {_somar("movimentacoes_diarias_motivo")}
+        RETURNING 1
+    ),
+    vendas AS (
+        INSERT INTO vendas_ultima (produto_id, ultima_venda)
+        SELECT produto_id, MAX(created_at)
+        FROM novas
+        WHERE motivo = 'venda'
+        GROUP BY produto_id
+        ON CONFLICT (produto_id) DO UPDATE
+        SET ultima_venda = GREATEST(vendas_ultima.ultima_venda, EXCLUDED.ultima_venda)
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM novas) as movimentacoes,
+        (SELECT COUNT(*) FROM horarias) as linhas_horarias,
+        (SELECT COUNT(*) FROM diarias) as linhas_diarias,
+        (SELECT COUNT(*) FROM horarias_motivo) + (SELECT COUNT(*) FROM diarias_motivo) as linhas_motivo,
+        (SELECT COUNT(*) FROM vendas) as produtos_vendidos
+"""
+
+
+# Rodada: as gravadas desde a marca, em qualquer dia
+INCREMENTAR_ROLLUPS_SQL = _incrementar_sql("processado_em >= :de AND processado_em < :ate")
+
+# Backfill de um dia: as já cobertas pela marca (as demais ficam com a rodada)
+REPROCESSAR_ROLLUPS_SQL = _incrementar_sql(
+    "created_at >= :de AND created_at < :ate AND (processado_em < :marca OR processado_em IS NULL)"
+)
+
+# Backfill: zera os buckets do intervalo antes de somá-lo de novo
+# (vendas_ultima não precisa, o GREATEST já é idempotente)
+LIMPAR_ROLLUPS_SQL = """
+    WITH horarias AS (
+        DELETE FROM movimentacoes_horarias WHERE hora >= :hora_de AND hora < :hora_ate RETURNING 1
+    ),
+    diarias AS (
+        DELETE FROM movimentacoes_diarias WHERE dia >= :dia_de AND dia < :dia_ate RETURNING 1
+    ),
+    horarias_motivo AS (
+        DELETE FROM movimentacoes_horarias_motivo WHERE hora >= :hora_de AND hora < :hora_ate RETURNING 1
+    ),
+    diarias_motivo AS (
+        DELETE FROM movimentacoes_diarias_motivo WHERE dia >= :dia_de AND dia < :dia_ate RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM horarias) + (SELECT COUNT(*) FROM diarias)
+         + (SELECT COUNT(*) FROM horarias_motivo) + (SELECT COUNT(*) FROM diarias_motivo)
+"""
+
+# Resumo por período: sem produto, lê o grão por motivo (poucas linhas por dia/hora)
+TABELAS_RESUMO = {
+    ("dia", False): ("movimentacoes_diarias_motivo", "dia"),
+    ("dia", True): ("movimentacoes_diarias", "dia"),
+    ("hora", False): ("movimentacoes_horarias_motivo", "hora"),
+    ("hora", True): ("movimentacoes_horarias", "hora"),
+}
+
+
+async def resumo_movimentacoes(
+    db: AsyncSession,
+    inicio: date,
+    fim: date,
+    granularidade: str = "dia",
+    produto_id: Optional[int] = None,
+    motivo: Optional[str] = None
+) -> Dict[str, Any]:
+    """Quantidade, valor e movimentações por período (dia ou hora), motivo e tipo
+
+    Lê só os rollups: o custo depende do número de períodos, não de
+    transações. `atualizado_ate` é a marca d'água (movimentações gravadas
+    depois dela ainda não estão somadas).
+    """
+    tabela, coluna = TABELAS_RESUMO[(granularidade, produto_id is not None)]
+    if granularidade == "dia":
+        de, ate = inicio, fim + timedelta(days=1)
+    else:
+        de, ate = datetime.combine(inicio, time.min), datetime.combine(fim + timedelta(days=1), time.min)
+
+    filtros = [f"{coluna} >= :de", f"{coluna} < :ate"]
+    params: Dict[str, Any] = {"de": de, "ate": ate}
+    if produto_id is not None:
+        filtros.append("produto_id = :produto_id")
+        params["produto_id"] = produto_id
+    if motivo:
+        filtros.append("motivo = :motivo")
+        params["motivo"] = motivo
+
+    rows = (await db.execute(text(f"""
+        SELECT {coluna}::timestamp as periodo, motivo, tipo,
+               SUM(quantidade) as quantidade,
+               SUM(valor_total) as valor_total,
+               SUM(movimentacoes) as movimentacoes
+        FROM {tabela}
+        WHERE {" AND ".join(filtros)}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+    """), params)).mappings().all()
+    marca = (await db.execute(text(MARCA_ATUAL_SQL), {"nome": MARCA_ROLLUPS})).scalar()
+
+    return {
+        "granularidade": granularidade,
+        "inicio": inicio,
+        "fim": fim,
+        "produto_id": produto_id,
+        "atualizado_ate": marca,
+        "periodos": [
+            {
+                "periodo": row["periodo"],
+                "motivo": row["motivo"],
+                "tipo": row["tipo"],
+                "quantidade": float(row["quantidade"]),
+                "valor_total": float(row["valor_total"]),
+                "movimentacoes": int(row["movimentacoes"]),
+            }
+            for row in rows
+        ],
+    }
+
+
+class RollupsMovimentacoes:
+    """Tarefa em background que mantém os rollups a partir da marca d'água"""
+
+    def __init__(self, intervalo: float, atraso: float, janela_maxima: float):
+        self.intervalo = intervalo
+        self.atraso = timedelta(seconds=atraso)
+        self.janela_maxima = timedelta(seconds=janela_maxima)
+        self._tarefa: Optional[asyncio.Task] = None
+        self.rodadas = 0
+        self.movimentacoes_processadas = 0
+        self.marca_dagua: Optional[datetime] = None
+        self.dias_reprocessados = 0
+        self.ultimo_erro: Optional[str] = None
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def processar(self) -> Dict[str, Any]:
+        """Uma rodada: soma as gravadas em [marca, min(marca + janela_maxima, agora - atraso))
+
+        `pendente` indica que ainda há histórico a recuperar (próxima rodada sem espera).
+        """
+        resultado: Dict[str, Any] = {"movimentacoes": 0}
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                obteve = (await db.execute(text(TRAVA_ROLLUPS_SQL))).scalar()
+                if not obteve:
+                    return {"movimentacoes": 0, "pendente": False}
+
+                limite = (await db.execute(
+                    text(LIMITE_RODADA_SQL), {"atraso": self.atraso.total_seconds()}
+                )).scalar()
+                de = (await db.execute(text(MARCA_DAGUA_SQL), {"nome": MARCA_ROLLUPS})).scalar()
+                antiga = (await db.execute(text(MARCA_ATUAL_SQL), {"nome": MARCA_ROLLUPS_ANTIGA})).scalar()
+                if de is None:
+                    if antiga is None:
+                        de = (await db.execute(text(INICIO_PROCESSADAS_SQL))).scalar()
+                    if de is None:
+                        # Nada gravado ainda, ou troca da marca antiga: começa agora
+                        await db.execute(text(SALVAR_MARCA_SQL), {
+                            "nome": MARCA_ROLLUPS, "ate": limite, "alterou": True
+                        })
+                        self.marca_dagua = de = limite
+
+                ate = max(de, min(de + self.janela_maxima, limite))
+                if de < ate:
+                    resultado = dict((await db.execute(
+                        text(INCREMENTAR_ROLLUPS_SQL), {"de": de, "ate": ate}
+                    )).mappings().one())
+                    alterou = resultado["movimentacoes"] > 0
+                    await db.execute(text(SALVAR_MARCA_SQL), {
+                        "nome": MARCA_ROLLUPS, "ate": ate, "alterou": alterou
+                    })
+                    if alterou:
+                        await self._notificar(db)
+                    self.marca_dagua = ate
+
+        if resultado["movimentacoes"]:
+            invalidar_tabelas(*TABELAS_ROLLUPS)
+        if antiga is not None:
+            await self._migrar_marca_antiga(antiga)
+        return {**resultado, "pendente": ate < limite}
+
+    async def _migrar_marca_antiga(self, antiga: datetime) -> None:
+        """Troca da marca por created_at pela de processado_em
+
+        A nova marca começa na rodada atual; os dias desde a antiga são
+        refeitos pelo backfill e só então a marca antiga é removida (se o
+        processo cair no meio, a próxima rodada refaz). Lotes atrasados
+        anteriores à marca antiga continuam pedindo backfill manual.
+        """
+        logger.info(f"📊 Rollups: trocando a marca por created_at ({antiga}) pela de processado_em")
+        # Um dia antes: a marca antiga volta em UTC
+        await self.reprocessar(antiga.date() - timedelta(days=1), date.today())
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                await db.execute(text(REMOVER_MARCA_SQL), {"nome": MARCA_ROLLUPS_ANTIGA})
+
+    async def _notificar(self, db: AsyncSession) -> None:
+        """NOTIFY dos rollups alterados (entregue no COMMIT): cada worker invalida o cache"""
+        for tabela in TABELAS_ROLLUPS:
+            await db.execute(text(NOTIFICAR_SQL), {"canal": CANAL_ALTERACOES, "tabela": tabela})
+
+    async def reprocessar(self, inicio: Optional[date], fim: date) -> Dict[str, Any]:
+        """Backfill: recalcula os rollups dos dias `inicio`..`fim` (inclusive)
+
+        Um dia por transação: apaga os buckets do dia e soma de novo as
+        movimentações dele já cobertas pela marca d'água (processado_em antes
+        dela ou ausente), recuperando as que as rodadas não viram. As gravadas
+        depois da marca ficam com a tarefa (seriam somadas duas vezes). Sem
+        `inicio`, começa na movimentação mais antiga.
+        """
+        totais = {"dias": 0, "movimentacoes": 0, "linhas_removidas": 0}
+        if inicio is None:
+            async with AsyncSessionLocal() as db:
+                primeiro = (await db.execute(text(PRIMEIRO_DIA_SQL))).scalar()
+            if primeiro is None:
+                return totais
+            inicio = primeiro.date()
+
+        dia = inicio
+        while dia <= fim:
+            de = datetime.combine(dia, time.min)
+            ate = de + timedelta(days=1)
+            async with AsyncSessionLocal() as db:
+                async with db.begin():
+                    await db.execute(text(ESPERAR_TRAVA_ROLLUPS_SQL))
+                    marca = (await db.execute(text(MARCA_DAGUA_SQL), {"nome": MARCA_ROLLUPS})).scalar()
+
+                    removidas = (await db.execute(text(LIMPAR_ROLLUPS_SQL), {
+                        "hora_de": de,
+                        "hora_ate": ate,
+                        "dia_de": dia,
+                        "dia_ate": dia + timedelta(days=1),
+                    })).scalar()
+                    resultado = (await db.execute(
+                        text(REPROCESSAR_ROLLUPS_SQL), {"de": de, "ate": ate, "marca": marca}
+                    )).mappings().one()
+                    await db.execute(text(MARCAR_ALTERACAO_SQL), {"nome": MARCA_ROLLUPS})
+                    await self._notificar(db)
+
+            totais["dias"] += 1
+            totais["movimentacoes"] += resultado["movimentacoes"]
+            totais["linhas_removidas"] += removidas
+            self.dias_reprocessados += 1
+            logger.info(f"📊 Rollups de {dia} reprocessados: {resultado['movimentacoes']} movimentações")
+            dia += timedelta(days=1)
+
+        if totais["dias"]:
+            invalidar_tabelas(*TABELAS_ROLLUPS)
+        return totais
+
+    async def _executar(self) -> None:
+        while True:
+            pendente = False
+            try:
+                resultado = await self.processar()
+                self.rodadas += 1
+                self.movimentacoes_processadas += resultado["movimentacoes"]
+                self.ultimo_erro = None
+                pendente = resultado["pendente"]
+                if resultado["movimentacoes"]:
+                    logger.debug(
+                        f"Rollups: {resultado['movimentacoes']} movimentações até {self.marca_dagua}"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ultimo_erro = str(e)
+                logger.error(f"Erro ao atualizar rollups de movimentações: {e}")
+            if not pendente:
+                await asyncio.sleep(self.intervalo)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "intervalo_segundos": self.intervalo,
+            "atraso_segundos": self.atraso.total_seconds(),
+            "rodadas": self.rodadas,
+            "movimentacoes_processadas": self.movimentacoes_processadas,
+            "marca_dagua": self.marca_dagua.isoformat() if self.marca_dagua else None,
+            "dias_reprocessados": self.dias_reprocessados,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+
+rollups_movimentacoes = RollupsMovimentacoes(
+    intervalo=settings.ROLLUPS_INTERVALO,
+    atraso=settings.ROLLUPS_ATRASO,
+    janela_maxima=settings.ROLLUPS_JANELA_MAXIMA
+)
+
+
+async def _backfill(inicio: Optional[date], fim: date) -> Dict[str, Any]:
+    try:
+        return await rollups_movimentacoes.reprocessar(inicio, fim)
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill dos rollups de movimentações")
+    parser.add_argument("--inicio", type=date.fromisoformat, help="Primeiro dia (padrão: movimentação mais antiga)")
+    parser.add_argument("--fim", type=date.fromisoformat, default=date.today(), help="Último dia, inclusive (padrão: hoje)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    totais = asyncio.run(_backfill(args.inicio, args.fim))
+    print(f"✅ {totais['dias']} dias reprocessados, {totais['movimentacoes']:,} movimentações")
+
+
+if __name__ == "__main__":
+    main()
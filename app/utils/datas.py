@@ -0,0 +1,8 @@
+from datetime import datetime
+
+
+def momento_local(momento: datetime) -> datetime:
+    """Colunas TIMESTAMP são sem fuso: datas com fuso são convertidas para o horário local"""
+    if momento.tzinfo is not None:
+        return momento.astimezone().replace(tzinfo=None)
+    return momento
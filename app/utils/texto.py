@@ -0,0 +1,16 @@
+import re
+import unicodedata
+from typing import List
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar_termo(termo: str) -> str:
+    """Minúsculas sem acentos (mesma normalização de f_unaccent(lower(...)))"""
+    decomposto = unicodedata.normalize("NFKD", termo.strip().lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def palavras(termo: str) -> List[str]:
+    """Palavras do termo normalizado, sem pontuação ("Pão-de-Queijo" -> pao, de, queijo)"""
+    return [p for p in _SEPARADORES.split(normalizar_termo(termo)) if p]
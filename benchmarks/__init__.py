@@ -0,0 +1 @@
+# Benchmarks de performance (executar com: python -m benchmarks.<modulo>)
@@ -0,0 +1,136 @@
+# ========================
+# BENCHMARK - ProdutoService.buscar_por_nome
+# ========================
+# Compara a busca antiga (nome ILIKE '%termo%', scan sequencial) com a
+# busca por trigramas (BUSCA_SIMILARIDADE_SQL + idx_produtos_nome_trgm)
+# sobre um catálogo sintético com nomes acentuados.
+#
+# Uso:  python -m benchmarks.bench_busca_produtos --produtos 200000 --iteracoes 30
+#
+# Requer as extensões pg_trgm/unaccent e a função f_unaccent de
+# create_advanced_tables.sql. A tabela temporária `produtos` sombreia a
+# real apenas nesta sessão.
+
+import argparse
+import statistics
+import time
+
+from app.core.config import settings
+from app.core.pool import get_db_connection
+from app.services.produtos import BUSCA_SIMILARIDADE_SQL, escapar_like, normalizar_termo
+
+BUSCA_ILIKE_SQL = """
+    SELECT id, nome, unidade_medida, quantidade_atual,
+           quantidade_minima, preco_venda, is_active, NULL as relevancia
+    FROM produtos
+    WHERE nome ILIKE %(nome)s AND is_active = true
+    ORDER BY nome
+    LIMIT 20
+"""
+
+# Termos digitados no PDV: exatos, sem acento, com erro de digitação e curtos
+TERMOS = ["Pão de Queijo", "pao de queijo", "pao de qeijo", "croissant", "crosant", "bolo", "pã"]
+
+
+def _sql_psycopg2(sql: str) -> str:
+    """Converter parâmetros :nome (SQLAlchemy) para %(nome)s (psycopg2)"""
+    sql = sql.replace("%", "%%")
+    for nome in ("termo", "padrao", "limite"):
+        sql = sql.replace(f":{nome}", f"%({nome})s")
+    return sql
+
+
+def criar_catalogo(cursor, total: int) -> None:
+    """Criar tabela temporária `produtos` com nomes de padaria acentuados"""
+    cursor.execute("""
+        CREATE TEMP TABLE produtos (
+            id SERIAL PRIMARY KEY,
+            nome VARCHAR(255) NOT NULL,
+            unidade_medida VARCHAR(10) DEFAULT 'un',
+            quantidade_atual NUMERIC(12,3) DEFAULT 0,
+            quantidade_minima NUMERIC(12,3) DEFAULT 0,
+            preco_venda NUMERIC(10,2) DEFAULT 0,
+            is_active BOOLEAN DEFAULT TRUE
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO produtos (nome, quantidade_atual, preco_venda)
+        SELECT
+            (ARRAY['Pão de Queijo','Pão Francês','Croissant','Bolo de Cenoura','Pão de Mel',
+                   'Sonho de Creme','Café Expresso','Torta de Limão','Brigadeiro','Coxinha'])[1 + g %% 10]
+                || ' ' || (ARRAY['Tradicional','Integral','Recheado','Mini','Família','Artesanal'])[1 + (g / 10) %% 6]
+                || ' ' || g,
+            (random() * 100)::numeric(12,3),
+            round((0.5 + random() * 40)::numeric, 2)
+        FROM generate_series(1, %s) g
+    """, (total,))
+    cursor.execute(
+        "CREATE INDEX ON produtos USING GIN (f_unaccent(lower(nome)) gin_trgm_ops) WHERE is_active = true"
+    )
+    # As consultas leem o estoque efetivo; sem deltas no catálogo sintético
+    cursor.execute("CREATE TEMP VIEW produtos_com_estoque AS SELECT * FROM produtos")
+    cursor.execute("ANALYZE produtos")
+
+
+def medir(cursor, sql: str, params_por_termo, iteracoes: int) -> dict:
+    amostras = []
+    resultados = {}
+    for _ in range(iteracoes):
+        for termo, params in params_por_termo:
+            inicio = time.perf_counter()
+            cursor.execute(sql, params)
+            linhas = cursor.fetchall()
+            amostras.append((time.perf_counter() - inicio) * 1000)
+            resultados[termo] = len(linhas)
+
+    amostras.sort()
+    return {
+        "mediana_ms": statistics.median(amostras),
+        "p95_ms": amostras[min(len(amostras) - 1, int(len(amostras) * 0.95))],
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca de produtos por nome")
+    parser.add_argument("--produtos", type=int, default=200_000)
+    parser.add_argument("--iteracoes", type=int, default=30)
+    args = parser.parse_args()
+
+    params_ilike = [(t, {"nome": f"%{escapar_like(t)}%"}) for t in TERMOS]
+    params_trgm = [
+        (t, {"termo": t, "padrao": f"%{escapar_like(normalizar_termo(t))}%", "limite": 20})
+        for t in TERMOS
+    ]
+    sql_trgm = _sql_psycopg2(BUSCA_SIMILARIDADE_SQL)
+
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        print(f"📦 Criando catálogo sintético com {args.produtos:,} produtos...")
+        criar_catalogo(cursor, args.produtos)
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+            (str(settings.BUSCA_SIMILARIDADE_MINIMA),)
+        )
+
+        # Aquecer cache de páginas
+        medir(cursor, BUSCA_ILIKE_SQL, params_ilike, 1)
+        medir(cursor, sql_trgm, params_trgm, 1)
+
+        ilike = medir(cursor, BUSCA_ILIKE_SQL, params_ilike, args.iteracoes)
+        trgm = medir(cursor, sql_trgm, params_trgm, args.iteracoes)
+
+        conn.rollback()
+
+    print(f"\n{'variante':<14}{'mediana ms':>12}{'p95 ms':>10}")
+    for nome, r in (("ILIKE", ilike), ("trigramas", trgm)):
+        print(f"{nome:<14}{r['mediana_ms']:>12.2f}{r['p95_ms']:>10.2f}")
+
+    print(f"\n{'termo':<18}{'ILIKE':>8}{'trigramas':>11}")
+    for termo in TERMOS:
+        print(f"{termo:<18}{ilike['resultados'][termo]:>8}{trgm['resultados'][termo]:>11}")
+
+    print(f"\n✅ Ganho na mediana: {ilike['mediana_ms'] / trgm['mediana_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# ========================
+# BENCHMARK - /api/v1/produtos/barcode/{ean}
+# ========================
+# Mede a latência da leitura de código de barras no mapa em memória
+# (MapaCodigoBarras.obter) e, com --banco, a consulta pelo índice único
+# idx_produtos_codigo_barras em uma tabela temporária, para comparação.
+#
+# Uso:  python -m benchmarks.bench_codigo_barras --produtos 100000 --leituras 200000 --banco
+#
+# Sai com código 1 se o p99 do mapa em memória passar de --alvo-p99-ms.
+
+import argparse
+import random
+import sys
+import time
+
+from app.services.codigo_barras import MapaCodigoBarras
+
+
+def codigos_sinteticos(total: int):
+    """EAN-13 sintéticos (prefixo 789 = Brasil), únicos"""
+    return [f"789{i:09d}{i % 10}" for i in range(total)]
+
+
+def percentis(amostras_ms):
+    amostras_ms.sort()
+    def p(q):
+        return amostras_ms[min(len(amostras_ms) - 1, int(len(amostras_ms) * q))]
+    return {"p50_ms": p(0.50), "p99_ms": p(0.99), "max_ms": amostras_ms[-1]}
+
+
+def medir_memoria(total: int, leituras: int) -> dict:
+    codigos = codigos_sinteticos(total)
+    mapa = MapaCodigoBarras(ressincronizacao=float("inf"), sobreposicao=0, recarga_completa=float("inf"))
+    mapa.carregar([
+        {"id": i, "nome": f"Produto {i}", "codigo_barras": codigo, "preco_venda": 5.0}
+        for i, codigo in enumerate(codigos)
+    ])
+
+    # 95% de leituras existentes, 5% de códigos desconhecidos
+    sorteio = [
+        random.choice(codigos) if random.random() < 0.95 else f"000{random.randint(0, 10**9):010d}"
+        for _ in range(leituras)
+    ]
+    amostras = []
+    for codigo in sorteio:
+        inicio = time.perf_counter()
+        mapa.obter(codigo)
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return percentis(amostras)
+
+
+def medir_banco(total: int, leituras: int) -> dict:
+    from app.core.pool import get_db_connection
+
+    codigos = codigos_sinteticos(total)
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE produtos (
+                id SERIAL PRIMARY KEY,
+                nome VARCHAR(255) NOT NULL,
+                codigo_barras VARCHAR(14),
+                preco_venda NUMERIC(10,2) DEFAULT 0,
+                is_active BOOLEAN DEFAULT TRUE
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO produtos (nome, codigo_barras, preco_venda)
+            SELECT 'Produto ' || g, '789' || lpad(g::text, 9, '0') || (g %% 10), 5
+            FROM generate_series(0, %s - 1) g
+        """, (total,))
+        cursor.execute(
+            "CREATE UNIQUE INDEX ON produtos(codigo_barras) WHERE codigo_barras IS NOT NULL"
+        )
+        cursor.execute("ANALYZE produtos")
+
+        amostras = []
+        for _ in range(leituras):
+            inicio = time.perf_counter()
+            cursor.execute(
+                "SELECT id, nome, codigo_barras, preco_venda FROM produtos "
+                "WHERE codigo_barras = %s AND is_active = true",
+                (random.choice(codigos),)
+            )
+            cursor.fetchone()
+            amostras.append((time.perf_counter() - inicio) * 1000)
+
+        conn.rollback()
+    return percentis(amostras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da leitura de código de barras")
+    parser.add_argument("--produtos", type=int, default=100_000)
+    parser.add_argument("--leituras", type=int, default=200_000)
+    parser.add_argument("--banco", action="store_true", help="Medir também a consulta no PostgreSQL")
+    parser.add_argument("--alvo-p99-ms", type=float, default=0.05)
+    args = parser.parse_args()
+
+    resultados = {"mapa em memória": medir_memoria(args.produtos, args.leituras)}
+    if args.banco:
+        resultados["índice único (PG)"] = medir_banco(args.produtos, min(args.leituras, 20_000))
+
+    print(f"\n{'variante':<20}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for nome, r in resultados.items():
+        print(f"{nome:<20}{r['p50_ms']:>10.4f}{r['p99_ms']:>10.4f}{r['max_ms']:>10.3f}")
+
+    p99 = resultados["mapa em memória"]["p99_ms"]
+    if p99 > args.alvo_p99_ms:
+        print(f"\n❌ p99 do mapa ({p99:.4f} ms) acima do alvo de {args.alvo_p99_ms} ms")
+        sys.exit(1)
+    print(f"\n✅ p99 do mapa ({p99:.4f} ms) dentro do alvo de {args.alvo_p99_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
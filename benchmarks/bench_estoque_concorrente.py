@@ -0,0 +1,162 @@
+# ========================
+# BENCHMARK - ESTOQUE DE PRODUTO MUITO VENDIDO SOB CONCORRÊNCIA
+# ========================
+# N terminais vendem o mesmo produto ao mesmo tempo, uma transação por
+# venda. Compara:
+#   direto  - UPDATE produtos SET quantidade_atual = quantidade_atual - 1
+#             (todos disputam a trava da mesma linha)
+#   deltas  - INSERT em estoque_deltas (sem disputa), consolidado ao final
+#             com CONSOLIDAR_DELTAS_SQL
+#
+# Uso:  python -m benchmarks.bench_estoque_concorrente --terminais 1,2,4,8,16 --segundos 5
+#
+# Usa tabelas próprias (bench_*) em vez de produtos/estoque_deltas, criadas
+# e removidas pelo benchmark, pois os terminais precisam de conexões distintas.
+
+import argparse
+import os
+import threading
+import time
+
+import psycopg2
+
+from app.core.config import settings
+from app.services.estoque_deltas import CONSOLIDAR_DELTAS_SQL
+
+SUFIXO = f"_{os.getpid()}"
+TABELA_PRODUTOS = f"bench_produtos{SUFIXO}"
+TABELA_DELTAS = f"bench_estoque_deltas{SUFIXO}"
+
+VENDA_SQL = {
+    "direto": f"UPDATE {TABELA_PRODUTOS} SET quantidade_atual = quantidade_atual - 1 WHERE id = 1",
+    "deltas": f"INSERT INTO {TABELA_DELTAS} (produto_id, delta) VALUES (1, -1)",
+}
+
+
+def conectar():
+    return psycopg2.connect(
+        dbname=settings.DB_NAME, user=settings.DB_USER, password=settings.DB_PASSWORD,
+        host=settings.DB_HOST, port=settings.DB_PORT
+    )
+
+
+def preparar(cursor, estoque_inicial: int) -> None:
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {TABELA_PRODUTOS} (
+            id INTEGER PRIMARY KEY,
+            quantidade_atual NUMERIC(12,3),
+            updated_at TIMESTAMP
+        )
+    """)
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {TABELA_DELTAS} (
+            id BIGSERIAL PRIMARY KEY,
+            produto_id INTEGER NOT NULL,
+            delta NUMERIC(12,3) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(f"CREATE INDEX ON {TABELA_DELTAS}(produto_id)")
+    cursor.execute(f"INSERT INTO {TABELA_PRODUTOS} VALUES (1, %s, now())", (estoque_inicial,))
+
+
+def remover(cursor) -> None:
+    cursor.execute(f"DROP TABLE IF EXISTS {TABELA_PRODUTOS}, {TABELA_DELTAS}")
+
+
+def estoque_efetivo(cursor) -> float:
+    cursor.execute(f"""
+        SELECT p.quantidade_atual + COALESCE((SELECT SUM(delta) FROM {TABELA_DELTAS}), 0)
+        FROM {TABELA_PRODUTOS} p WHERE id = 1
+    """)
+    return float(cursor.fetchone()[0])
+
+
+def rodar(modo: str, terminais: int, segundos: float) -> dict:
+    """Cada terminal vende em loop até o prazo; retorna vendas/s e latência média"""
+    conexoes = [conectar() for _ in range(terminais)]
+    barreira = threading.Barrier(terminais + 1)
+    contagens = [0] * terminais
+    tempos = [0.0] * terminais
+    fim = [0.0]
+
+    def terminal(i: int):
+        conn = conexoes[i]
+        with conn.cursor() as cursor:
+            barreira.wait()
+            while time.perf_counter() < fim[0]:
+                inicio = time.perf_counter()
+                cursor.execute(VENDA_SQL[modo])
+                conn.commit()
+                tempos[i] += time.perf_counter() - inicio
+                contagens[i] += 1
+
+    threads = [threading.Thread(target=terminal, args=(i,)) for i in range(terminais)]
+    for t in threads:
+        t.start()
+    fim[0] = time.perf_counter() + segundos
+    barreira.wait()
+    for t in threads:
+        t.join()
+    for conn in conexoes:
+        conn.close()
+
+    vendas = sum(contagens)
+    return {
+        "vendas": vendas,
+        "vendas_por_segundo": vendas / segundos,
+        "latencia_media_ms": (sum(tempos) / vendas * 1000) if vendas else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de estoque sob concorrência")
+    parser.add_argument("--terminais", default="1,2,4,8,16")
+    parser.add_argument("--segundos", type=float, default=5)
+    args = parser.parse_args()
+
+    niveis = [int(n) for n in args.terminais.split(",")]
+    estoque_inicial = 10_000_000
+
+    admin = conectar()
+    admin.autocommit = True
+    resultados = {}
+    try:
+        with admin.cursor() as cursor:
+            remover(cursor)
+            preparar(cursor, estoque_inicial)
+
+            for modo in ("direto", "deltas"):
+                for n in niveis:
+                    antes = estoque_efetivo(cursor)
+                    r = rodar(modo, n, args.segundos)
+                    if modo == "deltas":
+                        # Consolidação no formato real, sobre as tabelas do benchmark
+                        cursor.execute(
+                            CONSOLIDAR_DELTAS_SQL
+                            .replace("estoque_deltas", TABELA_DELTAS)
+                            .replace("UPDATE produtos", f"UPDATE {TABELA_PRODUTOS}")
+                        )
+                    r["saldo_correto"] = estoque_efetivo(cursor) == antes - r["vendas"]
+                    resultados[(modo, n)] = r
+                    print(f"  {modo:<7} {n:>3} terminais: {r['vendas_por_segundo']:>9.0f} vendas/s")
+    finally:
+        with admin.cursor() as cursor:
+            remover(cursor)
+        admin.close()
+
+    print(f"\n{'terminais':>10}{'direto/s':>12}{'deltas/s':>12}{'ganho':>8}{'lat. direto ms':>16}{'lat. deltas ms':>16}")
+    for n in niveis:
+        d, x = resultados[("direto", n)], resultados[("deltas", n)]
+        ganho = x["vendas_por_segundo"] / d["vendas_por_segundo"] if d["vendas_por_segundo"] else 0
+        print(f"{n:>10}{d['vendas_por_segundo']:>12.0f}{x['vendas_por_segundo']:>12.0f}{ganho:>7.2f}x"
+              f"{d['latencia_media_ms']:>16.3f}{x['latencia_media_ms']:>16.3f}")
+
+    if not all(r["saldo_correto"] for r in resultados.values()):
+        print("\n❌ Saldo final divergente em alguma rodada")
+    else:
+        print("\n✅ Saldo final exato em todas as rodadas")
+
+
+if __name__ == "__main__":
+    main()
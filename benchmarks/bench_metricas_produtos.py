@@ -0,0 +1,201 @@
+# ========================
+# BENCHMARK - /api/v1/analytics/produtos-real
+# ========================
+# Compara o caminho antigo (métricas em expressões CASE no SQL + um
+# MetricaProduto por linha com Decimal(str(...))) com o motor vetorizado
+# (colunas base + NumPy + validação em bloco) em catálogos de vários tamanhos.
+#
+# Uso:  python -m benchmarks.bench_metricas_produtos --produtos 10000,100000,1000000 --iteracoes 5
+#
+# Reaproveita o catálogo sintético de bench_resumo_real (tabela temporária
+# `produtos`, que sombreia a real apenas nesta sessão). Os rollups lidos
+# pelo motor vetorizado também são sombreados, com ~30 dias de vendas.
+
+import argparse
+import statistics
+import time
+from decimal import Decimal
+
+from app.core.pool import get_db_connection
+from app.schemas.analytics_produtos import MetricaProduto
+from app.services.metricas_vetorizadas import (
+    COLUNAS_EXATAS, COLUNAS_PRODUTOS_SQL, calcular_metricas, colunas_de_linhas, montar_metricas
+)
+from benchmarks.bench_resumo_real import criar_catalogo
+
+
+def criar_rollups(cursor) -> None:
+    """Tabelas temporárias movimentacoes_diarias / vendas_ultima com vendas sintéticas"""
+    cursor.execute("""
+        CREATE TEMP TABLE movimentacoes_diarias (
+            dia DATE, produto_id INTEGER, motivo VARCHAR(50), tipo VARCHAR(20),
+            quantidade NUMERIC(14,3), valor_total NUMERIC(14,2), movimentacoes INTEGER,
+            PRIMARY KEY (dia, produto_id, motivo, tipo)
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO movimentacoes_diarias
+        SELECT CURRENT_DATE - d, p.id, 'venda', 'saida', (random() * 20)::numeric(14,3), 0, 1
+        FROM produtos p
+        CROSS JOIN generate_series(0, 29) d
+        WHERE (p.id + d) % 3 = 0
+    """)
+    cursor.execute("""
+        CREATE TEMP TABLE vendas_ultima AS
+        SELECT produto_id, MAX(dia)::timestamp as ultima_venda
+        FROM movimentacoes_diarias
+        GROUP BY produto_id
+    """)
+    cursor.execute("ANALYZE movimentacoes_diarias")
+
+METRICAS_ANTIGAS_SQL = """
+    SELECT
+        id, nome, categoria, quantidade_atual, quantidade_minima, preco_venda, preco_custo,
+        (quantidade_atual * preco_venda) as valor_estoque_total,
+        CASE WHEN preco_custo > 0 AND preco_venda > preco_custo
+             THEN (preco_venda - preco_custo) ELSE NULL END as margem_bruta,
+        CASE WHEN preco_custo > 0 AND preco_venda > preco_custo
+             THEN ((preco_venda - preco_custo) / preco_venda * 100) ELSE NULL END as margem_percentual,
+        CASE WHEN quantidade_atual <= 0 THEN 'sem_estoque'
+             WHEN quantidade_atual <= quantidade_minima THEN 'baixo'
+             WHEN quantidade_atual <= (quantidade_minima * 2) THEN 'atencao'
+             ELSE 'normal' END as status_estoque,
+        CASE WHEN quantidade_atual <= quantidade_minima THEN true ELSE false END as precisa_reposicao,
+        CASE WHEN quantidade_atual <= 0 THEN 5
+             WHEN quantidade_atual <= quantidade_minima THEN 4
+             WHEN quantidade_atual <= (quantidade_minima * 1.5) THEN 3
+             ELSE 1 END as nivel_urgencia,
+        CASE WHEN quantidade_atual > 0
+             THEN GREATEST(1, quantidade_atual / GREATEST(1, quantidade_minima) * 30)
+             ELSE 0 END as dias_estoque_restante,
+        (quantidade_atual * 100.0 / GREATEST(quantidade_minima * 3, 1)) as percentual_estoque
+    FROM produtos
+    WHERE is_active = true
+    ORDER BY CASE WHEN quantidade_atual <= 0 THEN 1
+                  WHEN quantidade_atual <= quantidade_minima THEN 2
+                  ELSE 3 END,
+             nome
+"""
+
+
+def metricas_antigas(colunas, linhas):
+    """Montagem por linha, como em carregar_metricas_produtos antes do motor vetorizado"""
+    metricas = []
+    for linha in linhas:
+        produto = dict(zip(colunas, linha))
+        metricas.append(MetricaProduto(
+            produto_id=produto['id'],
+            nome=produto['nome'],
+            categoria=produto['categoria'],
+            quantidade_atual=Decimal(str(produto['quantidade_atual'])),
+            quantidade_minima=Decimal(str(produto['quantidade_minima'])),
+            percentual_estoque=float(produto['percentual_estoque']),
+            dias_estoque_restante=int(produto['dias_estoque_restante']),
+            preco_venda=Decimal(str(produto['preco_venda'])),
+            preco_custo=Decimal(str(produto['preco_custo'] or 0)),
+            margem_bruta=Decimal(str(produto['margem_bruta'] or 0)),
+            margem_percentual=float(produto['margem_percentual'] or 0),
+            valor_estoque_total=Decimal(str(produto['valor_estoque_total'])),
+            status_estoque=produto['status_estoque'],
+            precisa_reposicao=produto['precisa_reposicao'],
+            nivel_urgencia=produto['nivel_urgencia']
+        ))
+    return metricas
+
+
+def medir_antigo(cursor):
+    inicio = time.perf_counter()
+    cursor.execute(METRICAS_ANTIGAS_SQL)
+    linhas = cursor.fetchall()
+    consulta = time.perf_counter()
+    metricas = metricas_antigas([c.name for c in cursor.description], linhas)
+    fim = time.perf_counter()
+    return metricas, (consulta - inicio) * 1000, 0.0, (fim - consulta) * 1000
+
+
+def medir_vetorizado(cursor):
+    inicio = time.perf_counter()
+    cursor.execute(COLUNAS_PRODUTOS_SQL)
+    linhas = cursor.fetchall()
+    consulta = time.perf_counter()
+    calculadas = calcular_metricas(colunas_de_linhas(linhas), exatas=True)
+    calculo = time.perf_counter()
+    metricas = montar_metricas(calculadas)
+    fim = time.perf_counter()
+    return metricas, (consulta - inicio) * 1000, (calculo - consulta) * 1000, (fim - calculo) * 1000
+
+
+def medir(cursor, funcao, iteracoes: int) -> dict:
+    amostras = {"consulta": [], "calculo": [], "montagem": [], "total": []}
+    metricas = []
+    for _ in range(iteracoes):
+        metricas, consulta, calculo, montagem = funcao(cursor)
+        amostras["consulta"].append(consulta)
+        amostras["calculo"].append(calculo)
+        amostras["montagem"].append(montagem)
+        amostras["total"].append(consulta + calculo + montagem)
+    return {etapa: statistics.median(v) for etapa, v in amostras.items()}, metricas
+
+
+def equivalentes(antigas, novas) -> bool:
+    """Mesma ordem e mesmos valores
+
+    Campos Decimal precisam sair com o mesmo texto; percentual_estoque tem
+    tolerância de arredondamento do float. dias_estoque_restante não é
+    comparado: o motor vetorizado usa a média de vendas dos rollups, não a
+    estimativa antiga pelo estoque mínimo.
+    """
+    if len(antigas) != len(novas):
+        return False
+    for a, n in zip(antigas, novas):
+        if (a.produto_id, a.status_estoque, a.nivel_urgencia, a.precisa_reposicao) != \
+                (n.produto_id, n.status_estoque, n.nivel_urgencia, n.precisa_reposicao):
+            return False
+        if any(str(getattr(a, campo)) != str(getattr(n, campo)) for campo in COLUNAS_EXATAS):
+            return False
+        if abs(a.percentual_estoque - n.percentual_estoque) > 1e-6:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das métricas por produto")
+    parser.add_argument("--produtos", default="10000,100000,1000000")
+    parser.add_argument("--iteracoes", type=int, default=5)
+    args = parser.parse_args()
+
+    tamanhos = [int(n) for n in args.produtos.split(",")]
+    resultados = {}
+
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        for total in tamanhos:
+            print(f"📦 Criando catálogo sintético com {total:,} produtos...")
+            criar_catalogo(cursor, total)
+            criar_rollups(cursor)
+
+            # Aquecer cache de páginas
+            medir_antigo(cursor)
+            medir_vetorizado(cursor)
+
+            antigo, metricas_a = medir(cursor, medir_antigo, args.iteracoes)
+            novo, metricas_n = medir(cursor, medir_vetorizado, args.iteracoes)
+            resultados[total] = (antigo, novo, equivalentes(metricas_a, metricas_n))
+
+            # Descartar a tabela temporária antes do próximo tamanho
+            conn.rollback()
+
+    print(f"\n{'produtos':>10}  {'variante':<11}{'consulta ms':>13}{'cálculo ms':>12}{'montagem ms':>13}{'total ms':>11}")
+    for total, (antigo, novo, _) in resultados.items():
+        for nome, r in (("CASE+linha", antigo), ("vetorizado", novo)):
+            print(f"{total:>10}  {nome:<11}{r['consulta']:>13.1f}{r['calculo']:>12.1f}"
+                  f"{r['montagem']:>13.1f}{r['total']:>11.1f}")
+        print(f"{'':>10}  ganho: {antigo['total'] / novo['total']:.2f}x")
+
+    if not all(ok for _, _, ok in resultados.values()):
+        print("\n❌ Resultados divergentes entre os caminhos")
+    else:
+        print("\n✅ Mesmos resultados nos dois caminhos em todos os tamanhos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# ========================
+# BENCHMARK - RELATÓRIOS DE VENDAS: MOVIMENTAÇÕES x ROLLUPS
+# ========================
+# Compara, para os últimos N dias, as consultas dos relatórios lendo as
+# movimentações brutas com as mesmas consultas lendo os rollups de
+# app/services/rollups.py:
+#   top produtos - gerar_relatorio_completo (top 10 por valor vendido)
+#   resumo       - /api/v1/movimentacoes/resumo (por dia e motivo)
+#
+# Uso:  python -m benchmarks.bench_relatorio_vendas --vendas-por-dia 10000,100000 --dias 30 --iteracoes 5
+#
+# Tabelas temporárias sombreiam produtos, movimentacoes_estoque e os
+# rollups apenas nesta sessão; os rollups são montados com um GROUP BY
+# (o mesmo resultado que a tarefa incremental chega rodada a rodada).
+
+import argparse
+import statistics
+import time
+
+from app.core.pool import get_db_connection
+from benchmarks.bench_resumo_real import criar_catalogo
+
+PRODUTOS = 10_000
+
+TOP_MOVIMENTACOES_SQL = """
+    SELECT m.produto_id, SUM(m.quantidade), SUM(m.valor_total), COUNT(*)
+    FROM movimentacoes_estoque m
+    JOIN produtos p ON p.id = m.produto_id
+    WHERE m.motivo = 'venda'
+      AND m.created_at >= CURRENT_DATE - (%(dias)s - 1) AND m.created_at < CURRENT_DATE + 1
+    GROUP BY m.produto_id
+    ORDER BY 3 DESC, 1
+    LIMIT 10
+"""
+
+TOP_ROLLUPS_SQL = """
+    SELECT r.produto_id, SUM(r.quantidade), SUM(r.valor_total), SUM(r.movimentacoes)
+    FROM movimentacoes_diarias r
+    JOIN produtos p ON p.id = r.produto_id
+    WHERE r.motivo = 'venda'
+      AND r.dia >= CURRENT_DATE - (%(dias)s - 1) AND r.dia <= CURRENT_DATE
+    GROUP BY r.produto_id
+    ORDER BY 3 DESC, 1
+    LIMIT 10
+"""
+
+RESUMO_MOVIMENTACOES_SQL = """
+    SELECT created_at::date, motivo, tipo, SUM(quantidade), SUM(valor_total), COUNT(*)
+    FROM movimentacoes_estoque
+    WHERE created_at >= CURRENT_DATE - (%(dias)s - 1) AND created_at < CURRENT_DATE + 1
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+
+RESUMO_ROLLUPS_SQL = """
+    SELECT dia, motivo, tipo, SUM(quantidade), SUM(valor_total), SUM(movimentacoes)
+    FROM movimentacoes_diarias_motivo
+    WHERE dia >= CURRENT_DATE - (%(dias)s - 1) AND dia <= CURRENT_DATE
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+
+
+def criar_movimentacoes(cursor, vendas_por_dia: int, dias: int) -> None:
+    """movimentacoes_estoque temporária: vendas + algumas perdas e compras por dia"""
+    cursor.execute("""
+        CREATE TEMP TABLE movimentacoes_estoque (
+            produto_id INTEGER NOT NULL,
+            tipo VARCHAR(20) NOT NULL,
+            motivo VARCHAR(50) NOT NULL,
+            quantidade NUMERIC(10,3) NOT NULL,
+            valor_total NUMERIC(10,2),
+            created_at TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO movimentacoes_estoque
+        SELECT 1 + (random() * (%(produtos)s - 1))::int,
+               CASE WHEN g %% 20 = 0 THEN 'entrada' ELSE 'saida' END,
+               CASE WHEN g %% 20 = 0 THEN 'compra' WHEN g %% 20 = 1 THEN 'perda' ELSE 'venda' END,
+               (1 + random() * 5)::numeric(10,3),
+               (random() * 80)::numeric(10,2),
+               CURRENT_DATE - d + (random() * interval '1 day')
+        FROM generate_series(0, %(dias)s - 1) d
+        CROSS JOIN generate_series(1, %(vendas)s) g
+    """, {"produtos": PRODUTOS, "dias": dias, "vendas": vendas_por_dia})
+    cursor.execute("CREATE INDEX ON movimentacoes_estoque (created_at)")
+    cursor.execute("ANALYZE movimentacoes_estoque")
+
+
+def criar_rollups(cursor) -> None:
+    """Rollups diários (por produto e por motivo) das movimentações sintéticas"""
+    cursor.execute("""
+        CREATE TEMP TABLE movimentacoes_diarias AS
+        SELECT created_at::date as dia, produto_id, motivo, tipo,
+               SUM(quantidade) as quantidade, SUM(valor_total) as valor_total, COUNT(*) as movimentacoes
+        FROM movimentacoes_estoque
+        GROUP BY 1, 2, 3, 4
+    """)
+    cursor.execute("ALTER TABLE movimentacoes_diarias ADD PRIMARY KEY (dia, produto_id, motivo, tipo)")
+    cursor.execute("""
+        CREATE TEMP TABLE movimentacoes_diarias_motivo AS
+        SELECT dia, motivo, tipo,
+               SUM(quantidade) as quantidade, SUM(valor_total) as valor_total, SUM(movimentacoes) as movimentacoes
+        FROM movimentacoes_diarias
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("ALTER TABLE movimentacoes_diarias_motivo ADD PRIMARY KEY (dia, motivo, tipo)")
+    cursor.execute("ANALYZE movimentacoes_diarias")
+    cursor.execute("ANALYZE movimentacoes_diarias_motivo")
+
+
+def medir(cursor, sql: str, dias: int, iteracoes: int):
+    amostras = []
+    linhas = []
+    for _ in range(iteracoes):
+        inicio = time.perf_counter()
+        cursor.execute(sql, {"dias": dias})
+        linhas = cursor.fetchall()
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(amostras), linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos relatórios de vendas sobre os rollups")
+    parser.add_argument("--vendas-por-dia", default="10000,100000")
+    parser.add_argument("--dias", type=int, default=30)
+    parser.add_argument("--iteracoes", type=int, default=5)
+    args = parser.parse_args()
+
+    volumes = [int(n) for n in args.vendas_por_dia.split(",")]
+    resultados = {}
+
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        for volume in volumes:
+            print(f"📦 Gerando {volume:,} movimentações/dia por {args.dias} dias...")
+            criar_catalogo(cursor, PRODUTOS)
+            criar_movimentacoes(cursor, volume, args.dias)
+            criar_rollups(cursor)
+
+            por_consulta = {}
+            for nome, bruto_sql, rollup_sql in (
+                ("top produtos", TOP_MOVIMENTACOES_SQL, TOP_ROLLUPS_SQL),
+                ("resumo", RESUMO_MOVIMENTACOES_SQL, RESUMO_ROLLUPS_SQL),
+            ):
+                # Aquecer cache de páginas
+                medir(cursor, bruto_sql, args.dias, 1)
+                medir(cursor, rollup_sql, args.dias, 1)
+
+                bruto_ms, bruto = medir(cursor, bruto_sql, args.dias, args.iteracoes)
+                rollup_ms, rollup = medir(cursor, rollup_sql, args.dias, args.iteracoes)
+                por_consulta[nome] = (bruto_ms, rollup_ms, bruto == rollup)
+            resultados[volume] = por_consulta
+
+            # Descartar as tabelas temporárias antes do próximo volume
+            conn.rollback()
+
+    print(f"\n{'mov./dia':>10}  {'consulta':<14}{'movimentações ms':>18}{'rollups ms':>12}{'ganho':>9}")
+    for volume, por_consulta in resultados.items():
+        for nome, (bruto_ms, rollup_ms, _) in por_consulta.items():
+            print(f"{volume:>10}  {nome:<14}{bruto_ms:>18.1f}{rollup_ms:>12.1f}{bruto_ms / rollup_ms:>8.1f}x")
+
+    if not all(iguais for por_consulta in resultados.values() for _, _, iguais in por_consulta.values()):
+        print("\n❌ Resultados divergentes entre movimentações e rollups")
+    else:
+        print("\n✅ Mesmos resultados lendo movimentações e rollups")
+
+
+if __name__ == "__main__":
+    main()
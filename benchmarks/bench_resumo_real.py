@@ -0,0 +1,154 @@
+# ========================
+# BENCHMARK - /api/v1/analytics/resumo-real
+# ========================
+# Compara as 4 consultas antigas do resumo com a consulta única
+# (RESUMO_REAL_SQL) sobre um catálogo sintético em tabela temporária.
+#
+# Uso:  python -m benchmarks.bench_resumo_real --produtos 100000 --iteracoes 50
+#
+# A tabela temporária `produtos` sombreia a tabela real apenas nesta
+# sessão (pg_temp vem antes no search_path), então nenhum dado é alterado.
+
+import argparse
+import json
+import statistics
+import time
+
+from app.core.pool import get_db_connection
+from app.analytics_real_data import RESUMO_REAL_SQL
+
+CONSULTAS_ANTIGAS = [
+    """
+    SELECT
+        COUNT(*) as total_produtos,
+        COUNT(*) FILTER (WHERE is_active = true) as produtos_ativos,
+        COUNT(*) FILTER (WHERE quantidade_atual <= 0 AND is_active = true) as produtos_sem_estoque,
+        COUNT(*) FILTER (WHERE quantidade_atual <= quantidade_minima AND quantidade_atual > 0 AND is_active = true) as produtos_estoque_baixo,
+        SUM(quantidade_atual * preco_venda) FILTER (WHERE is_active = true) as valor_total_estoque,
+        AVG(
+            CASE
+                WHEN preco_custo > 0 AND preco_venda > 0
+                THEN ((preco_venda - preco_custo) / preco_venda * 100)
+                ELSE NULL
+            END
+        ) as margem_media
+    FROM produtos
+    """,
+    """
+    SELECT nome, categoria, (quantidade_atual * preco_venda) as valor
+    FROM produtos
+    WHERE is_active = true AND quantidade_atual > 0
+    ORDER BY (quantidade_atual * preco_venda) DESC
+    LIMIT 1
+    """,
+    """
+    SELECT nome, categoria,
+           ((preco_venda - preco_custo) / preco_venda * 100) as margem
+    FROM produtos
+    WHERE is_active = true AND preco_custo > 0 AND preco_venda > preco_custo
+    ORDER BY ((preco_venda - preco_custo) / preco_venda * 100) DESC
+    LIMIT 1
+    """,
+    """
+    SELECT categoria, COUNT(*) as quantidade,
+           (COUNT(*) * 100.0 / (SELECT COUNT(*) FROM produtos WHERE is_active = true)) as percentual
+    FROM produtos
+    WHERE is_active = true
+    GROUP BY categoria
+    ORDER BY COUNT(*) DESC
+    LIMIT 1
+    """,
+]
+
+
+def criar_catalogo(cursor, total: int) -> None:
+    """Criar tabela temporária `produtos` com catálogo sintético"""
+    cursor.execute("""
+        CREATE TEMP TABLE produtos (
+            id SERIAL PRIMARY KEY,
+            nome VARCHAR(255) NOT NULL,
+            categoria VARCHAR(50) NOT NULL,
+            quantidade_atual NUMERIC(12,3) DEFAULT 0,
+            quantidade_minima NUMERIC(12,3) DEFAULT 0,
+            preco_venda NUMERIC(10,2) DEFAULT 0,
+            preco_custo NUMERIC(10,2),
+            is_active BOOLEAN DEFAULT TRUE
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO produtos (nome, categoria, quantidade_atual, quantidade_minima,
+                              preco_venda, preco_custo, is_active)
+        SELECT
+            'Produto ' || g,
+            (ARRAY['paes','doces','salgados','bebidas','ingredientes','embalagens','outros'])[1 + g %% 7],
+            (random() * 200)::numeric(12,3),
+            (random() * 40)::numeric(12,3),
+            v.preco,
+            CASE WHEN g %% 10 = 0 THEN NULL ELSE round(v.preco * (0.3 + random() * 0.6)::numeric, 2) END,
+            g %% 20 <> 0
+        FROM generate_series(1, %s) g
+        CROSS JOIN LATERAL (SELECT round((0.5 + random() * 60)::numeric, 2) as preco) v
+    """, (total,))
+    # As consultas leem o estoque efetivo; sem deltas no catálogo sintético
+    cursor.execute("CREATE TEMP VIEW produtos_com_estoque AS SELECT * FROM produtos")
+    cursor.execute("ANALYZE produtos")
+
+
+def tempo_planejamento(cursor, sql: str) -> float:
+    """Tempo de planejamento (ms) reportado pelo EXPLAIN ANALYZE"""
+    cursor.execute(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {sql}")
+    plano = cursor.fetchone()[0]
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return plano[0]["Planning Time"]
+
+
+def medir(cursor, consultas, iteracoes: int) -> dict:
+    """Latência (ms) de executar todas as consultas de uma variante"""
+    amostras = []
+    for _ in range(iteracoes):
+        inicio = time.perf_counter()
+        for sql in consultas:
+            cursor.execute(sql)
+            cursor.fetchall()
+        amostras.append((time.perf_counter() - inicio) * 1000)
+
+    amostras.sort()
+    return {
+        "round_trips": len(consultas),
+        "mediana_ms": statistics.median(amostras),
+        "p95_ms": amostras[min(len(amostras) - 1, int(len(amostras) * 0.95))],
+        "planejamento_ms": sum(tempo_planejamento(cursor, sql) for sql in consultas),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do resumo de analytics")
+    parser.add_argument("--produtos", type=int, default=100_000)
+    parser.add_argument("--iteracoes", type=int, default=50)
+    args = parser.parse_args()
+
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        print(f"📦 Criando catálogo sintético com {args.produtos:,} produtos...")
+        criar_catalogo(cursor, args.produtos)
+
+        # Aquecer cache de páginas
+        medir(cursor, CONSULTAS_ANTIGAS, 2)
+        medir(cursor, [RESUMO_REAL_SQL], 2)
+
+        antigo = medir(cursor, CONSULTAS_ANTIGAS, args.iteracoes)
+        novo = medir(cursor, [RESUMO_REAL_SQL], args.iteracoes)
+
+        # Descartar a tabela temporária (criada nesta mesma transação)
+        conn.rollback()
+
+    print(f"\n{'variante':<18}{'round trips':>12}{'mediana ms':>12}{'p95 ms':>10}{'planej. ms':>12}")
+    for nome, r in (("4 consultas", antigo), ("consulta única", novo)):
+        print(f"{nome:<18}{r['round_trips']:>12}{r['mediana_ms']:>12.2f}"
+              f"{r['p95_ms']:>10.2f}{r['planejamento_ms']:>12.3f}")
+
+    print(f"\n✅ Ganho na mediana: {antigo['mediana_ms'] / novo['mediana_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
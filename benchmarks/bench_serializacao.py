@@ -0,0 +1,140 @@
+# ========================
+# BENCHMARK - SERIALIZAÇÃO DAS LISTAS DE ANALYTICS (CUSTO POR LINHA)
+# ========================
+# Mede, em memória e sem banco, o custo por linha de responder uma lista de
+# MetricaProduto / AlertaInteligente:
+#   antes  - construtor Pydantic com Decimal(str(...)) + o que o FastAPI faz
+#            com o response_model (model_dump, nova validação, serialize em
+#            modo JSON) + json.dumps
+#   depois - model_construct + RespostaORJSON (orjson com o fallback de
+#            app/core/respostas.py)
+#
+# Uso:  python -m benchmarks.bench_serializacao --linhas 100000 --iteracoes 5
+
+import argparse
+import json
+import random
+import statistics
+import time
+from decimal import Decimal
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core.respostas import RespostaORJSON
+from app.schemas.analytics_produtos import AlertaInteligente, MetricaProduto
+
+METRICAS_ADAPTER = TypeAdapter(List[MetricaProduto])
+ALERTAS_ADAPTER = TypeAdapter(List[AlertaInteligente])
+
+
+def gerar_linhas(total: int):
+    """Linhas como saem do banco: NUMERIC -> Decimal"""
+    random.seed(42)
+    metricas, alertas = [], []
+    for i in range(total):
+        q = Decimal(f"{random.uniform(0, 200):.3f}")
+        q_min = Decimal(f"{random.uniform(0, 40):.3f}")
+        venda = Decimal(f"{random.uniform(0.5, 60):.2f}")
+        custo = Decimal(f"{float(venda) * random.uniform(0.3, 0.9):.2f}")
+        metricas.append({
+            "produto_id": i, "nome": f"Produto {i}", "categoria": "paes",
+            "quantidade_atual": q, "quantidade_minima": q_min,
+            "percentual_estoque": float(q * 100 / max(q_min * 3, 1)),
+            "dias_estoque_restante": int(max(1, q / max(1, q_min) * 30)),
+            "preco_venda": venda, "preco_custo": custo,
+            "margem_bruta": venda - custo,
+            "margem_percentual": float((venda - custo) / venda * 100),
+            "valor_estoque_total": q * venda,
+            "status_estoque": "normal" if q > q_min * 2 else "atencao",
+            "precisa_reposicao": q <= q_min,
+            "nivel_urgencia": 4 if q <= q_min else 1,
+        })
+        alertas.append({
+            "tipo": "ALTO", "categoria": "estoque", "titulo": "Estoque Baixo",
+            "descricao": f"Produto {i}: {q} unidades (mín: {q_min})",
+            "produto_id": i, "produto_nome": f"Produto {i}",
+            "valor_metrica": q, "threshold": q_min, "urgencia": 4,
+            "acao_sugerida": "Agendar reposição em 1-2 dias",
+        })
+    return metricas, alertas
+
+
+def antes(modelo, adapter, linhas):
+    """Caminho padrão: construtor + response_model do FastAPI + json.dumps"""
+    inicio = time.perf_counter()
+    objetos = [
+        modelo(**{k: Decimal(str(v)) if isinstance(v, Decimal) else v for k, v in linha.items()})
+        for linha in linhas
+    ]
+    construcao = time.perf_counter()
+    validados = adapter.validate_python([o.model_dump() for o in objetos])
+    corpo = json.dumps(adapter.dump_python(validados, mode="json"), ensure_ascii=False).encode()
+    fim = time.perf_counter()
+    return corpo, construcao - inicio, fim - construcao
+
+
+def depois(modelo, linhas):
+    """Saída confiável: model_construct + orjson"""
+    inicio = time.perf_counter()
+    construir = modelo.model_construct
+    campos = frozenset(modelo.model_fields)
+    objetos = [construir(campos, **linha) for linha in linhas]
+    construcao = time.perf_counter()
+    corpo = RespostaORJSON(objetos).body
+    fim = time.perf_counter()
+    return corpo, construcao - inicio, fim - construcao
+
+
+def medir(funcao, iteracoes: int, total: int) -> dict:
+    construcoes, serializacoes = [], []
+    corpo = b""
+    for _ in range(iteracoes):
+        corpo, construcao, serializacao = funcao()
+        construcoes.append(construcao)
+        serializacoes.append(serializacao)
+    por_linha = lambda amostras: statistics.median(amostras) / total * 1_000_000
+    return {
+        "construcao_us": por_linha(construcoes),
+        "serializacao_us": por_linha(serializacoes),
+        "total_us": por_linha([c + s for c, s in zip(construcoes, serializacoes)]),
+        "bytes": len(corpo),
+        "corpo": corpo,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da serialização das listas de analytics")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--iteracoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"📦 Gerando {args.linhas:,} linhas sintéticas...")
+    metricas, alertas = gerar_linhas(args.linhas)
+
+    casos = {
+        "MetricaProduto": (MetricaProduto, METRICAS_ADAPTER, metricas),
+        "AlertaInteligente": (AlertaInteligente, ALERTAS_ADAPTER, alertas),
+    }
+    resultados = {}
+    for nome, (modelo, adapter, linhas) in casos.items():
+        r_antes = medir(lambda: antes(modelo, adapter, linhas), args.iteracoes, args.linhas)
+        r_depois = medir(lambda: depois(modelo, linhas), args.iteracoes, args.linhas)
+        iguais = json.loads(r_antes["corpo"]) == json.loads(r_depois["corpo"])
+        resultados[nome] = (r_antes, r_depois, iguais)
+
+    print(f"\n{'modelo':<19}{'variante':<9}{'construção µs':>15}{'serialização µs':>17}{'total µs/linha':>16}")
+    for nome, (r_antes, r_depois, _) in resultados.items():
+        for variante, r in (("antes", r_antes), ("depois", r_depois)):
+            print(f"{nome:<19}{variante:<9}{r['construcao_us']:>15.2f}{r['serializacao_us']:>17.2f}{r['total_us']:>16.2f}")
+        print(f"{'':<19}ganho: {r_antes['total_us'] / r_depois['total_us']:.1f}x")
+
+    if not all(iguais for _, _, iguais in resultados.values()):
+        print("\n❌ JSON diferente entre os caminhos")
+    else:
+        print("\n✅ JSON idêntico nos dois caminhos")
+
+
+if __name__ == "__main__":
+    main()
@@ -110,6 +110,132 @@ CREATE INDEX IF NOT EXISTS idx_lotes_status ON lotes(status);
 CREATE INDEX IF NOT EXISTS idx_receitas_produto ON receitas(produto_id);
 CREATE INDEX IF NOT EXISTS idx_receita_ingredientes_receita ON receita_ingredientes(receita_id);
 CREATE INDEX IF NOT EXISTS idx_receita_ingredientes_ingrediente ON receita_ingredientes(ingrediente_id);
+CREATE INDEX IF NOT EXISTS idx_produtos_updated_at ON produtos(updated_at); -- versão barata para ETag (MAX via índice)
+
+-- Listagem paginada de produtos (keyset em nome, id)
+ALTER TABLE produtos ADD COLUMN IF NOT EXISTS tags TEXT[] DEFAULT '{}';
+CREATE INDEX IF NOT EXISTS idx_produtos_ativos_nome_id ON produtos(nome, id) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_produtos_ativos_categoria_nome_id ON produtos(categoria, nome, id) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_produtos_estoque_baixo_nome_id ON produtos(nome, id) WHERE is_active = true AND quantidade_atual <= quantidade_minima;
+CREATE INDEX IF NOT EXISTS idx_produtos_tags ON produtos USING GIN(tags);
+
+-- Busca por nome tolerante a erros e acentos (pg_trgm + unaccent)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+-- unaccent() é STABLE; o wrapper IMMUTABLE com dicionário explícito permite usá-lo em índice
+CREATE OR REPLACE FUNCTION f_unaccent(text)
+RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent', $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+CREATE INDEX IF NOT EXISTS idx_produtos_nome_trgm ON produtos USING GIN (f_unaccent(lower(nome)) gin_trgm_ops) WHERE is_active = true;
+
+-- Leitura de código de barras no PDV
+ALTER TABLE produtos ADD COLUMN IF NOT EXISTS codigo_barras VARCHAR(14);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_produtos_codigo_barras ON produtos(codigo_barras) WHERE codigo_barras IS NOT NULL;
+
+-- Estoque por deltas para produtos muito vendidos (sem disputa pela linha em produtos)
+-- Sem FK para produtos: a verificação travaria (KEY SHARE) a mesma linha quente a cada venda
+ALTER TABLE produtos ADD COLUMN IF NOT EXISTS estoque_por_deltas BOOLEAN DEFAULT FALSE;
+CREATE TABLE IF NOT EXISTS estoque_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    produto_id INTEGER NOT NULL,
+    delta NUMERIC(12,3) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_estoque_deltas_produto ON estoque_deltas(produto_id);
+CREATE OR REPLACE VIEW produtos_estoque AS
+SELECT p.id,
+       COALESCE(p.quantidade_atual, 0) as quantidade_base,
+       COALESCE(d.pendente, 0) as quantidade_pendente,
+       COALESCE(p.quantidade_atual, 0) + COALESCE(d.pendente, 0) as quantidade_atual,
+       COALESCE(p.estoque_por_deltas, false) as estoque_por_deltas
+FROM produtos p
+LEFT JOIN (
+    SELECT produto_id, SUM(delta) as pendente
+    FROM estoque_deltas
+    GROUP BY produto_id
+) d ON d.produto_id = p.id;
+
+-- Catálogo com o estoque efetivo (base + deltas pendentes) em quantidade_atual:
+-- leituras de estoque usam esta view; escritas continuam em produtos
+CREATE OR REPLACE VIEW produtos_com_estoque AS
+SELECT p.id, p.nome, p.categoria, p.unidade_medida,
+       COALESCE(p.quantidade_atual, 0) + COALESCE(d.pendente, 0) as quantidade_atual,
+       p.quantidade_minima, p.preco_venda, p.preco_custo, p.is_active,
+       p.tags, p.codigo_barras, p.estoque_por_deltas, p.created_at, p.updated_at
+FROM produtos p
+LEFT JOIN (
+    SELECT produto_id, SUM(delta) as pendente
+    FROM estoque_deltas
+    GROUP BY produto_id
+) d ON d.produto_id = p.id;
+
+-- Snapshot diário do estoque (fechamento do dia) para consultas de estoque/valor em uma data
+CREATE TABLE IF NOT EXISTS estoque_snapshots (
+    dia DATE NOT NULL,
+    produto_id INTEGER NOT NULL,
+    quantidade NUMERIC(12,3) NOT NULL,
+    preco_custo NUMERIC(10,2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dia, produto_id)
+);
+CREATE INDEX IF NOT EXISTS idx_estoque_snapshots_produto_dia ON estoque_snapshots(produto_id, dia);
+
+-- Rollups de movimentações, mantidos incrementalmente por marca d'água (app/services/rollups.py)
+CREATE TABLE IF NOT EXISTS movimentacoes_diarias (
+    dia DATE NOT NULL,
+    produto_id INTEGER NOT NULL,
+    motivo VARCHAR(50) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    quantidade NUMERIC(14,3) NOT NULL DEFAULT 0,
+    valor_total NUMERIC(14,2) NOT NULL DEFAULT 0,
+    movimentacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, produto_id, motivo, tipo)
+);
+CREATE INDEX IF NOT EXISTS idx_mov_diarias_produto_dia ON movimentacoes_diarias(produto_id, dia);
+CREATE TABLE IF NOT EXISTS movimentacoes_horarias (
+    hora TIMESTAMP NOT NULL,
+    produto_id INTEGER NOT NULL,
+    motivo VARCHAR(50) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    quantidade NUMERIC(14,3) NOT NULL DEFAULT 0,
+    valor_total NUMERIC(14,2) NOT NULL DEFAULT 0,
+    movimentacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hora, produto_id, motivo, tipo)
+);
+CREATE INDEX IF NOT EXISTS idx_mov_horarias_produto_hora ON movimentacoes_horarias(produto_id, hora);
+-- Grão por motivo (todos os produtos): poucas linhas por dia/hora, base dos relatórios gerais
+CREATE TABLE IF NOT EXISTS movimentacoes_diarias_motivo (
+    dia DATE NOT NULL,
+    motivo VARCHAR(50) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    quantidade NUMERIC(16,3) NOT NULL DEFAULT 0,
+    valor_total NUMERIC(16,2) NOT NULL DEFAULT 0,
+    movimentacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, motivo, tipo)
+);
+CREATE TABLE IF NOT EXISTS movimentacoes_horarias_motivo (
+    hora TIMESTAMP NOT NULL,
+    motivo VARCHAR(50) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    quantidade NUMERIC(16,3) NOT NULL DEFAULT 0,
+    valor_total NUMERIC(16,2) NOT NULL DEFAULT 0,
+    movimentacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hora, motivo, tipo)
+);
+CREATE TABLE IF NOT EXISTS vendas_ultima (
+    produto_id INTEGER PRIMARY KEY,
+    ultima_venda TIMESTAMP NOT NULL
+);
+-- ate = marca em processado_em (horário do servidor); atualizado_em = última rodada que somou algo
+CREATE TABLE IF NOT EXISTS rollups_marca_dagua (
+    nome VARCHAR(50) PRIMARY KEY,
+    ate TIMESTAMPTZ NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+ALTER TABLE rollups_marca_dagua ALTER COLUMN ate TYPE TIMESTAMPTZ;
+-- Rodadas leem as movimentações pela hora de gravação, não pelo created_at do terminal
+CREATE INDEX IF NOT EXISTS idx_mov_processado_em ON movimentacoes_estoque(processado_em);
 
 -- Triggers para updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -124,3 +250,23 @@ CREATE TRIGGER update_fornecedores_updated_at BEFORE UPDATE ON fornecedores FOR
 CREATE TRIGGER update_ingredientes_updated_at BEFORE UPDATE ON ingredientes FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_lotes_updated_at BEFORE UPDATE ON lotes FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_receitas_updated_at BEFORE UPDATE ON receitas FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+DROP TRIGGER IF EXISTS update_produtos_updated_at ON produtos;
+CREATE TRIGGER update_produtos_updated_at BEFORE UPDATE ON produtos FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Notificação de alterações (invalidação de cache entre workers da API)
+-- Um NOTIFY por comando; notificações iguais na mesma transação são agrupadas pelo PostgreSQL
+-- Canal = CANAL_ALTERACOES em app/core/notificacoes.py
+CREATE OR REPLACE FUNCTION notificar_alteracao_tabela()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('arvore_pao_alteracoes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS notificar_produtos_alteracao ON produtos;
+DROP TRIGGER IF EXISTS notificar_lotes_alteracao ON lotes;
+DROP TRIGGER IF EXISTS notificar_ingredientes_alteracao ON ingredientes;
+CREATE TRIGGER notificar_produtos_alteracao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON produtos FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_tabela();
+CREATE TRIGGER notificar_lotes_alteracao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON lotes FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_tabela();
+CREATE TRIGGER notificar_ingredientes_alteracao AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON ingredientes FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_tabela();
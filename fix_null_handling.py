@@ -1,18 +1,11 @@
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from app.core.pool import get_db_connection
+
 def get_produtos_safe():
     """Buscar produtos com tratamento seguro de valores NULL"""
     try:
-        conn = psycopg2.connect(
-            dbname="arvore_pao",
-            user="postgres", 
-            password="123456",
-            host="db",
-            port=5432
-        )
-        
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             # Query com COALESCE para tratar NULLs na origem
             cursor.execute("""
                 SELECT 
@@ -53,9 +46,6 @@ def get_produtos_safe():
     except Exception as e:
         print(f"❌ Erro ao buscar produtos: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 # Testar função
 if __name__ == "__main__":
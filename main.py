@@ -1,16 +1,12 @@
+from psycopg2.extras import RealDictCursor
+
+from app.core.pool import get_db_connection
+
 
 def get_produtos_para_ia():
     """Função específica para buscar produtos para IA com tratamento robusto de NULL"""
     try:
-        conn = psycopg2.connect(
-            dbname="arvore_pao",
-            user="postgres", 
-            password="123456",
-            host="db",
-            port=5432
-        )
-        
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             # Query com COALESCE e validações
             cursor.execute("""
                 SELECT 
@@ -50,9 +46,6 @@ def get_produtos_para_ia():
     except Exception as e:
         logger.error(f"Erro ao buscar produtos para IA: {e}")
         return []
-    finally:
-        if 'conn' in locals():
-            conn.close()
 @app.post("/api/v1/ai/train-models-safe")
 def train_ai_models_safe():
     """🤖 Treinamento SEGURO com tratamento robusto de NULL"""
@@ -120,15 +113,7 @@ def train_ai_models_safe():
 def get_produtos_para_ia():
     """Função específica para buscar produtos para IA com tratamento robusto de NULL"""
     try:
-        conn = psycopg2.connect(
-            dbname="arvore_pao",
-            user="postgres", 
-            password="123456",
-            host="db",
-            port=5432
-        )
-        
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with get_db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             # Query com COALESCE e validações
             cursor.execute("""
                 SELECT 
@@ -168,9 +153,6 @@ def get_produtos_para_ia():
     except Exception as e:
         logger.error(f"Erro ao buscar produtos para IA: {e}")
         return []
-    finally:
-        if 'conn' in locals():
-            conn.close()
 @app.post("/api/v1/ai/train-models-safe")
 def train_ai_models_safe():
     """🤖 Treinamento SEGURO com tratamento robusto de NULL"""
@@ -0,0 +1,127 @@
+-- Particionamento mensal de movimentacoes_estoque (RANGE em created_at)
+--
+-- Conversão sem cópia de dados: a tabela atual vira a partição
+-- "movimentacoes_estoque_historico" (tudo antes do mês corrente) e novas
+-- movimentações caem em partições mensais. Idempotente: pode rodar de novo.
+-- Depois da conversão, manter_particoes_movimentacoes() é chamada pela API
+-- (app/services/particoes.py) para criar meses futuros e desanexar os antigos.
+
+DO $$
+DECLARE
+    inicio_mes_atual TIMESTAMP := date_trunc('month', CURRENT_TIMESTAMP);
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'movimentacoes_estoque'::regclass) = 'p' THEN
+        RAISE NOTICE 'movimentacoes_estoque já é particionada';
+        RETURN;
+    END IF;
+
+    -- Chave de partição não pode ser nula e precisa fazer parte da PK
+    UPDATE movimentacoes_estoque SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+    ALTER TABLE movimentacoes_estoque ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+    ALTER TABLE movimentacoes_estoque ALTER COLUMN created_at SET NOT NULL;
+    ALTER TABLE movimentacoes_estoque DROP CONSTRAINT IF EXISTS movimentacoes_estoque_pkey;
+    ALTER TABLE movimentacoes_estoque ADD CONSTRAINT movimentacoes_estoque_historico_pkey PRIMARY KEY (id, created_at);
+
+    ALTER TABLE movimentacoes_estoque RENAME TO movimentacoes_estoque_historico;
+    ALTER INDEX IF EXISTS idx_mov_produto_data RENAME TO idx_mov_historico_produto_data;
+    ALTER INDEX IF EXISTS idx_mov_tipo_data RENAME TO idx_mov_historico_tipo_data;
+    ALTER INDEX IF EXISTS idx_mov_motivo_data RENAME TO idx_mov_historico_motivo_data;
+    ALTER INDEX IF EXISTS idx_mov_documento RENAME TO idx_mov_historico_documento;
+    ALTER INDEX IF EXISTS idx_mov_status RENAME TO idx_mov_historico_status;
+    ALTER INDEX IF EXISTS idx_mov_usuario RENAME TO idx_mov_historico_usuario;
+    ALTER INDEX IF EXISTS idx_mov_processado_em RENAME TO idx_mov_historico_processado_em;
+    ALTER INDEX IF EXISTS ix_movimentacoes_estoque_produto_id RENAME TO ix_movimentacoes_estoque_historico_produto_id;
+    ALTER INDEX IF EXISTS ix_movimentacoes_estoque_tipo RENAME TO ix_movimentacoes_estoque_historico_tipo;
+    ALTER INDEX IF EXISTS ix_movimentacoes_estoque_motivo RENAME TO ix_movimentacoes_estoque_historico_motivo;
+    ALTER INDEX IF EXISTS ix_movimentacoes_estoque_fornecedor_id RENAME TO ix_movimentacoes_estoque_historico_fornecedor_id;
+
+    -- Mesma estrutura; a sequência do id continua a mesma (DEFAULT copiado)
+    EXECUTE 'CREATE TABLE movimentacoes_estoque (LIKE movimentacoes_estoque_historico INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)';
+    ALTER TABLE movimentacoes_estoque ADD PRIMARY KEY (id, created_at);
+
+    -- LIKE não copia chaves estrangeiras: as do model voltam no pai e
+    -- valem para todas as partições (a do histórico é reaproveitada no ATTACH)
+    ALTER TABLE movimentacoes_estoque ADD CONSTRAINT movimentacoes_estoque_produto_id_fkey
+        FOREIGN KEY (produto_id) REFERENCES produtos(id);
+    ALTER TABLE movimentacoes_estoque ADD CONSTRAINT movimentacoes_estoque_fornecedor_id_fkey
+        FOREIGN KEY (fornecedor_id) REFERENCES fornecedores(id);
+
+    -- Índices no pai valem para todas as partições (idx_mov_* do model)
+    CREATE INDEX idx_mov_produto_data ON movimentacoes_estoque (produto_id, created_at);
+    CREATE INDEX idx_mov_tipo_data ON movimentacoes_estoque (tipo, created_at);
+    CREATE INDEX idx_mov_motivo_data ON movimentacoes_estoque (motivo, created_at);
+    CREATE INDEX idx_mov_documento ON movimentacoes_estoque (documento_tipo, documento_numero);
+    CREATE INDEX idx_mov_status ON movimentacoes_estoque (status);
+    CREATE INDEX idx_mov_usuario ON movimentacoes_estoque (usuario_responsavel, created_at);
+    -- Colunas com index=True no model
+    CREATE INDEX ix_movimentacoes_estoque_produto_id ON movimentacoes_estoque (produto_id);
+    CREATE INDEX ix_movimentacoes_estoque_tipo ON movimentacoes_estoque (tipo);
+    CREATE INDEX ix_movimentacoes_estoque_motivo ON movimentacoes_estoque (motivo);
+    CREATE INDEX ix_movimentacoes_estoque_fornecedor_id ON movimentacoes_estoque (fornecedor_id);
+    -- Faixas de data sem filtro de produto/tipo/motivo (relatórios, rollups);
+    -- no ATTACH só os índices que o histórico ainda não tem são construídos nele
+    CREATE INDEX idx_mov_created_at ON movimentacoes_estoque (created_at);
+    -- Marca d'água dos rollups (app/services/rollups.py)
+    CREATE INDEX idx_mov_processado_em ON movimentacoes_estoque (processado_em);
+
+    -- CHECK igual ao limite da partição: ATTACH não precisa varrer a tabela
+    EXECUTE format(
+        'ALTER TABLE movimentacoes_estoque_historico ADD CONSTRAINT movimentacoes_estoque_historico_limite CHECK (created_at < %L)',
+        inicio_mes_atual
+    );
+    EXECUTE format(
+        'ALTER TABLE movimentacoes_estoque ATTACH PARTITION movimentacoes_estoque_historico FOR VALUES FROM (MINVALUE) TO (%L)',
+        inicio_mes_atual
+    );
+    ALTER TABLE movimentacoes_estoque_historico DROP CONSTRAINT movimentacoes_estoque_historico_limite;
+END $$;
+
+-- Cria partições do mês corrente até `meses_futuros` à frente e desanexa as
+-- que terminam antes de `meses_retencao` meses atrás (0 = nunca desanexa).
+-- Partições desanexadas continuam no banco como tabelas comuns, para arquivo.
+CREATE OR REPLACE FUNCTION manter_particoes_movimentacoes(meses_futuros INTEGER DEFAULT 3, meses_retencao INTEGER DEFAULT 0)
+RETURNS TABLE (acao TEXT, particao TEXT) AS $$
+DECLARE
+    mes TIMESTAMP;
+    nome TEXT;
+    limite_retencao TIMESTAMP;
+    rec RECORD;
+BEGIN
+    -- Um worker por vez
+    IF NOT pg_try_advisory_xact_lock(hashtext('manter_particoes_movimentacoes')) THEN
+        RETURN;
+    END IF;
+
+    FOR i IN 0..meses_futuros LOOP
+        mes := date_trunc('month', CURRENT_TIMESTAMP) + make_interval(months => i);
+        nome := 'movimentacoes_estoque_' || to_char(mes, 'YYYY_MM');
+        IF to_regclass(nome) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF movimentacoes_estoque FOR VALUES FROM (%L) TO (%L)',
+                nome, mes, mes + interval '1 month'
+            );
+            acao := 'criada'; particao := nome;
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+
+    IF meses_retencao > 0 THEN
+        limite_retencao := date_trunc('month', CURRENT_TIMESTAMP) - make_interval(months => meses_retencao);
+        FOR rec IN
+            SELECT c.relname,
+                   (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::timestamp as fim
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'movimentacoes_estoque'::regclass
+        LOOP
+            IF rec.fim IS NOT NULL AND rec.fim <= limite_retencao THEN
+                EXECUTE format('ALTER TABLE movimentacoes_estoque DETACH PARTITION %I', rec.relname);
+                acao := 'desanexada'; particao := rec.relname;
+                RETURN NEXT;
+            END IF;
+        END LOOP;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT * FROM manter_particoes_movimentacoes(3, 0);
@@ -2,7 +2,12 @@ class ArvorepaoDashboard {
     constructor() {
         this.apiBase = '/api/v1/analytics';
         this.charts = {};
-        this.updateInterval = 30000; // 30 segundos
+        this.updateInterval = 30000; // 30 segundos (apenas sem suporte a SSE)
+        this.chartsInterval = 60000; // gráficos/tabela: no máximo 1x por minuto, e só se algo mudou
+        this.streamUrl = `${this.apiBase}/stream`;
+        this.resumo = null;
+        this.alertas = [];
+        this.pendingRefresh = false;
         this.init();
     }
 
@@ -17,13 +22,8 @@ class ArvorepaoDashboard {
             // Mostrar loading
             this.showLoading();
             
-            // Carregar dados em paralelo
-            const [resumo, produtos, categorias, alertas] = await Promise.all([
-                this.fetchData('/resumo'),
-                this.fetchData('/produtos'),
-                this.fetchData('/categorias'),
-                this.fetchData('/alertas')
-            ]);
+            // Carregar todos os painéis em uma única requisição (mesmo snapshot)
+            const { resumo, produtos, categorias, alertas } = await this.fetchData('/dashboard');
 
             // Atualizar KPIs
             this.updateKPIs(resumo);
@@ -268,6 +268,59 @@ class ArvorepaoDashboard {
     }
 
     startAutoUpdate() {
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+
+        // Servidor envia KPIs e alertas apenas quando estoque/preços mudam
+        this.eventSource = new EventSource(this.streamUrl);
+
+        this.eventSource.addEventListener('snapshot', (event) => {
+            const dados = JSON.parse(event.data);
+            this.resumo = dados.resumo;
+            this.alertas = dados.alertas;
+            this.applyLiveData();
+        });
+
+        this.eventSource.addEventListener('delta', (event) => {
+            const delta = JSON.parse(event.data);
+            console.log(`📡 Alteração recebida (versão ${delta.versao})`);
+
+            if (delta.resumo) {
+                Object.assign(this.resumo, delta.resumo);
+            }
+
+            const alertasPorChave = new Map(this.alertas.map(a => [a.chave, a]));
+            (delta.alertas_removidos || []).forEach(chave => alertasPorChave.delete(chave));
+            (delta.alertas_alterados || []).forEach(alerta => alertasPorChave.set(alerta.chave, alerta));
+            this.alertas = [...alertasPorChave.values()].sort((a, b) => b.urgencia - a.urgencia);
+
+            this.applyLiveData();
+            this.pendingRefresh = true;
+        });
+
+        this.eventSource.onerror = () => {
+            // EventSource reconecta sozinho e recebe um novo snapshot
+            console.warn('⚠️ Stream do dashboard desconectado, reconectando...');
+        };
+
+        // Gráficos e tabela de produtos só são recarregados se houve alteração
+        setInterval(() => {
+            if (this.pendingRefresh) {
+                this.pendingRefresh = false;
+                this.loadDashboardData();
+            }
+        }, this.chartsInterval);
+    }
+
+    applyLiveData() {
+        this.updateKPIs(this.resumo);
+        this.updateAlertas(this.alertas);
+        this.updateTimestamp();
+    }
+
+    startPolling() {
         setInterval(() => {
             console.log('🔄 Atualizando dashboard automaticamente...');
             this.loadDashboardData();